@@ -0,0 +1,19 @@
+"""
+Preloading ASGI config for core project.
+
+Like `core.asgi`, but warms up URL resolvers, serializers and the
+database connection at import time, before the server starts accepting
+requests. The `/ready/` endpoint reports ready once this has finished.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+application = get_asgi_application()
+
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,21 @@
+"""Detection of a cache shared by all processes.
+
+Cached data is invalidated by the process that changes it: a signal
+handler in a web worker or in `run_jobs` deletes the stale entries. That
+only reaches the other processes when they all use the same cache. With a
+per-process memory cache, a removed member or a logged-out token would
+keep working on the other workers until the entries expire, so board
+roles, tokens and the payloads derived for boards and users are only
+cached when `is_shared_cache` is True.
+"""
+
+from django.conf import settings
+
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def is_shared_cache():
+    """Return True when the default cache is shared by all processes."""
+    return settings.CACHES['default']['BACKEND'] not in PER_PROCESS_BACKENDS
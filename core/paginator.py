@@ -0,0 +1,72 @@
+"""Paginator for admin changelists over large tables.
+
+Django's paginator runs an exact `COUNT(*)`, which reads a whole table
+on every changelist page. `EstimatedCountPaginator` takes the row count
+of unfiltered tables from the database's statistics and stops counting
+filtered rows at `count_limit`.
+"""
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_rows(queryset):
+    """Return the planner's row estimate of the queryset's table, or None.
+
+    PostgreSQL and MySQL keep estimates up to date; SQLite only has them
+    after `ANALYZE`.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    queries = {
+        'postgresql': (
+            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)"),
+        'mysql': (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s"),
+        'sqlite': "SELECT stat FROM sqlite_stat1 WHERE tbl = %s",
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    # SQLite's stat starts with the table's row count.
+    estimate = int(float(str(row[0]).split()[0]))
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids exact counts of large tables.
+
+    Unfiltered querysets are counted from table statistics once these
+    report at least `exact_below` rows. Filtered querysets are counted
+    exactly up to `count_limit` rows; pages past the limit are not
+    offered.
+    """
+    exact_below = 10000
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        """Return the estimated or capped number of objects."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return queryset[:self.count_limit].count()
@@ -0,0 +1,169 @@
+"""On-demand profiling of live requests.
+
+`ProfilingMiddleware` runs selected requests under `cProfile`, from the
+first middleware through authentication, permissions, serializers and
+rendering, including the body of streamed responses. A request is
+profiled when it carries a signed flag issued with
+`manage.py profile_token`, either in the `X-Profile` header or in the
+`_profile` query parameter, or when it is picked by sampling one in
+`SAMPLE_RATE` requests.
+
+Profiles are written in pstats format, readable with `pstats`, snakeviz
+or flameprof, to a directory that keeps the newest `MAX_FILES` files.
+The response names its profile in the `X-Profile-Id` header, and
+`manage.py list_profiles` lists and summarizes them.
+
+Configured with the `PROFILING` setting. While it is disabled the
+middleware removes itself at startup and adds no work to requests.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'core.profiling'
+QUERY_PARAMETER = '_profile'
+
+# <time>_<method>_<path>_<milliseconds>ms_<pid>.prof
+FILENAME = re.compile(
+    r'^(?P<time>\d{8}T\d{6}\.\d{6})_(?P<method>[A-Z]+)_(?P<path>.*)'
+    r'_(?P<ms>\d+)ms_(?P<pid>\d+)\.prof$')
+
+
+def issue_token(max_age=None):
+    """Return a signed flag that turns on profiling while it is valid."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(
+        str(max_age or settings.PROFILING['TOKEN_MAX_AGE']))
+
+
+def is_valid_token(value):
+    """Return True for an unexpired flag issued by `issue_token`."""
+    signer = signing.TimestampSigner(salt=TOKEN_SALT)
+    try:
+        max_age = int(signer.unsign(value))
+        signer.unsign(value, max_age=max_age)
+    except (signing.BadSignature, ValueError):
+        return False
+    return True
+
+
+def profile_dir():
+    """Return the directory holding the captured profiles."""
+    return Path(settings.PROFILING['DIR'])
+
+
+def parse_filename(name):
+    """Return `(time, method, path, milliseconds)` of a profile file."""
+    match = FILENAME.match(name)
+    if match is None:
+        return None
+    return (
+        datetime.strptime(match['time'], '%Y%m%dT%H%M%S.%f').replace(
+            tzinfo=timezone.utc),
+        match['method'],
+        '/' + match['path'].replace('~', '/'),
+        int(match['ms']),
+    )
+
+
+def list_profiles():
+    """Return the profile files, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    files = [path for path in directory.iterdir() if path.suffix == '.prof']
+    return sorted(files, key=lambda path: path.name, reverse=True)
+
+
+class ProfilingMiddleware:
+    """Profile flagged or sampled requests and store their pstats."""
+
+    def __init__(self, get_response):
+        config = settings.PROFILING
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config.get('SAMPLE_RATE') or 0
+        self.max_files = config['MAX_FILES']
+        self.directory = profile_dir()
+
+    def __call__(self, request):
+        if not self.wants_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        if response.streaming:
+            response.streaming_content = self.profile_stream(
+                profiler, response.streaming_content, request, started)
+        else:
+            name = self.save(profiler, request, started)
+            if name:
+                response['X-Profile-Id'] = name
+        return response
+
+    def wants_profile(self, request):
+        """Return True for flagged requests and for the sampled ones."""
+        flag = (request.headers.get('X-Profile')
+                or request.GET.get(QUERY_PARAMETER))
+        if flag:
+            return is_valid_token(flag)
+        return self.sample_rate > 0 and random.random() * self.sample_rate < 1
+
+    def profile_stream(self, profiler, content, request, started):
+        """Profile the production of a streamed body, chunk by chunk."""
+        chunks = iter(content)
+        try:
+            while True:
+                profiler.enable()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    profiler.disable()
+                yield chunk
+        finally:
+            self.save(profiler, request, started)
+
+    def save(self, profiler, request, started):
+        """Write the profile, drop the oldest beyond `MAX_FILES`.
+
+        Returns the profile's file name, or None if it was not written.
+        """
+        milliseconds = round((time.perf_counter() - started) * 1000)
+        path = re.sub(r'[^\w.~-]', '-', request.path.strip('/').replace(
+            '/', '~'))[:100]
+        now = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%f')
+        name = (f'{now}_{request.method}_{path}_{milliseconds}ms_'
+                f'{os.getpid()}.prof')
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                    dir=self.directory, suffix='.tmp', delete=False) as file:
+                temporary = file.name
+            profiler.dump_stats(temporary)
+            os.replace(temporary, self.directory / name)
+            for old in list_profiles()[self.max_files:]:
+                old.unlink(missing_ok=True)
+        except OSError:
+            logger.exception("Could not write profile %s", name)
+            return None
+        return name
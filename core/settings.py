@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,13 +45,17 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'user_auth_app',
     'kanban_app',
+    'jobs_app',
+    'webhooks_app',
 
 ]
 
 MIDDLEWARE = [
+    "core.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.throttling.ThrottleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -78,6 +84,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# Gives each test run its own throttle buckets and flushes the write-behind
+# buffers before the test databases are destroyed.
+TEST_RUNNER = "core.testing.TestRunner"
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -89,6 +99,45 @@ DATABASES = {
     }
 }
 
+# KANBAN_SHARD_DATABASES=N adds N local SQLite shard files for board data.
+for index in range(1, int(os.environ.get("KANBAN_SHARD_DATABASES", "0")) + 1):
+    DATABASES[f"shard_{index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"db-shard-{index}.sqlite3",
+    }
+
+DATABASE_ROUTERS = ["kanban_app.sharding.ShardRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# Board roles, tokens and board, dashboard and calendar payloads are only
+# cached when all web workers and management commands share the cache (see
+# core.caches). KANBAN_CACHE_URL selects Redis (needs the `redis` package),
+# KANBAN_CACHE_DIR a directory shared by the processes of one host. Without
+# either, each process has its own memory cache and those caches stay off.
+if os.environ.get("KANBAN_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["KANBAN_CACHE_URL"],
+        }
+    }
+elif os.environ.get("KANBAN_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["KANBAN_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,8 +176,145 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 REST_FRAMEWORK = {'DEFAULT_AUTHENTICATION_CLASSES': [
-    'rest_framework.authentication.TokenAuthentication',
+    'user_auth_app.authentication.SignedTokenAuthentication',
+    'user_auth_app.authentication.CachedTokenAuthentication',
 ],
     'DEFAULT_PERMISSION_CLASSES': [
     'rest_framework.permissions.IsAuthenticated',
+],
+    'DEFAULT_THROTTLE_CLASSES': [
+    'core.throttling.SharedBucketThrottle',
 ], }
+
+# Done tasks are moved out of the hot board views by `manage.py archive_tasks`
+# once they have been completed for this many days.
+TASK_ARCHIVE_AFTER_DAYS = 90
+
+# A column is rebalanced in the background once one of its fractional
+# ordering keys grows longer than this many characters.
+TASK_POSITION_MAX_LENGTH = 12
+
+# Seconds a user's dashboard counts are cached. Task and membership changes
+# invalidate the cache earlier.
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Seconds a user's calendar windows are cached. Task and membership changes
+# invalidate them earlier; user profile changes only after this time.
+CALENDAR_CACHE_TIMEOUT = 300
+
+# `manage.py scan_due_dates` notifies assignees and reviewers this many days
+# before a task's due date and again once it is overdue.
+DUE_SOON_DAYS = 2
+
+# Seconds a board's detail payload is cached. Task, board and membership
+# changes invalidate it earlier; user profile changes only after this time.
+BOARD_DETAIL_CACHE_TIMEOUT = 60
+
+# Seconds an authenticated token is cached. Logout and user changes
+# invalidate it earlier.
+TOKEN_CACHE_TIMEOUT = 300
+
+# With SIGNED, login and registration issue signed access tokens valid for
+# ACCESS_LIFETIME seconds, checked without a database query, and refresh
+# tokens valid for REFRESH_LIFETIME seconds (see user_auth_app.tokens).
+# Existing `rest_framework.authtoken` keys keep working either way.
+AUTH_TOKENS = {
+    'SIGNED': False,
+    'ACCESS_LIFETIME': 300,
+    'REFRESH_LIFETIME': 14 * 24 * 3600,
+}
+
+# Board detail reads are counted per board and day, buffered per process
+# and written in batches of BATCH_SIZE, or FLUSH_INTERVAL seconds after the
+# first pending read, to find the boards worth warming after a restart.
+BOARD_HITS = {
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 10.0,
+}
+
+# `manage.py warm_caches` and, with ON_STARTUP, the preloading entry points
+# warm the caches of the BOARDS most read boards of the last DAYS days,
+# using CONCURRENCY threads.
+CACHE_WARMING = {
+    'ON_STARTUP': False,
+    'BOARDS': 50,
+    'DAYS': 7,
+    'CONCURRENCY': 4,
+}
+
+# Database aliases holding the tasks, comments and task activity of boards,
+# one shard per board (see kanban_app.sharding). Only append new aliases:
+# an alias' position selects the primary key range of its rows. Board
+# placements are cached for DIRECTORY_TIMEOUT seconds, which is also how
+# long `manage.py move_board_shard` waits for workers to see a change, and
+# the boards of tasks for TASK_BOARD_TIMEOUT seconds.
+KANBAN_SHARDS = list(DATABASES)
+SHARDING = {
+    'DIRECTORY_TIMEOUT': 5,
+    'TASK_BOARD_TIMEOUT': 3600,
+}
+
+# Tasks read and encoded per chunk by streamed responses (`?stream=1`).
+STREAM_CHUNK_SIZE = 500
+
+# Largest number of boards fetched at once with `GET /api/boards/?ids=`.
+BOARD_FETCH_MAX_IDS = 50
+
+# Largest number of operations accepted by `POST /api/batch/`, and the days
+# after which `manage.py prune_idempotency_keys` forgets their results.
+BATCH_MAX_OPERATIONS = 100
+IDEMPOTENCY_KEY_DAYS = 7
+
+# Token-bucket throttling shared by all worker processes on a host through a
+# memory-mapped file (see core.throttling). Every request counts against its
+# address' ADDRESS_RATE before authentication; API requests then against the
+# user's (or an anonymous address') rate for the URL name in RATES, or
+# DEFAULT_RATE. Rates are (tokens per second, burst size). Off with DEBUG
+# unless KANBAN_THROTTLE=1. Behind reverse proxies, set TRUSTED_PROXIES to
+# the number of proxies appending the client to FORWARDED_HEADER.
+THROTTLE = {
+    'ENABLED': os.environ.get('KANBAN_THROTTLE', '0' if DEBUG else '1') == '1',
+    'PATH': Path(tempfile.gettempdir()) / 'kanban-throttle.bin',
+    'SLOTS': 65536,
+    'FORWARDED_HEADER': 'HTTP_X_FORWARDED_FOR',
+    'TRUSTED_PROXIES': 0,
+    'ADDRESS_RATE': (50.0, 200),
+    'DEFAULT_RATE': (10.0, 50),
+    'RATES': {
+        'board-detail': (5.0, 20),
+    },
+}
+
+# Profiling of live requests (see core.profiling). When ENABLED, requests
+# carrying a flag from `manage.py profile_token` and one in SAMPLE_RATE
+# other requests (0 for none) are profiled. DIR keeps the newest MAX_FILES
+# profiles; flags are valid for TOKEN_MAX_AGE seconds unless given another
+# lifetime.
+PROFILING = {
+    'ENABLED': os.environ.get('KANBAN_PROFILING') == '1',
+    'SAMPLE_RATE': 0,
+    'DIR': Path(tempfile.gettempdir()) / 'kanban-profiles',
+    'MAX_FILES': 200,
+    'TOKEN_MAX_AGE': 3600,
+}
+
+# Outbound webhooks (see webhooks_app). Changes are written to the outbox
+# once their transaction commits; changes of the same task within
+# COALESCE_SECONDS are delivered as one event. `manage.py run_webhooks` posts
+# up to BATCH_SIZE events per request with a TIMEOUT in seconds, reads at
+# most MAX_RESPONSE_BYTES of the answer and retries failures after BACKOFF
+# seconds, doubling up to MAX_BACKOFF, until MAX_ATTEMPTS deliveries failed.
+# Claimed events are taken over by another worker after LEASE seconds.
+# Webhook URLs must resolve to public addresses unless their host is listed
+# in ALLOWED_HOSTS (see webhooks_app.targets).
+WEBHOOKS = {
+    'COALESCE_SECONDS': 2.0,
+    'BATCH_SIZE': 50,
+    'TIMEOUT': 5.0,
+    'MAX_RESPONSE_BYTES': 64 * 1024,
+    'BACKOFF': 5.0,
+    'MAX_BACKOFF': 3600.0,
+    'MAX_ATTEMPTS': 8,
+    'LEASE': 120,
+    'ALLOWED_HOSTS': [],
+}
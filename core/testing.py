@@ -0,0 +1,48 @@
+"""Test runner for the project.
+
+Each run throttles with its own bucket file (see `core.throttling`), so
+token counts do not carry over from earlier runs or a development server.
+Write-behind buffers (see `kanban_app.buffers`) keep items produced by
+the tests in memory. They are written before the test databases are
+destroyed, instead of at exit into databases that no longer exist.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """`DiscoverRunner` isolating throttle state and flushing buffers."""
+
+    def setup_test_environment(self, **kwargs):
+        """Point throttling at a bucket file private to this run."""
+        from core import throttling
+
+        super().setup_test_environment(**kwargs)
+        self._throttle_dir = tempfile.mkdtemp(prefix='kanban-throttle-')
+        self._throttle = settings.THROTTLE
+        settings.THROTTLE = {
+            **settings.THROTTLE,
+            'PATH': Path(self._throttle_dir) / 'throttle.bin',
+        }
+        throttling._buckets = None
+
+    def teardown_test_environment(self, **kwargs):
+        """Restore the throttle settings and remove the run's bucket file."""
+        from core import throttling
+
+        settings.THROTTLE = self._throttle
+        throttling._buckets = None
+        shutil.rmtree(self._throttle_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        """Write pending buffered items, then destroy the test databases."""
+        from kanban_app.buffers import flush_all
+
+        flush_all()
+        super().teardown_databases(old_config, **kwargs)
@@ -0,0 +1,308 @@
+"""Token-bucket request throttling shared between worker processes.
+
+Buckets live in a memory-mapped file, so every worker process on the host
+sees the same token counts without a cache round-trip. Throttling happens
+in two places:
+
+* `ThrottleMiddleware` runs before the view and limits every request per
+  client address (`ADDRESS_RATE`). It bounds the authentication work a
+  client can cause, whatever credentials it sends. Behind reverse proxies
+  the address is read from `FORWARDED_HEADER`, skipping the addresses
+  appended by the `TRUSTED_PROXIES` proxies in front of the server.
+* `SharedBucketThrottle`, REST framework's throttle class, runs after
+  authentication and limits each user per URL name (`RATES`, falling back
+  to `DEFAULT_RATE`), however many tokens the user holds. Anonymous
+  requests are limited per address instead.
+
+Configured with the `THROTTLE` setting:
+
+    THROTTLE = {
+        'ENABLED': True,
+        'PATH': '/tmp/kanban-throttle.bin',
+        'SLOTS': 65536,
+        'FORWARDED_HEADER': 'HTTP_X_FORWARDED_FOR',
+        'TRUSTED_PROXIES': 1,
+        'ADDRESS_RATE': (50.0, 200),            # tokens per second, burst
+        'DEFAULT_RATE': (10.0, 50),
+        'RATES': {'board-detail': (5.0, 20)},   # per URL name
+    }
+
+Counters are kept per slot, under the lock a decision already holds, and
+summed by `stats`, so no lock is shared by all requests.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'KBTB0003'
+# magic, slot count
+HEADER = struct.Struct('<8sQ')
+# key hash, tokens, last refill timestamp, timestamp the bucket is full
+# again, then the allowed, rejected and shared bucket decisions taken in
+# the slot
+SLOT = struct.Struct('<QdddQQQ')
+# endpoint hash, rejected count
+METRIC = struct.Struct('<QQ')
+METRIC_SLOTS = 256
+# Consecutive slots searched for a key's bucket.
+PROBES = 8
+
+
+def _hash(value):
+    """Return a stable non-zero 64 bit hash of a string."""
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class SharedTokenBuckets:
+    """Fixed-size table of token buckets in a memory-mapped file.
+
+    A key's bucket is stored with the key's hash in one of `PROBES`
+    consecutive slots. A new key takes an empty slot or one whose bucket
+    has refilled completely, which holds nothing worth keeping. When every
+    slot of its window holds a refilling bucket of other keys, the key
+    shares the first of them: it is throttled more strictly, never given a
+    fresh bucket. Updates are serialized with a process-local lock plus an
+    `fcntl` byte-range lock on the window, so concurrent processes never
+    interleave a read-modify-write of the same bucket.
+    """
+
+    def __init__(self, path, slots=65536):
+        self.path = str(path)
+        self.slots = slots
+        self.slots_offset = HEADER.size
+        self.metrics_offset = self.slots_offset + slots * SLOT.size
+        self.size = self.metrics_offset + METRIC_SLOTS * METRIC.size
+        self._thread_lock = threading.Lock()
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked(0, HEADER.size):
+            if os.fstat(self._fd).st_size != self.size:
+                os.ftruncate(self._fd, self.size)
+            self._map = mmap.mmap(self._fd, self.size)
+            magic, stored_slots = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or stored_slots != slots:
+                self._map[:] = bytes(self.size)
+                HEADER.pack_into(self._map, 0, MAGIC, slots)
+
+    def take(self, key, rate, burst, endpoint=''):
+        """Take one token for `key`; return (allowed, retry_after)."""
+        key_hash = _hash(key)
+        windows = max(1, self.slots - PROBES + 1)
+        window = self.slots_offset + (key_hash % windows) * SLOT.size
+        probes = min(PROBES, self.slots)
+        now = time.time()
+
+        with self._locked(window, probes * SLOT.size):
+            offset, shared = self._find_slot(window, probes, key_hash, now)
+            (stored_hash, tokens, updated, _, allowed_count, rejected_count,
+             shared_count) = SLOT.unpack_from(self._map, offset)
+            if stored_hash != key_hash and not shared:
+                stored_hash, tokens, updated = key_hash, float(burst), now
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                allowed_count += 1
+            else:
+                rejected_count += 1
+            if shared:
+                shared_count += 1
+            full_at = now + (burst - tokens) / rate
+            SLOT.pack_into(
+                self._map, offset, stored_hash, tokens, now, full_at,
+                allowed_count, rejected_count, shared_count)
+
+        if not allowed:
+            self._count_rejection(endpoint)
+        retry_after = 0 if allowed else (1 - tokens) / rate
+        return allowed, retry_after
+
+    def _find_slot(self, window, probes, key_hash, now):
+        """Return the offset of the key's slot and whether it is shared."""
+        free = None
+        for index in range(probes):
+            offset = window + index * SLOT.size
+            stored_hash, _, _, full_at, *_ = SLOT.unpack_from(
+                self._map, offset)
+            if stored_hash == key_hash:
+                return offset, False
+            if free is None and (not stored_hash or full_at <= now):
+                free = offset
+        if free is not None:
+            return free, False
+        return window, True
+
+    def stats(self):
+        """Return the allowed/rejected totals and rejections per endpoint."""
+        allowed = rejected = shared = 0
+        slots = self._map[self.slots_offset:self.metrics_offset]
+        for *_, allowed_count, rejected_count, shared_count in (
+                SLOT.iter_unpack(slots)):
+            allowed += allowed_count
+            rejected += rejected_count
+            shared += shared_count
+        endpoints = {}
+        for index in range(METRIC_SLOTS):
+            endpoint_hash, count = METRIC.unpack_from(
+                self._map, self.metrics_offset + index * METRIC.size)
+            if endpoint_hash:
+                endpoints[endpoint_hash] = count
+        return {
+            'allowed': allowed,
+            'rejected': rejected,
+            'shared': shared,
+            'endpoints': endpoints,
+        }
+
+    def _count_rejection(self, endpoint):
+        """Count a rejected request of `endpoint`, locking only its entry."""
+        endpoint_hash = _hash(endpoint)
+        offset = self.metrics_offset + (
+            endpoint_hash % METRIC_SLOTS) * METRIC.size
+        with self._locked(offset, METRIC.size):
+            stored_hash, count = METRIC.unpack_from(self._map, offset)
+            if stored_hash != endpoint_hash:
+                count = 0
+            METRIC.pack_into(self._map, offset, endpoint_hash, count + 1)
+
+    def _locked(self, start, length):
+        """Return a context manager locking a byte range of the file."""
+        return _RangeLock(self, start, length)
+
+
+class _RangeLock:
+    """Hold the thread lock and an exclusive `fcntl` lock on a range."""
+
+    def __init__(self, buckets, start, length):
+        self.buckets = buckets
+        self.start = start
+        self.length = length
+
+    def __enter__(self):
+        self.buckets._thread_lock.acquire()
+        if fcntl is not None:
+            fcntl.lockf(
+                self.buckets._fd, fcntl.LOCK_EX, self.length, self.start)
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.lockf(
+                self.buckets._fd, fcntl.LOCK_UN, self.length, self.start)
+        self.buckets._thread_lock.release()
+
+
+_buckets = None
+
+
+def get_buckets():
+    """Return the process-wide bucket table, opening it on first use."""
+    global _buckets
+    if _buckets is None:
+        config = settings.THROTTLE
+        _buckets = SharedTokenBuckets(config['PATH'], config['SLOTS'])
+    return _buckets
+
+
+def client_address(request):
+    """Return the key of a request's client address.
+
+    With `TRUSTED_PROXIES` set, the address is the one the outermost
+    trusted proxy appended to `FORWARDED_HEADER`; clients can only forge
+    the addresses before it.
+    """
+    config = settings.THROTTLE
+    address = request.META.get('REMOTE_ADDR', '')
+    proxies = config.get('TRUSTED_PROXIES', 0)
+    if proxies:
+        forwarded = [
+            value.strip() for value in request.META.get(
+                config['FORWARDED_HEADER'], '').split(',')
+            if value.strip()
+        ]
+        if len(forwarded) >= proxies:
+            address = forwarded[-proxies]
+    return 'addr-' + address
+
+
+class ThrottleMiddleware:
+    """Reject requests over their address' rate with 429.
+
+    Runs before authentication, so it sees neither the user nor whether
+    the credentials are valid; every request counts against its address.
+    """
+
+    def __init__(self, get_response):
+        if not settings.THROTTLE.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate, self.burst = settings.THROTTLE['ADDRESS_RATE']
+        self.buckets = get_buckets()
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Take a token for the client's address or answer 429."""
+        endpoint = request.resolver_match.view_name
+        key = client_address(request)
+        allowed, retry_after = self.buckets.take(
+            key, self.rate, self.burst, endpoint)
+        if allowed:
+            return None
+        logger.info("Throttled %s on %s", key, endpoint)
+        response = JsonResponse(
+            {"detail": "Request was throttled."}, status=429)
+        response['Retry-After'] = str(max(1, round(retry_after)))
+        return response
+
+
+class SharedBucketThrottle(BaseThrottle):
+    """REST framework throttle limiting each user per URL name.
+
+    Checked after authentication, so the user's id identifies the client
+    whatever token it sent; anonymous requests use their address.
+    """
+
+    def allow_request(self, request, view):
+        """Take a token for the user and endpoint."""
+        config = settings.THROTTLE
+        if not config.get('ENABLED'):
+            return True
+        endpoint = request.resolver_match.view_name
+        rate, burst = config.get('RATES', {}).get(
+            endpoint, config['DEFAULT_RATE'])
+        client = self.get_client_key(request)
+        allowed, self.retry_after = get_buckets().take(
+            f'{client}:{endpoint}', rate, burst, endpoint)
+        if not allowed:
+            logger.info("Throttled %s on %s", client, endpoint)
+        return allowed
+
+    def wait(self):
+        """Return the seconds until the next token."""
+        return self.retry_after
+
+    def get_client_key(self, request):
+        """Identify the authenticated user, or else the address."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user-{user.pk}'
+        return client_address(request)
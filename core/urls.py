@@ -18,8 +18,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from core.warmup import readiness
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("ready/", readiness, name="readiness"),
     path("api/", include('user_auth_app.api.urls')),
     path("api/", include('kanban_app.api.urls')),
+    path("api/", include('jobs_app.api.urls')),
+    path("api/", include('webhooks_app.api.urls')),
 ]
@@ -0,0 +1,111 @@
+"""Worker warm-up and readiness reporting.
+
+`warm_up` does the lazy work that would otherwise slow down the first
+requests of a fresh worker: it populates the URL resolvers, builds the
+field trees of every API serializer, warms the caches of the most read
+boards when `CACHE_WARMING['ON_STARTUP']` is set and opens (then closes)
+the database connection. The preloading entry points `core.wsgi_preload`
+and `core.asgi_preload` call it at import time, before the server forks
+its workers. Under the plain `core.wsgi` and `core.asgi` entry points
+nothing warms up at startup, so the first `readiness` probe of a worker
+runs `warm_up` itself and reports ready once it has finished.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import serializers
+
+from .caches import is_shared_cache
+
+logger = logging.getLogger(__name__)
+
+_ready = False
+_lock = threading.Lock()
+
+
+def is_ready():
+    """Return True once `warm_up` has completed in this process."""
+    return _ready
+
+
+def warm_up(close_connections=True):
+    """Prime resolvers, serializers and the database; return timings."""
+    global _ready
+    timings = {}
+
+    start = time.perf_counter()
+    resolver = get_resolver()
+    resolver.reverse_dict
+    # Importing the views also imports every API serializer module.
+    list(_iter_views(resolver))
+    timings['urls'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for serializer_class in _iter_serializers(serializers.Serializer):
+        try:
+            serializer_class().fields
+        except Exception:
+            logger.debug("Could not warm up %s", serializer_class)
+    timings['serializers'] = time.perf_counter() - start
+
+    if settings.CACHE_WARMING['ON_STARTUP'] and not is_shared_cache():
+        logger.warning(
+            "CACHE_WARMING['ON_STARTUP'] is ignored without a shared cache.")
+    elif settings.CACHE_WARMING['ON_STARTUP']:
+        from kanban_app.warming import warm_caches
+
+        report = warm_caches()
+        timings['caches'] = report['seconds']
+        logger.info("Warmed caches: %s", report)
+
+    start = time.perf_counter()
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    # Connections must not be shared with forked workers.
+    if close_connections:
+        connections.close_all()
+    timings['database'] = time.perf_counter() - start
+
+    _ready = True
+    logger.info("Warm-up finished: %s", timings)
+    return timings
+
+
+def _iter_views(resolver):
+    """Yield the view classes of all class-based views in the URLconf."""
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_views(pattern)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+def _iter_serializers(base):
+    """Yield the project's serializer classes derived from `base`."""
+    for serializer_class in base.__subclasses__():
+        if not serializer_class.__module__.startswith('rest_framework'):
+            yield serializer_class
+        yield from _iter_serializers(serializer_class)
+
+
+def readiness(request):
+    """Answer 200 once the worker is warmed up, warming it up if needed."""
+    if not _ready:
+        with _lock:
+            if not _ready:
+                try:
+                    # The worker has forked already: keep its connections.
+                    warm_up(close_connections=False)
+                except Exception:
+                    logger.exception("Warm-up failed")
+                    return JsonResponse({"ready": False}, status=503)
+    return JsonResponse({"ready": True})
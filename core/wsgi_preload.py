@@ -0,0 +1,20 @@
+"""
+Preloading WSGI config for core project.
+
+Like `core.wsgi`, but warms up URL resolvers, serializers and the
+database connection at import time, so a server started with preloading
+(e.g. `gunicorn --preload core.wsgi_preload`) forks ready workers. The
+`/ready/` endpoint reports ready once this has finished.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+application = get_wsgi_application()
+
+from core.warmup import warm_up  # noqa: E402
+
+warm_up()
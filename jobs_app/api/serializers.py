@@ -0,0 +1,21 @@
+"""Serializers for jobs_app API.
+
+Expose the state and progress of background jobs to the clients that
+started them.
+"""
+
+from rest_framework import serializers
+
+from ..models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Read-only representation of a background job's status."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'progress', 'attempts',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
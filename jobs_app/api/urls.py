@@ -0,0 +1,12 @@
+"""URL routes for the jobs_app REST API.
+
+Included into the project's URL configuration under the `api/` path.
+"""
+
+from django.urls import path
+
+from jobs_app.api.views import JobDetailView
+
+urlpatterns = [
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,20 @@
+"""API views for jobs_app.
+
+Lets users poll the background jobs they started, e.g. a board deletion.
+"""
+
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from ..models import Job
+from .serializers import JobSerializer
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """Return the status of a job started by the current user."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Return the jobs created by the requesting user."""
+        return Job.objects.filter(created_by=self.request.user)
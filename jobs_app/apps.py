@@ -0,0 +1,17 @@
+"""App configuration for jobs_app.
+
+Declares the application config for the background job queue and
+discovers the `jobs` modules in which other apps register handlers.
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsAppConfig(AppConfig):
+    """Django AppConfig for the background job application."""
+    name = "jobs_app"
+
+    def ready(self):
+        """Import every installed app's `jobs` module to register handlers."""
+        autodiscover_modules('jobs')
@@ -0,0 +1,59 @@
+"""Management command running the background job worker.
+
+Polls the job table, claims due jobs and executes them on a thread pool.
+Run one or more of these processes next to the web workers.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from jobs_app.queue import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    """Claim and execute queued jobs until interrupted."""
+    help = "Run the background job worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help="Number of jobs executed concurrently.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait when no job is due.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once no job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        """Keep the thread pool busy with claimed jobs."""
+        threads = options['threads']
+        running = set()
+        completed = 0
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            try:
+                while True:
+                    done = {future for future in running if future.done()}
+                    for future in done:
+                        if future.exception():
+                            self.stderr.write(
+                                f"Worker error: {future.exception()!r}")
+                    completed += len(done)
+                    running -= done
+
+                    job_ids = claim_jobs(threads - len(running))
+                    running.update(pool.submit(run_job, job_id)
+                                   for job_id in job_ids)
+
+                    if not job_ids:
+                        if options['once'] and not running:
+                            break
+                        time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping, waiting for running jobs...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker finished {completed + len(running)} jobs."))
@@ -0,0 +1,66 @@
+"""Models for the background job queue.
+
+A `Job` row is a unit of work identified by a handler `kind` and a JSON
+payload. Rows are claimed by the `run_jobs` worker through a conditional
+UPDATE, so the table itself acts as the queue and needs no broker.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A queued unit of background work and its current state."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='jobs')
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # How long a claimed job stays locked without reporting progress
+    # before another worker may take it over.
+    lease = timedelta(minutes=10)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='pending'),
+                name='job_pending_idx'),
+            models.Index(
+                fields=['locked_until'],
+                condition=models.Q(status='running'),
+                name='job_running_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def report_progress(self, **progress):
+        """Merge `progress` into the job's progress and renew the lease."""
+        self.progress.update(progress)
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, locked_until=timezone.now() + self.lease)
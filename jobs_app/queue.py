@@ -0,0 +1,101 @@
+"""Handler registry, enqueueing and execution of background jobs.
+
+Apps register handlers in a `jobs` module with the `job_handler`
+decorator. `enqueue` stores a pending job, `claim_jobs` atomically moves
+due jobs to running for one worker and `run_job` executes a claimed job,
+retrying failures with exponential backoff.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler for `kind` jobs."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    """Return the handler registered for `kind` or None."""
+    return _handlers.get(kind)
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3):
+    """Create and return a pending job of the given kind."""
+    if kind not in _handlers:
+        raise ValueError(f"No job handler registered for '{kind}'.")
+    return Job.objects.create(
+        kind=kind, payload=payload or {}, created_by=user,
+        max_attempts=max_attempts)
+
+
+def claim_jobs(limit):
+    """Claim up to `limit` due jobs and return their ids.
+
+    Pending jobs whose `run_after` has passed and running jobs whose lease
+    expired (their worker died) are candidates. Each one is claimed with
+    a conditional UPDATE so concurrent workers never run the same job.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        Q(status='pending', run_after__lte=now)
+        | Q(status='running', locked_until__lt=now)
+    ).order_by('run_after', 'id').values_list('id', 'status')[:limit]
+
+    claimed = []
+    for job_id, status in list(candidates):
+        claim = Job.objects.filter(id=job_id, status=status)
+        if status == 'running':
+            claim = claim.filter(locked_until__lt=now)
+        updated = claim.update(
+            status='running', started_at=now, locked_until=now + Job.lease,
+            attempts=F('attempts') + 1)
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def run_job(job_id):
+    """Run a claimed job and record success, a retry or the failure."""
+    try:
+        job = Job.objects.get(pk=job_id)
+        handler = get_handler(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No job handler registered for '{job.kind}'.")
+            handler(job)
+        except Exception:
+            logger.exception("Job %s failed", job)
+            _record_failure(job, traceback.format_exc())
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='succeeded', finished_at=timezone.now(),
+                locked_until=None, error='')
+    finally:
+        close_old_connections()
+
+
+def _record_failure(job, error):
+    """Reschedule the job with exponential backoff or mark it failed."""
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status='pending', locked_until=None, error=error,
+            run_after=now + timedelta(seconds=2 ** job.attempts))
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status='failed', locked_until=None, error=error, finished_at=now)
@@ -0,0 +1,90 @@
+"""Recording of task activity.
+
+Task views record status, assignee and priority changes here instead of
+inserting audit rows inside the request's transaction. The events of a
+change are inserted with one `bulk_create` once its transaction commits,
+so a rolled back update leaves no history behind and a committed one has
+its history written before the response is sent. A failed insert is
+logged and does not fail the request. Events are written to the shard of
+their board (see `kanban_app.sharding`).
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, TaskActivity
+from .sharding import allocate_ids, is_sharded
+
+# History field name -> Task attribute compared before and after saving.
+TRACKED_FIELDS = {
+    'status': 'status',
+    'assignee': 'assignee_id',
+    'priority': 'priority',
+}
+
+
+def write_events(events, using):
+    """Insert activity rows into the database of their tasks."""
+    if is_sharded():
+        for event, pk in zip(
+                events, allocate_ids(TaskActivity, using, len(events))):
+            event.pk = pk
+    TaskActivity.objects.using(using).bulk_create(events)
+    return len(events)
+
+
+def snapshot(task):
+    """Return the tracked values of a task, to compare after an update."""
+    return {
+        field: getattr(task, attname)
+        for field, attname in TRACKED_FIELDS.items()
+    }
+
+
+def _event(task, actor, field, old, new):
+    """Build an unsaved activity row for one change."""
+    return TaskActivity(
+        task_id=task.pk, board_id=task.board_id,
+        actor_id=getattr(actor, 'pk', None), field=field,
+        old_value=None if old is None else str(old),
+        new_value=None if new is None else str(new),
+        created_at=timezone.now())
+
+
+def _write_on_commit(events, using):
+    """Write events once the current transaction on `using` commits."""
+    if events:
+        transaction.on_commit(
+            lambda: write_events(events, using), using=using, robust=True)
+
+
+def _record(task, events):
+    """Write events once the transaction that saved the task commits."""
+    _write_on_commit(events, task._state.db)
+
+
+def record_created(task, actor):
+    """Record the creation of a task with its initial status."""
+    _record(task, [_event(task, actor, 'created', None, task.status)])
+
+
+def record_updated(rows, actor, field, new, using):
+    """Record `field` set to `new` on tasks changed by a set-based update.
+
+    `rows` are `(task_id, board_id, old value)` read before the update.
+    """
+    events = [
+        _event(Task(pk=task_id, board_id=board_id), actor, field, old, new)
+        for task_id, board_id, old in rows if old != new
+    ]
+    _write_on_commit(events, using)
+
+
+def record_changes(task, before, actor):
+    """Record every tracked field that differs from the `before` snapshot."""
+    after = snapshot(task)
+    _record(task, [
+        _event(task, actor, field, before[field], after[field])
+        for field in TRACKED_FIELDS
+        if before[field] != after[field]
+    ])
@@ -1,10 +1,301 @@
 """Admin registration for kanban_app models.
 
-Register models here to make them manageable via Django admin.
-Add custom ModelAdmin classes as needed to control list/display
-behavior and permissions.
+Changelists stay usable on large tables: counts come from table
+statistics (`core.paginator.EstimatedCountPaginator`), related owners,
+boards and users are loaded with the page instead of once per row, and
+users and boards are chosen with autocomplete widgets. Bulk actions run
+as set-based updates and invalidate the caches of the touched boards;
+like every set-based update they send no webhook events.
+
+Tasks and comments may live in board shards (see `kanban_app.sharding`);
+their changelists show one shard at a time.
 """
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.paginator import EstimatedCountPaginator
+from jobs_app.queue import enqueue
+
+from .activity import (
+    TRACKED_FIELDS,
+    record_changes,
+    record_updated,
+    snapshot,
+)
+from .cache import invalidate_boards
+from .membership import users_with_access
+from .models import Board, BoardAccess, Comment, Task
+from .sharding import is_sharded, shard_aliases
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """Choose the board shard whose rows the changelist shows."""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        """Offer every shard alias."""
+        return [(alias, alias) for alias in shard_aliases()]
+
+    def choices(self, changelist):
+        """List the shards without an 'All' choice; 'default' is preset."""
+        current = self.value() or DEFAULT_DB_ALIAS
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': alias == current,
+                'query_string': changelist.get_query_string(
+                    {self.parameter_name: alias}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        """Read the rows from the chosen shard."""
+        alias = self.value()
+        if alias in shard_aliases():
+            return queryset.using(alias)
+        return queryset
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """ModelAdmin for tables too large to count exactly."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ShardedModelAdmin(LargeTableAdmin):
+    """ModelAdmin for models stored in the board shards.
+
+    `default_relations` name the `list_select_related` relations to
+    models in 'default'; with sharding they are prefetched instead of
+    joined.
+    """
+    default_relations = ()
+
+    def get_list_filter(self, request):
+        """Offer the shard filter when board data is sharded."""
+        list_filter = super().get_list_filter(request)
+        if is_sharded():
+            return (ShardListFilter, *list_filter)
+        return list_filter
+
+    def get_list_select_related(self, request):
+        """Only join relations stored next to the rows."""
+        if not is_sharded():
+            return self.list_select_related
+        return tuple(
+            name for name in self.list_select_related
+            if name not in self.default_relations)
+
+    def get_queryset(self, request):
+        """Prefetch the relations that cannot be joined across shards."""
+        queryset = super().get_queryset(request)
+        if is_sharded() and self.default_relations:
+            queryset = queryset.prefetch_related(*self.default_relations)
+        return queryset
+
+    def get_object(self, request, object_id, from_field=None):
+        """Find the object in whichever shard holds it."""
+        queryset = self.get_queryset(request)
+        field = (
+            self.model._meta.pk if from_field is None
+            else self.model._meta.get_field(from_field))
+        try:
+            object_id = field.to_python(object_id)
+        except (forms.ValidationError, ValueError):
+            return None
+        for alias in shard_aliases():
+            obj = queryset.using(alias).filter(
+                **{field.name: object_id}).first()
+            if obj is not None:
+                return obj
+        return None
+
+
+def update_tasks(queryset, **values):
+    """Update the tasks in one statement; return the number updated.
+
+    Bumps the tasks' versions and invalidates the caches of their boards.
+    """
+    with transaction.atomic(using=queryset.db):
+        board_ids = set(queryset.values_list('board_id', flat=True))
+        invalidate_boards(board_ids, queryset.db)
+        return queryset.update(
+            version=F('version') + 1, updated_at=timezone.now(), **values)
+
+
+@admin.register(Board)
+class BoardAdmin(LargeTableAdmin):
+    """Boards with their owner, searchable for autocomplete widgets."""
+    list_display = ('id', 'title', 'owner', 'is_deleting')
+    list_select_related = ('owner',)
+    list_filter = ('is_deleting',)
+    search_fields = ('title',)
+    autocomplete_fields = ('owner', 'members')
+    actions = ('delete_in_background',)
+
+    def get_actions(self, request):
+        """Replace the synchronous bulk delete by the background delete."""
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(
+        description="Delete selected boards in the background",
+        permissions=['delete'])
+    def delete_in_background(self, request, queryset):
+        """Hide the boards and queue a delete job for each of them."""
+        with transaction.atomic():
+            board_ids = list(queryset.filter(
+                is_deleting=False).values_list('id', flat=True))
+            Board.objects.filter(pk__in=board_ids).update(is_deleting=True)
+            for board_id in board_ids:
+                enqueue(
+                    'kanban.delete_board', {'board_id': board_id},
+                    user=request.user)
+        invalidate_boards(board_ids)
+        self.message_user(
+            request, f"Queued {len(board_ids)} boards for deletion.")
+
+
+class TaskAdminForm(forms.ModelForm):
+    """Task form carrying the version it was rendered at."""
+    expected_version = forms.IntegerField(
+        widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.fields['expected_version'].initial = self.instance.version
+
+    def clean(self):
+        """Refuse stale edits and users without access to the board."""
+        cleaned_data = super().clean()
+        version = cleaned_data.get('expected_version')
+        if version is not None and version != self.instance.version:
+            raise forms.ValidationError(
+                "The task was changed meanwhile. Reload it to see the "
+                "changes.", code='conflict')
+        board = cleaned_data.get('board') or getattr(
+            self.instance, 'board', None)
+        users = {
+            name: cleaned_data.get(name) for name in ('assignee', 'reviewer')
+            if cleaned_data.get(name) is not None
+        }
+        if board is not None and users:
+            allowed = users_with_access(
+                board.pk, {user.pk for user in users.values()})
+            for name, user in users.items():
+                if user.pk not in allowed:
+                    self.add_error(
+                        name, "The user has no access to the task's board.")
+        return cleaned_data
+
+
+class TaskActionForm(ActionForm):
+    """Action form with the new assignee of the reassign action."""
+    assignee = forms.EmailField(required=False, label="Assignee email")
+
+
+@admin.register(Task)
+class TaskAdmin(ShardedModelAdmin):
+    """Tasks with their board and users, with archive and reassign."""
+    list_display = (
+        'id', 'title', 'board', 'status', 'priority', 'assignee',
+        'due_date', 'archived')
+    list_select_related = ('board', 'assignee', 'reviewer')
+    default_relations = ('board', 'assignee', 'reviewer')
+    list_filter = ('archived', 'status', 'due_date')
+    search_fields = ('title',)
+    autocomplete_fields = ('board', 'assignee', 'reviewer')
+    readonly_fields = ('position', 'comment_count', 'completed_at', 'version')
+    form = TaskAdminForm
+    action_form = TaskActionForm
+    actions = ('archive', 'reassign')
+
+    def get_readonly_fields(self, request, obj=None):
+        """Keep existing tasks on their board, as the API does."""
+        if obj is not None:
+            return ('board', *self.readonly_fields)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        """Write only the changed fields if the task is still as rendered.
+
+        The version the form was rendered at is compared, so edits saved
+        while the form was open are not overwritten.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+        version = form.cleaned_data.get('expected_version')
+        changed = obj.get_changed_fields()
+        before = snapshot(obj)
+        for field, attname in TRACKED_FIELDS.items():
+            if attname in changed:
+                before[field] = changed[attname][0]
+        if obj.save_changes(obj.version if version is None else version):
+            record_changes(obj, before, request.user)
+        else:
+            self.message_user(
+                request, "The task was changed meanwhile and not saved.",
+                messages.ERROR)
+
+    @admin.action(description="Archive selected done tasks",
+                  permissions=['change'])
+    def archive(self, request, queryset):
+        """Flag the selected done tasks as archived."""
+        archived = update_tasks(
+            queryset.filter(status='done', archived=False), archived=True)
+        self.message_user(request, f"Archived {archived} tasks.")
+
+    @admin.action(description="Reassign selected tasks to the given user",
+                  permissions=['change'])
+    def reassign(self, request, queryset):
+        """Assign the tasks on boards the user can access to that user.
+
+        The task history records every reassignment; webhooks are not
+        notified, as for all set-based updates.
+        """
+        email = request.POST.get('assignee', '').strip()
+        user = email and User.objects.filter(email__iexact=email).first()
+        if not user:
+            self.message_user(
+                request, "Enter the email of an existing user.",
+                messages.ERROR)
+            return
+        board_ids = list(BoardAccess.objects.filter(
+            user=user).values_list('board_id', flat=True))
+        tasks = queryset.filter(board_id__in=board_ids)
+        with transaction.atomic(using=tasks.db):
+            rows = list(tasks.values_list('id', 'board_id', 'assignee_id'))
+            reassigned = update_tasks(tasks, assignee=user)
+            record_updated(rows, request.user, 'assignee', user.pk, tasks.db)
+        skipped = queryset.exclude(board_id__in=board_ids).count()
+        self.message_user(
+            request, f"Reassigned {reassigned} tasks to {user.email}, "
+            f"skipped {skipped} on boards the user cannot access.")
+
+
+@admin.register(Comment)
+class CommentAdmin(ShardedModelAdmin):
+    """Comments with their author and task, newest first."""
+    list_display = ('id', 'task', 'author', 'created_at')
+    list_select_related = ('task', 'author')
+    default_relations = ('author',)
+    # The primary key follows creation order and, unlike created_at, is
+    # indexed on its own.
+    ordering = ('-id',)
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('task',)
 
-# Register your models here.
+    def get_readonly_fields(self, request, obj=None):
+        """Keep existing comments on their task and author."""
+        if obj is not None:
+            return ('task', 'author', 'created_at')
+        return ()
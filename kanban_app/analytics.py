@@ -0,0 +1,197 @@
+"""Cumulative flow and cycle-time rollups per board.
+
+Status transitions are recorded as they happen in the task activity log
+(`kanban_app.activity`). `roll_up` runs nightly and turns the log into
+`FlowRollup` rows: for every day since the previous run, the number of
+tasks in each column at the end of the day, how many tasks entered the
+column and, for 'done', the summed cycle times. Only columns that changed
+on a day get a row, so the analytics endpoint reads a few hundred rows
+for a year-long chart instead of scanning tasks or their history.
+
+Column sizes are derived from the current task counts by undoing the
+transitions logged since the end of each day, which keeps every run
+proportional to the recent activity. Counts and events are read from
+every shard (see `kanban_app.sharding`).
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Board, FlowRollup, FlowRollupScan, Task, TaskActivity
+from .sharding import home_rows, shard_aliases
+
+STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+
+def _start_of(day):
+    """Return the aware datetime at which a local day starts."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _apply(counts, event, sign):
+    """Add (sign=1) or undo (sign=-1) one transition on column counts."""
+    board_id, _, old, new, _ = event
+    counts[(board_id, new)] += sign
+    if old is not None:
+        counts[(board_id, old)] -= sign
+
+
+def roll_up(until=None):
+    """Build rollups for the days after the watermark through `until`.
+
+    `until` defaults to yesterday. The first run only rolls up `until`.
+    Returns the number of days rolled up.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    scan = FlowRollupScan.objects.first()
+    first = scan.rolled_up_through + timedelta(days=1) if scan else until
+    if first > until:
+        return 0
+    days = [first + timedelta(days=n) for n in range((until - first).days + 1)]
+
+    events = []
+    counts = Counter()
+    for using in shard_aliases():
+        events += home_rows(using, TaskActivity.objects.using(using).filter(
+            field__in=['created', 'status'], created_at__gte=_start_of(first),
+        ).order_by('created_at', 'id').values_list(
+            'board_id', 'task_id', 'old_value', 'new_value', 'created_at',
+        ), board_of=lambda event: event[0])
+        counts.update({
+            (board_id, status): total
+            for board_id, status, total in home_rows(
+                using, Task.objects.using(using).values_list(
+                    'board_id', 'status',
+                ).annotate(total=Count('id')).order_by(),
+                board_of=lambda row: row[0])
+        })
+    events.sort(key=lambda event: event[4])
+    events_by_day = defaultdict(list)
+    until_end = _start_of(until + timedelta(days=1))
+    for event in events:
+        if event[4] >= until_end:
+            _apply(counts, event, -1)
+        else:
+            events_by_day[timezone.localdate(event[4])].append(event)
+
+    # Walk back from the end of `until` to the end of the day before `first`.
+    day_end_counts = {}
+    for day in reversed(days):
+        day_end_counts[day] = counts.copy()
+        for event in events_by_day[day]:
+            _apply(counts, event, -1)
+
+    started = _task_start_times(events_by_day)
+    previous = counts if scan else Counter()
+    rollups = []
+    for day in days:
+        rollups += _day_rollups(
+            day, previous, day_end_counts[day], events_by_day[day], started)
+        previous = day_end_counts[day]
+
+    existing = set(Board.objects.filter(
+        id__in={rollup.board_id for rollup in rollups},
+    ).values_list('id', flat=True))
+    with transaction.atomic():
+        FlowRollup.objects.bulk_create(
+            [rollup for rollup in rollups if rollup.board_id in existing],
+            batch_size=500, update_conflicts=True,
+            unique_fields=['board', 'status', 'day'],
+            update_fields=[
+                'tasks', 'entered', 'cycle_seconds', 'cycle_count'])
+        if scan:
+            FlowRollupScan.objects.filter(pk=scan.pk).update(
+                rolled_up_through=until)
+        else:
+            FlowRollupScan.objects.create(rolled_up_through=until)
+    return len(days)
+
+
+def _task_start_times(events_by_day):
+    """Return the creation times of the tasks completed in the events."""
+    done = {
+        event[1] for events in events_by_day.values() for event in events
+        if event[3] == 'done'
+    }
+    started = {}
+    for using in shard_aliases():
+        started.update(TaskActivity.objects.using(using).filter(
+            field='created', task_id__in=done,
+        ).values_list('task_id', 'created_at'))
+    return started
+
+
+def _day_rollups(day, previous, current, events, started):
+    """Return unsaved rollups for the columns that changed on `day`."""
+    entered = Counter((event[0], event[3]) for event in events)
+    cycles = defaultdict(list)
+    for board_id, task_id, _, new, created_at in events:
+        if new == 'done' and task_id in started:
+            cycles[board_id].append(
+                (created_at - started[task_id]).total_seconds())
+
+    rollups = []
+    for key in set(previous) | set(current):
+        board_id, status = key
+        if current[key] == previous[key] and not entered[key]:
+            continue
+        cycle = cycles.get(board_id, []) if status == 'done' else []
+        rollups.append(FlowRollup(
+            board_id=board_id, day=day, status=status,
+            tasks=max(0, current[key]), entered=entered[key],
+            cycle_seconds=sum(cycle), cycle_count=len(cycle)))
+    return rollups
+
+
+def board_flow(board_id, start, end):
+    """Return the daily column sizes, throughput and cycle times of a board.
+
+    Days after the last rollup are left out. Reads the rollups in the
+    range plus the latest row of each column before it.
+    """
+    scan = FlowRollupScan.objects.first()
+    if scan is None:
+        return []
+    end = min(end, scan.rolled_up_through)
+
+    rollups = FlowRollup.objects.filter(board_id=board_id)
+    latest = rollups.filter(day__lt=start).values('status').annotate(
+        last=Max('day')).order_by()
+    baseline = Q(pk__in=[])
+    for row in latest:
+        baseline |= Q(status=row['status'], day=row['last'])
+    rows = rollups.filter(
+        baseline | Q(day__gte=start, day__lte=end)).order_by('day')
+
+    by_day = defaultdict(list)
+    tasks = dict.fromkeys(STATUSES, 0)
+    for row in rows:
+        if row.day < start:
+            tasks[row.status] = row.tasks
+        else:
+            by_day[row.day].append(row)
+
+    days = []
+    day = start
+    while day <= end:
+        completed, cycle_seconds = 0, None
+        for row in by_day[day]:
+            tasks[row.status] = row.tasks
+            if row.status == 'done':
+                completed = row.entered
+                if row.cycle_count:
+                    cycle_seconds = row.cycle_seconds / row.cycle_count
+        days.append({
+            'day': day,
+            'tasks': dict(tasks),
+            'completed': completed,
+            'cycle_time_hours': (
+                None if cycle_seconds is None
+                else round(cycle_seconds / 3600, 2)),
+        })
+        day += timedelta(days=1)
+    return days
@@ -0,0 +1,205 @@
+"""Batched task and comment mutations for kanban_app API.
+
+Offline clients replay their queued changes as one `POST /api/batch/`
+request instead of one HTTP call per change. Operations run in order
+inside a single transaction, reuse the regular task and comment
+serializers and share one lookup of the referenced tasks and of the
+boards the user can access.
+
+Every operation carries a client-supplied idempotency `key`. The result
+of an operation is stored under its key in the same transaction, so a
+retried batch returns the stored results instead of applying the
+changes again.
+
+With sharded board data (see `kanban_app.sharding`) the batch runs in
+one transaction per database, committed one after the other.
+"""
+
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied
+
+from ..activity import record_changes, record_created, snapshot
+from ..models import Board, BoardAccess, IdempotencyKey, Task
+from ..sharding import atomic_everywhere, is_sharded, load_tasks
+from .serializers import (
+    CommentSerializer,
+    TaskCreateSerializer,
+    TaskUpdateSerializer,
+)
+
+TARGETS = {
+    'task.update': 'id',
+    'task.delete': 'id',
+    'comment.create': 'task',
+}
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """One queued mutation of a batch."""
+    op = serializers.ChoiceField(choices=[
+        'task.create', 'task.update', 'task.delete', 'comment.create'])
+    key = serializers.CharField(max_length=100)
+    id = serializers.IntegerField(required=False)
+    task = serializers.IntegerField(required=False)
+    version = serializers.IntegerField(required=False, min_value=1)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        """Require the target task id of operations on existing tasks."""
+        target = TARGETS.get(attrs['op'])
+        if target and target not in attrs:
+            raise serializers.ValidationError(
+                {target: f"Required for {attrs['op']}."})
+        return attrs
+
+
+class BatchSerializer(serializers.Serializer):
+    """A list of operations with unique idempotency keys."""
+    operations = BatchOperationSerializer(
+        many=True, allow_empty=False,
+        max_length=settings.BATCH_MAX_OPERATIONS)
+
+    def validate_operations(self, operations):
+        """Reject batches that use an idempotency key twice."""
+        keys = [operation['key'] for operation in operations]
+        if len(set(keys)) != len(keys):
+            raise serializers.ValidationError(
+                "Idempotency keys must be unique within a batch.")
+        return operations
+
+
+class Batch:
+    """Apply the validated operations of one batch for one user."""
+
+    def __init__(self, request, operations):
+        self.request = request
+        self.user = request.user
+        self.operations = operations
+        self.context = {'request': request}
+
+    def run(self):
+        """Apply all operations in one transaction; return their results.
+
+        An operation that fails raises its API exception with the index
+        of the operation set as `batch_index`, rolling back the batch.
+        """
+        with atomic_everywhere():
+            stored = self.load_stored_results()
+            self.preload()
+            results, new_keys = [], []
+            for index, operation in enumerate(self.operations):
+                key = operation['key']
+                if key in stored:
+                    results.append(
+                        {**stored[key], 'key': key, 'replayed': True})
+                    continue
+                try:
+                    code, data = self.apply(operation)
+                except APIException as exc:
+                    exc.batch_index = index
+                    raise
+                result = {'status': code, 'data': data}
+                results.append({**result, 'key': key, 'replayed': False})
+                new_keys.append(IdempotencyKey(
+                    user=self.user, key=key, response=result))
+            IdempotencyKey.objects.bulk_create(new_keys)
+        return results
+
+    def load_stored_results(self):
+        """Return the stored results of keys this user has already used."""
+        keys = [operation['key'] for operation in self.operations]
+        return dict(IdempotencyKey.objects.filter(
+            user=self.user, key__in=keys).values_list('key', 'response'))
+
+    def preload(self):
+        """Fetch the targeted tasks and the user's access in two queries."""
+        task_ids = {
+            operation[TARGETS[operation['op']]]
+            for operation in self.operations if operation['op'] in TARGETS
+        }
+        self.tasks = self.load_tasks(task_ids)
+        board_ids = {task.board_id for task in self.tasks.values()}
+        for operation in self.operations:
+            if operation['op'] != 'task.create':
+                continue
+            # Boards may be named like `"1"`, as the serializer accepts.
+            try:
+                board_ids.add(int(operation['data'].get('board')))
+            except (TypeError, ValueError):
+                pass
+        self.board_ids = set(BoardAccess.objects.filter(
+            user=self.user, board_id__in=board_ids,
+        ).values_list('board_id', flat=True))
+
+    def load_tasks(self, task_ids):
+        """Return `{id: task}` of the tasks on boards not being deleted."""
+        if not is_sharded():
+            return Task.objects.select_related('board').filter(
+                board__is_deleting=False).in_bulk(task_ids)
+        tasks = load_tasks(task_ids)
+        deleting = set(Board.objects.filter(
+            pk__in={task.board_id for task in tasks.values()},
+            is_deleting=True,
+        ).values_list('id', flat=True))
+        return {
+            pk: task for pk, task in tasks.items()
+            if task.board_id not in deleting
+        }
+
+    def apply(self, operation):
+        """Run one operation and return `(status_code, data)`."""
+        handler = getattr(self, operation['op'].replace('.', '_'))
+        return handler(operation)
+
+    def get_task(self, task_id):
+        """Return a preloaded task the user may change."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise NotFound("No Task matches the given query.")
+        self.check_board(task.board_id)
+        return task
+
+    def check_board(self, board_id):
+        """Raise PermissionDenied unless the user can access the board."""
+        if board_id not in self.board_ids:
+            raise PermissionDenied(
+                "You must be a member or owner of the board.")
+
+    def task_create(self, operation):
+        """Create a task like `POST /api/tasks/`."""
+        serializer = TaskCreateSerializer(
+            data=operation['data'], context=self.context)
+        serializer.is_valid(raise_exception=True)
+        self.check_board(serializer.validated_data['board'].pk)
+        task = serializer.save()
+        record_created(task, self.user)
+        self.tasks[task.pk] = task
+        return status.HTTP_201_CREATED, serializer.data
+
+    def task_update(self, operation):
+        """Partially update a task like `PATCH /api/tasks/<id>/`."""
+        task = self.get_task(operation['id'])
+        serializer = TaskUpdateSerializer(
+            task, data=operation['data'], partial=True, context=self.context)
+        serializer.is_valid(raise_exception=True)
+        before = snapshot(task)
+        serializer.save(version=operation.get('version', task.version))
+        record_changes(task, before, self.user)
+        return status.HTTP_200_OK, serializer.data
+
+    def task_delete(self, operation):
+        """Delete a task like `DELETE /api/tasks/<id>/`."""
+        task = self.get_task(operation['id'])
+        task.delete()
+        del self.tasks[operation['id']]
+        return status.HTTP_204_NO_CONTENT, None
+
+    def comment_create(self, operation):
+        """Comment on a task like `POST /api/tasks/<id>/comments/`."""
+        task = self.get_task(operation['task'])
+        serializer = CommentSerializer(
+            data=operation['data'], context=self.context)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(author=self.user, task=task)
+        return status.HTTP_201_CREATED, serializer.data
@@ -0,0 +1,150 @@
+"""Compound documents of several boards for kanban_app API.
+
+`GET /api/boards/?ids=1,2,3&include=members,tasks` returns the details of
+many boards in one response instead of one request per board. Access to
+all boards is checked by the query that loads them, and members, tasks
+and users are each loaded for all boards at once, in the manner of a
+dataloader. Boards refer to users by id; every referenced user appears
+once in the document's `users` list.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import serializers
+
+from ..models import Board, Task
+from ..sharding import group_boards, home_rows
+from .serializers import TaskListSerializer, UserDetailSerializer
+
+INCLUDES = ('members', 'tasks')
+
+
+class BoardBundleQuerySerializer(serializers.Serializer):
+    """Parse the comma separated `ids` and `include` query parameters."""
+    ids = serializers.CharField()
+    include = serializers.CharField(required=False, default='')
+
+    def validate_ids(self, value):
+        """Return the distinct board ids in request order."""
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Must be a comma separated list of board ids.")
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError("Name at least one board.")
+        if len(ids) > settings.BOARD_FETCH_MAX_IDS:
+            raise serializers.ValidationError(
+                f"At most {settings.BOARD_FETCH_MAX_IDS} boards per request.")
+        return ids
+
+    def validate_include(self, value):
+        """Return the set of included relations."""
+        include = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = include - set(INCLUDES)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown relations: {', '.join(sorted(unknown))}. "
+                f"Choose from {', '.join(INCLUDES)}.")
+        return include
+
+
+class BundleTaskSerializer(TaskListSerializer):
+    """A task of a compound document, referring to its users by id."""
+    assignee = serializers.PrimaryKeyRelatedField(read_only=True)
+    reviewer = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class BoardBundleSerializer(serializers.ModelSerializer):
+    """A board of a compound document with its included relations."""
+    owner_id = serializers.IntegerField(read_only=True)
+    members = serializers.ListField(
+        source='bundle_member_ids', child=serializers.IntegerField(),
+        read_only=True)
+    tasks = BundleTaskSerializer(
+        source='bundle_tasks', many=True, read_only=True)
+
+    class Meta:
+        model = Board
+        fields = ['id', 'title', 'owner_id', 'members', 'tasks']
+
+    def get_fields(self):
+        """Drop the relations that were not included."""
+        fields = super().get_fields()
+        include = self.context.get('include', set())
+        return {
+            name: field for name, field in fields.items()
+            if name not in INCLUDES or name in include
+        }
+
+
+class BoardBundle:
+    """Load boards, their members, tasks and users in a few queries.
+
+    One query loads the accessible boards, one their memberships, one per
+    shard their active tasks and one the referenced users, however many
+    boards are requested.
+    """
+
+    def __init__(self, user, board_ids, include):
+        self.user = user
+        self.board_ids = board_ids
+        self.include = include
+
+    def load(self):
+        """Return the compound document of the accessible boards."""
+        boards = self.load_boards()
+        user_ids = {board.owner_id for board in boards}
+        if 'members' in self.include:
+            user_ids.update(self.load_members(boards))
+        if 'tasks' in self.include:
+            user_ids.update(self.load_tasks(boards))
+        found = {board.pk for board in boards}
+        context = {'include': self.include}
+        return {
+            'boards': BoardBundleSerializer(
+                boards, many=True, context=context).data,
+            'users': UserDetailSerializer(
+                self.load_users(user_ids), many=True).data,
+            'missing': [pk for pk in self.board_ids if pk not in found],
+        }
+
+    def load_boards(self):
+        """Return the requested boards the user can access, in order."""
+        boards = Board.objects.filter(
+            pk__in=self.board_ids, access__user=self.user,
+            is_deleting=False).only('id', 'title', 'owner')
+        by_id = {board.pk: board for board in boards}
+        return [by_id[pk] for pk in self.board_ids if pk in by_id]
+
+    def load_members(self, boards):
+        """Attach the member ids to the boards; return all of them."""
+        members = {board.pk: [] for board in boards}
+        for board_id, user_id in Board.members.through.objects.filter(
+                board_id__in=members).order_by('id').values_list(
+                'board_id', 'user_id'):
+            members[board_id].append(user_id)
+        for board in boards:
+            board.bundle_member_ids = members[board.pk]
+        return {pk for ids in members.values() for pk in ids}
+
+    def load_tasks(self, boards):
+        """Attach the active tasks to the boards; return their user ids."""
+        tasks = {board.pk: [] for board in boards}
+        for using, board_ids in group_boards(list(tasks)).items():
+            rows = Task.objects.using(using).active().filter(
+                board_id__in=board_ids).order_by('status', 'position', 'id')
+            for task in home_rows(using, rows):
+                tasks[task.board_id].append(task)
+        for board in boards:
+            board.bundle_tasks = tasks[board.pk]
+        return {
+            pk for rows in tasks.values() for task in rows
+            for pk in (task.assignee_id, task.reviewer_id) if pk is not None
+        }
+
+    def load_users(self, user_ids):
+        """Return the referenced users ordered by id."""
+        return User.objects.filter(pk__in=user_ids).only(
+            'id', 'email', 'first_name').order_by('id')
@@ -0,0 +1,47 @@
+"""Custom serializer fields for kanban_app API.
+
+Contains fields that resolve submitted values with fewer queries than the
+REST framework defaults.
+"""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+
+
+class BulkPrimaryKeyRelatedField(serializers.ManyRelatedField):
+    """List of primary keys resolved with a single `id__in` query.
+
+    Behaves like `PrimaryKeyRelatedField(many=True)`, which looks up every
+    submitted id with its own query, but validates the whole list at once.
+    Duplicates are dropped while keeping the submitted order.
+    """
+
+    def __init__(self, queryset, **kwargs):
+        child = serializers.PrimaryKeyRelatedField(queryset=queryset)
+        super().__init__(child_relation=child, **kwargs)
+
+    def to_internal_value(self, data):
+        """Validate the ids and return the matching objects in order."""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (DjangoValidationError, TypeError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        pks = list(dict.fromkeys(pks))
+        objects = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
@@ -0,0 +1,216 @@
+"""Sparse fieldset and expansion helpers for kanban_app API.
+
+Read endpoints accept two optional query parameters:
+
+- `?fields=id,title,tasks.id,tasks.status` limits the serialized output
+  to the listed fields. Dotted names select fields of nested serializers.
+- `?expand=tasks.assignee` lists the nested relations rendered as full
+  objects. Relations that are not listed are rendered as primary keys.
+  Without the parameter every relation is expanded, as before.
+
+The same parsed trees are used by the views to prune the underlying
+querysets with `only()` and `select_related`, or `prefetch_related` for
+users when tasks live in shards apart from them.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from rest_framework import permissions, serializers
+
+from ..models import Task
+from ..sharding import is_sharded
+
+
+def parse_fieldset(value):
+    """Parse a comma separated list of dotted names into a nested dict.
+
+    `'id,tasks.id,tasks.title'` becomes
+    `{'id': {}, 'tasks': {'id': {}, 'title': {}}}`. An empty dict means
+    "no restriction" at that level.
+    """
+    tree = {}
+    for name in (value or '').split(','):
+        node = tree
+        for part in name.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def get_subtree(tree, path):
+    """Return the part of a parsed tree below `path`, or None if absent."""
+    for name in path:
+        if name not in tree:
+            return None
+        tree = tree[name]
+    return tree
+
+
+def wants(tree, name):
+    """Return True when `name` is part of the (possibly empty) tree."""
+    return not tree or name in tree
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin that applies `?fields=` and `?expand=` on reads.
+
+    `expandable_fields` names nested relations that collapse to primary
+    keys when `?expand=` is given without them.
+    """
+    expandable_fields = ()
+
+    def get_fields(self):
+        """Drop unrequested fields and collapse unexpanded relations."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return fields
+
+        path = self._get_field_path()
+        fieldset = get_subtree(
+            parse_fieldset(request.query_params.get('fields')), path)
+        if fieldset:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in fieldset
+            }
+
+        if 'expand' in request.query_params:
+            expand = get_subtree(
+                parse_fieldset(request.query_params.get('expand')), path)
+            for name in self.expandable_fields:
+                if name in fields and name not in (expand or {}):
+                    fields[name] = self._collapse(name, fields[name])
+        return fields
+
+    def _get_field_path(self):
+        """Return the field names leading from the root serializer here."""
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return names[::-1]
+
+    def _collapse(self, name, field):
+        """Replace a nested serializer with a read-only primary key field."""
+        kwargs = {'read_only': True}
+        if isinstance(field, serializers.ListSerializer):
+            kwargs['many'] = True
+        if field.source and field.source != name:
+            kwargs['source'] = field.source
+        return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsetViewMixin:
+    """View mixin exposing the parsed `?fields=` and `?expand=` trees."""
+
+    def get_fieldset(self, *path):
+        """Return the requested fields below `path` ({} means all)."""
+        fieldset = parse_fieldset(self.request.query_params.get('fields'))
+        return get_subtree(fieldset, path) or {}
+
+    def get_expand(self, *path):
+        """Return the expanded relations below `path`, None means all."""
+        if 'expand' not in self.request.query_params:
+            return None
+        expand = parse_fieldset(self.request.query_params.get('expand'))
+        return get_subtree(expand, path) or {}
+
+
+TASK_MODEL_FIELDS = {
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'priority': 'priority',
+    'due_date': 'due_date',
+    'assignee': 'assignee',
+    'reviewer': 'reviewer',
+    'comments_count': 'comment_count',
+    'position': 'position',
+    'version': 'version',
+}
+
+USER_FIELDS = ['id', 'email', 'first_name']
+
+
+def related_users(queryset, names, columns):
+    """Load the users behind the foreign keys `names` along with the rows.
+
+    Users are joined, or prefetched when the rows live in a shard apart
+    from the users. Returns the queryset and the names to add to `only()`.
+    """
+    if not names:
+        return queryset, []
+    if is_sharded():
+        users = User.objects.only('id', *columns)
+        return queryset.prefetch_related(*[
+            Prefetch(name, queryset=users) for name in names
+        ]), list(names)
+    return queryset.select_related(*names), [
+        f'{name}__{column}' for name in names for column in columns
+    ]
+
+
+def prune_task_queryset(queryset, fieldset, expand, required=()):
+    """Restrict a Task queryset to the columns and joins that are rendered.
+
+    `fieldset` is a parsed `?fields=` tree ({} means all fields) and
+    `expand` a parsed `?expand=` tree (None means expand everything).
+    `required` names model fields the view needs regardless of the output.
+    """
+    related = [
+        name for name in ('assignee', 'reviewer')
+        if wants(fieldset, name) and (expand is None or name in expand)
+    ]
+    queryset, related_only = related_users(queryset, related, USER_FIELDS)
+
+    if fieldset:
+        only = ['id', 'board', *required]
+        only += [
+            column for name, column in TASK_MODEL_FIELDS.items()
+            if name in fieldset
+        ]
+        only += related_only
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def prune_board_queryset(queryset, fieldset, expand, tasks=True):
+    """Prefetch only the board relations the detail serializer renders.
+
+    With `tasks=False` the tasks are left to the caller, e.g. to stream
+    them.
+    """
+    if fieldset:
+        queryset = queryset.only('id', 'title', 'owner')
+
+    if wants(fieldset, 'members'):
+        if expand is None or 'members' in expand:
+            members = prune_user_queryset(
+                User.objects.all(), fieldset.get('members', {}))
+        else:
+            members = User.objects.only('id')
+        queryset = queryset.prefetch_related(
+            Prefetch('members', queryset=members))
+
+    if tasks and wants(fieldset, 'tasks'):
+        tasks = prune_task_queryset(
+            Task.objects.active().order_by('status', 'position', 'id'),
+            fieldset.get('tasks', {}),
+            None if expand is None else expand.get('tasks', {}),
+        )
+        queryset = queryset.prefetch_related(Prefetch(
+            'tasks', queryset=tasks, to_attr='prefetched_active_tasks'))
+    return queryset
+
+
+def prune_user_queryset(queryset, fieldset):
+    """Limit a User queryset to the columns of `UserDetailSerializer`."""
+    if fieldset:
+        columns = {'email': 'email', 'fullname': 'first_name'}
+        queryset = queryset.only(
+            'id', *[column for name, column in columns.items()
+                    if name in fieldset])
+    return queryset
@@ -0,0 +1,60 @@
+"""Pagination classes for kanban_app API.
+
+Long lists are served in keyset (cursor) pages so the cost of a page
+does not depend on how deep into the list the client has scrolled.
+"""
+
+import base64
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class CommentCursorPagination(CursorPagination):
+    """Newest-first keyset pages over a task's comment thread."""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ArchivedTaskCursorPagination(CursorPagination):
+    """Most recently completed first keyset pages over archived tasks."""
+    ordering = ('-completed_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Newest-first keyset pages over a user's notifications."""
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ActivityCursorPagination(CursorPagination):
+    """Newest-first keyset pages over task or board activity."""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    raw = json.dumps(list(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor created by `encode_cursor` into `size` values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise NotFound("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise NotFound("Invalid cursor.")
+    return values
@@ -4,8 +4,9 @@ Contains permission checks used by API views to ensure that only board
 owners or members can access or modify boards, tasks and comments.
 """
 
-from ..models import Task
-from django.shortcuts import get_object_or_404
+from ..membership import has_board_access
+from ..sharding import board_for_task
+from django.http import Http404
 from rest_framework import permissions
 
 
@@ -13,12 +14,9 @@ class IsBoardMemberOrOwner(permissions.BasePermission):
     """Allow owners and board members to access or modify a board."""
     def has_object_permission(self, request, view, obj):
         if request.method == 'DELETE':
-            return obj.owner == request.user
+            return has_board_access(request.user, obj.pk, role='owner')
 
-        return (
-            obj.owner == request.user
-            or obj.members.filter(id=request.user.id).exists()
-        )
+        return has_board_access(request.user, obj.pk)
 
 
 class IsMemberOfTaskBoard(permissions.BasePermission):
@@ -27,20 +25,17 @@ class IsMemberOfTaskBoard(permissions.BasePermission):
         task_id = view.kwargs.get('task_id')
 
         if task_id:
-            task = get_object_or_404(Task, id=task_id)
-            board = task.board
-            return (
-                board.owner == request.user
-                or board.members.filter(id=request.user.id).exists()
-            )
+            # The task's board is cached; tasks may live in a shard.
+            board_id = board_for_task(task_id)
+            if board_id is None:
+                raise Http404("No Task matches the given query.")
+            return has_board_access(request.user, board_id)
 
         return True
 
     def has_object_permission(self, request, view, obj):
         """Return True when the request user is the board owner or a member."""
-        board = obj.board
-        user = request.user
-        return board.owner == user or board.members.filter(id=user.id).exists()
+        return has_board_access(request.user, obj.board_id)
 
 
 class IsAuthor(permissions.BasePermission):
@@ -5,12 +5,62 @@ from JSON representations used by the REST API. Includes create/update
 validation rules specific to the domain (e.g., board membership checks).
 """
 
+from django.db.models import Max, Min
 from rest_framework import serializers
-from ..models import Board, Task, Comment
+from rest_framework.exceptions import APIException, ErrorDetail, NotFound
+from ..models import Board, Task, Comment, Notification, TaskActivity
 from django.contrib.auth.models import User
-
-
-class BoardSerializer(serializers.ModelSerializer):
+from ..membership import set_board_members, users_with_access
+from ..ordering import key_between, last_position
+from ..sharding import shard_for_board
+from .fields import BulkPrimaryKeyRelatedField
+from .mixins import SparseFieldsetMixin
+
+
+def validate_board_users(board, data):
+    """Ensure assignee and reviewer can access the board, in one query."""
+    users = {
+        field: data[field] for field in ('assignee', 'reviewer')
+        if data.get(field)
+    }
+    if not users:
+        return
+    allowed = users_with_access(board.pk, {user.pk for user in users.values()})
+    for field, user in users.items():
+        if user.pk not in allowed:
+            raise serializers.ValidationError(
+                {f"{field}_id": "User is not a member of this board."})
+
+
+class TaskConflict(APIException):
+    """The task changed since the version an update was based on.
+
+    The response carries the current state of the task as `current`, so
+    clients can merge their change without fetching the task again.
+    """
+    status_code = 409
+    default_detail = "The task was changed by someone else."
+    default_code = 'conflict'
+
+    def __init__(self, current):
+        super().__init__()
+        self.detail = {
+            'detail': ErrorDetail(self.default_detail, self.default_code),
+            'current': current,
+        }
+
+
+def save_task_changes(task, version, context):
+    """Save the task's changed fields or raise TaskConflict."""
+    if task.save_changes(version):
+        return
+    current = Task.objects.using(task._state.db).filter(pk=task.pk).first()
+    if current is None:
+        raise NotFound("No Task matches the given query.")
+    raise TaskConflict(TaskListSerializer(current, context=context).data)
+
+
+class BoardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Board model with summary fields."""
     member_count = serializers.SerializerMethodField()
     ticket_count = serializers.SerializerMethodField()
@@ -18,8 +68,7 @@ class BoardSerializer(serializers.ModelSerializer):
     tasks_high_prio_count = serializers.SerializerMethodField()
     owner_id = serializers.IntegerField(source='owner.id', read_only=True)
 
-    members = serializers.PrimaryKeyRelatedField(
-        many=True,
+    members = BulkPrimaryKeyRelatedField(
         queryset=User.objects.all(),
         write_only=True,
         required=False
@@ -32,24 +81,31 @@ class BoardSerializer(serializers.ModelSerializer):
             'tasks_to_do_count', 'tasks_high_prio_count', 'owner_id', 'members'
         ]
 
+    def create(self, validated_data):
+        """Create the board, then add its members in one bulk insert."""
+        members = validated_data.pop('members', [])
+        board = super().create(validated_data)
+        set_board_members(board, members)
+        return board
+
     def get_member_count(self, obj):
         """Return the number of members on the board."""
         return obj.members.count()
 
     def get_ticket_count(self, obj):
-        """Return the number of tasks associated with the board."""
-        return obj.tasks.count()
+        """Return the number of active tasks associated with the board."""
+        return obj.tasks.active().count()
 
     def get_tasks_to_do_count(self, obj):
-        """Return count of tasks with status 'to-do' on the board."""
-        return obj.tasks.filter(status='to-do').count()
+        """Return count of active tasks with status 'to-do' on the board."""
+        return obj.tasks.active().filter(status='to-do').count()
 
     def get_tasks_high_prio_count(self, obj):
-        """Return count of high priority tasks on the board."""
-        return obj.tasks.filter(priority='high').count()
+        """Return count of active high priority tasks on the board."""
+        return obj.tasks.active().filter(priority='high').count()
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Compact user representation used in nested serializer fields."""
     fullname = serializers.CharField(source='first_name')
 
@@ -58,29 +114,31 @@ class UserDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'fullname']
 
 
-class TaskListSerializer(serializers.ModelSerializer):
+class TaskListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight task serializer for list endpoints."""
+    expandable_fields = ('assignee', 'reviewer')
+
     board = serializers.PrimaryKeyRelatedField(read_only=True)
     assignee = UserDetailSerializer(read_only=True)
     reviewer = UserDetailSerializer(read_only=True)
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(
+        source='comment_count', read_only=True)
 
     class Meta:
         model = Task
         fields = [
             'id', 'board', 'title', 'description', 'status', 'priority',
-            'assignee', 'reviewer', 'due_date', 'comments_count'
+            'assignee', 'reviewer', 'due_date', 'comments_count', 'position',
+            'version',
         ]
 
-    def get_comments_count(self, obj):
-        """Return number of comments attached to the task."""
-        return obj.comments.count()
 
-
-class TaskCreateSerializer(serializers.ModelSerializer):
+class TaskCreateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer used to create tasks, validates board membership."""
+    expandable_fields = ('assignee', 'reviewer')
 
-    board = serializers.PrimaryKeyRelatedField(queryset=Board.objects.all())
+    board = serializers.PrimaryKeyRelatedField(
+        queryset=Board.objects.filter(is_deleting=False))
 
     assignee_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
@@ -102,15 +160,17 @@ class TaskCreateSerializer(serializers.ModelSerializer):
 
     reviewer = UserDetailSerializer(read_only=True)
 
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(
+        source='comment_count', read_only=True)
 
     class Meta:
         model = Task
         fields = [
             'id', 'board', 'title', 'description', 'status', 'priority',
             'assignee', 'reviewer', 'due_date', 'comments_count',
-            'board_id', 'reviewer_id', 'assignee_id',
+            'board_id', 'reviewer_id', 'assignee_id', 'version',
         ]
+        read_only_fields = ['version']
 
     def validate(self, data):
         """Validate assignee and reviewer are members or owner of the board."""
@@ -119,27 +179,13 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         if board is None and self.instance:
             board = self.instance.board
 
-        assignee = data.get('assignee')
-        reviewer = data.get('reviewer')
-
-        if assignee:
-            is_member = board.members.filter(id=assignee.id).exists()
-            is_owner = (board.owner == assignee)
-            if not (is_member or is_owner):
-                raise serializers.ValidationError(
-                    {"assignee_id": "User is not a member of this board."})
-
-        if reviewer:
-            is_member = board.members.filter(id=reviewer.id).exists()
-            is_owner = (board.owner == reviewer)
-            if not (is_member or is_owner):
-                raise serializers.ValidationError(
-                    {"reviewer_id": "User is not a member of this board."})
-
+        validate_board_users(board, data)
         return data
 
-    def get_comments_count(self, obj):
-        return obj.comments.count()
+    def create(self, validated_data):
+        """Create the task in the shard holding its board."""
+        using = shard_for_board(validated_data['board'].pk, for_write=True)
+        return Task.objects.db_manager(using).create(**validated_data)
 
 
 class TaskUpdateSerializer(serializers.ModelSerializer):
@@ -169,38 +215,91 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'status', 'priority',
             'assignee', 'reviewer', 'due_date',
-            'reviewer_id', 'assignee_id',
+            'reviewer_id', 'assignee_id', 'version',
         ]
+        read_only_fields = ['version']
 
     def validate(self, data):
         """Validate updates ensure assignee/reviewer belong to the task's board."""
         board = self.instance.board
 
-        assignee = data.get('assignee')
-        reviewer = data.get('reviewer')
+        validate_board_users(board, data)
+        return data
+
+    def update(self, instance, validated_data):
+        """Write the changed fields if the task is still at `version`.
 
-        if assignee:
-            is_member = board.members.filter(id=assignee.id).exists()
-            is_owner = (board.owner == assignee)
-            if not (is_member or is_owner):
-                raise serializers.ValidationError(
-                    {"assignee_id": "User is not a member of this board."})
+        `version` is passed to `save()` and defaults to the version the
+        task was loaded with.
+        """
+        version = validated_data.pop('version', instance.version)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        save_task_changes(instance, version, self.context)
+        return instance
 
-        if reviewer:
-            is_member = board.members.filter(id=reviewer.id).exists()
-            is_owner = (board.owner == reviewer)
-            if not (is_member or is_owner):
-                raise serializers.ValidationError(
-                    {"reviewer_id": "User is not a member of this board."})
 
-        return data
+class TaskMoveSerializer(serializers.Serializer):
+    """Move a task within or across columns by naming a neighbour.
 
+    The task is placed right after `after` or right before `before`; an
+    explicit `"after": null` moves it to the top and omitting both to the
+    end of the target column. Only the moved task's row is written.
+    """
+    status = serializers.ChoiceField(
+        choices=Task.STATUS_CHOICES, required=False)
+    after = serializers.IntegerField(required=False, allow_null=True)
+    before = serializers.IntegerField(required=False, allow_null=True)
 
-class BoardDetailSerializer(serializers.ModelSerializer):
+    def validate(self, data):
+        """Compute the new position from the neighbours in the column."""
+        task = self.instance
+        status = data.get('status', task.status)
+        column = Task.objects.using(task._state.db).active().filter(
+            board_id=task.board_id, status=status).exclude(pk=task.pk)
+
+        if data.get('before') is not None:
+            high = self.get_anchor(column, data['before'], 'before')
+            low = column.filter(position__lt=high).aggregate(
+                low=Max('position'))['low']
+        elif data.get('after') is not None:
+            low = self.get_anchor(column, data['after'], 'after')
+            high = column.filter(position__gt=low).aggregate(
+                high=Min('position'))['high']
+        elif 'after' in data:
+            low = None
+            high = column.aggregate(high=Min('position'))['high']
+        else:
+            low, high = last_position(task.board_id, status, task.pk), None
+
+        return {'status': status, 'position': key_between(low, high)}
+
+    def get_anchor(self, column, pk, field):
+        """Return the position of a neighbour in the target column."""
+        position = column.filter(pk=pk).values_list(
+            'position', flat=True).first()
+        if position is None:
+            raise serializers.ValidationError(
+                {field: "Task is not in the target column."})
+        return position
+
+    def update(self, instance, validated_data):
+        """Write the new status and position if the task is at `version`."""
+        version = validated_data.get('version', instance.version)
+        instance.status = validated_data['status']
+        instance.position = validated_data['position']
+        save_task_changes(instance, version, self.context)
+        return instance
+
+
+class BoardDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Detailed board serializer including members and tasks."""
+    expandable_fields = ('members',)
+
     owner_id = serializers.IntegerField(source='owner.id', read_only=True)
     members = UserDetailSerializer(many=True, read_only=True)
-    tasks = TaskListSerializer(many=True, read_only=True)
+    tasks = TaskListSerializer(
+        source='active_tasks', many=True, read_only=True)
 
     class Meta:
         model = Board
@@ -209,24 +308,64 @@ class BoardDetailSerializer(serializers.ModelSerializer):
 
 class BoardUpdateSerializer(serializers.ModelSerializer):
     """Serializer used to update board membership and title."""
-    members = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=User.objects.all(), write_only=True
+    members = BulkPrimaryKeyRelatedField(
+        queryset=User.objects.all(), write_only=True
     )
     owner_data = UserDetailSerializer(source='owner', read_only=True)
     members_data = UserDetailSerializer(
         source='members', many=True, read_only=True)
-    tasks = TaskListSerializer(many=True, read_only=True)
+    tasks = TaskListSerializer(
+        source='active_tasks', many=True, read_only=True)
 
     class Meta:
         model = Board
         fields = ['id', 'title', 'owner_data',
                   'members', 'members_data', 'tasks']
 
+    def update(self, instance, validated_data):
+        """Update the title and apply the member list as a diff."""
+        members = validated_data.pop('members', None)
+        instance = super().update(instance, validated_data)
+        if members is not None:
+            set_board_members(instance, members)
+        return instance
+
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for comments displayed in task contexts."""
     author = serializers.ReadOnlyField(source='author.first_name')
 
     class Meta:
         model = Comment
         fields = ['id', 'created_at', 'author', 'content']
+
+    def create(self, validated_data):
+        """Create the comment in the shard holding its task."""
+        using = shard_for_board(
+            validated_data['task'].board_id, for_write=True)
+        return Comment.objects.db_manager(using).create(**validated_data)
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Compact notification with the few task fields a badge needs."""
+    task_title = serializers.CharField(source='task.title', read_only=True)
+    board = serializers.IntegerField(source='task.board_id', read_only=True)
+    due_date = serializers.DateField(source='task.due_date', read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'kind', 'created_at', 'task', 'task_title', 'board',
+            'due_date',
+        ]
+
+
+class TaskActivitySerializer(serializers.ModelSerializer):
+    """One entry of a task's change history."""
+
+    class Meta:
+        model = TaskActivity
+        fields = [
+            'id', 'task', 'field', 'old_value', 'new_value', 'actor',
+            'created_at',
+        ]
@@ -0,0 +1,57 @@
+"""Incremental JSON rendering of large board and task list responses.
+
+With `?stream=1`, board details and task lists are not rendered as one
+document. Tasks are read `STREAM_CHUNK_SIZE` at a time from a queryset
+iterator, serialized and encoded chunk by chunk into a
+`StreamingHttpResponse`. The first bytes leave before the last task is
+read, and memory use does not grow with the number of tasks.
+
+The status code is sent with the first chunk, so an error while
+streaming ends the response early with incomplete JSON.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+_renderer = JSONRenderer()
+
+
+def wants_stream(request):
+    """Return True when the client asked for a streamed response."""
+    return request.query_params.get('stream') in ('1', 'true')
+
+
+def render(data):
+    """Encode data exactly like the regular JSON responses."""
+    return _renderer.render(data)
+
+
+def stream_list(rows, serializer):
+    """Yield a JSON array of `rows` serialized by a list serializer."""
+    rows = iter(rows)
+    yield b'['
+    separator = b''
+    while chunk := list(islice(rows, settings.STREAM_CHUNK_SIZE)):
+        yield separator + render(serializer.to_representation(chunk))[1:-1]
+        separator = b','
+    yield b']'
+
+
+def stream_object(head, key, items):
+    """Yield a JSON object of `head` whose last member `key` is `items`.
+
+    `items` are the encoded chunks of the member's value, e.g. from
+    `stream_list`.
+    """
+    opening = render(head)[:-1]
+    yield opening + (b',' if head else b'') + render(key) + b':'
+    yield from items
+    yield b'}'
+
+
+def streaming_response(chunks):
+    """Return a JSON response sending the chunks as they are produced."""
+    return StreamingHttpResponse(chunks, content_type='application/json')
@@ -6,18 +6,38 @@ included into the project's main URL configuration under the `api/` path.
 
 from django.urls import path
 
-from kanban_app.api.views import CommentView, CommentDetailView, TaskDetailView, BoardListCreateView, BoardDetailView, EmailCheckView, AssignedTaskView, ReviewerTaskView, TaskCreateView
+from kanban_app.api.views import ArchivedTaskView, BatchView, CalendarView, BoardActivityView, BoardAnalyticsView, TaskActivityView, TaskMoveView, BoardColumnsView, BoardColumnView, DashboardView, NotificationReadView, UnreadNotificationView, CommentView, CommentDetailView, TaskDetailView, BoardListCreateView, BoardDetailView, EmailCheckView, AssignedTaskView, ReviewerTaskView, TaskCreateView
 
 urlpatterns = [
     path('boards/', BoardListCreateView.as_view(), name='board-list'),
     path('boards/<int:pk>/', BoardDetailView.as_view(), name='board-detail'),
+    path('boards/<int:pk>/archived-tasks/',
+         ArchivedTaskView.as_view(), name='board-archived-tasks'),
+    path('boards/<int:pk>/activity/',
+         BoardActivityView.as_view(), name='board-activity'),
+    path('boards/<int:pk>/analytics/',
+         BoardAnalyticsView.as_view(), name='board-analytics'),
+    path('boards/<int:pk>/columns/',
+         BoardColumnsView.as_view(), name='board-columns'),
+    path('boards/<int:pk>/columns/<str:status>/',
+         BoardColumnView.as_view(), name='board-column'),
     path('email-check/', EmailCheckView.as_view(), name='login'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('notifications/unread/', UnreadNotificationView.as_view(),
+         name='unread-notifications'),
+    path('notifications/read/', NotificationReadView.as_view(),
+         name='read-notifications'),
 
     path('tasks/assigned-to-me/', AssignedTaskView.as_view(), name='assigned-tasks'),
     path('tasks/reviewing/', ReviewerTaskView.as_view(), name='reviewing-tasks'),
+    path('tasks/calendar/', CalendarView.as_view(), name='task-calendar'),
     path('tasks/', TaskCreateView.as_view(), name='add-task'),
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
 
+    path('tasks/<int:pk>/move/', TaskMoveView.as_view(), name='task-move'),
+    path('tasks/<int:task_id>/activity/',
+         TaskActivityView.as_view(), name='task-activity'),
     path('tasks/<int:task_id>/comments/',
          CommentView.as_view(), name='task-comments'),
     path('tasks/<int:task_id>/comments/<int:comment_id>/',
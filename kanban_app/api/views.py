@@ -12,20 +12,78 @@ from .serializers import (
     CommentSerializer,
     TaskCreateSerializer,
     TaskListSerializer,
+    TaskMoveSerializer,
     TaskUpdateSerializer,
 )
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import (
+    APIException,
+    PermissionDenied,
+    ValidationError,
+)
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from ..models import Board, Task, Comment
+from core.caches import is_shared_cache
+from jobs_app.api.serializers import JobSerializer
+from jobs_app.queue import enqueue
+from ..activity import record_changes, record_created, snapshot
+from ..analytics import board_flow
+from ..cache import board_cache_key, invalidate_boards, user_cache_key
+from ..hits import record_board_hit
+from ..membership import has_board_access
+from ..models import Board, Task, Comment, Notification, TaskActivity
+from ..sharding import (
+    gather,
+    group_boards,
+    home_rows,
+    is_sharded,
+    iterate,
+    load_tasks,
+    shard_for_board,
+    shard_for_task,
+)
+from .batch import Batch, BatchSerializer
+from .bundles import BoardBundle, BoardBundleQuerySerializer
+from .streaming import (
+    stream_list,
+    stream_object,
+    streaming_response,
+    wants_stream,
+)
+from .pagination import (
+    ActivityCursorPagination,
+    ArchivedTaskCursorPagination,
+    CommentCursorPagination,
+    NotificationCursorPagination,
+    decode_cursor,
+    encode_cursor,
+)
 from .permissions import IsAuthor, IsBoardMemberOrOwner, IsMemberOfTaskBoard
+from .mixins import (
+    SparseFieldsetViewMixin,
+    prune_board_queryset,
+    prune_task_queryset,
+    related_users,
+    wants,
+)
 from .serializers import (
     BoardSerializer,
     BoardDetailSerializer,
+    NotificationSerializer,
+    TaskActivitySerializer,
     UserDetailSerializer,
 )
 
@@ -38,24 +96,281 @@ class BoardListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         """Return boards where the current user is owner or member."""
         user = self.request.user
-        return Board.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+        return Board.objects.filter(access__user=user, is_deleting=False)
+
+    def list(self, request, *args, **kwargs):
+        """List the boards, or return the `?ids=` boards as one document."""
+        if 'ids' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        query = BoardBundleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        document = BoardBundle(
+            request.user, query.validated_data['ids'],
+            query.validated_data['include']).load()
+        for board in document['boards']:
+            record_board_hit(board['id'])
+        return Response(document)
 
     def perform_create(self, serializer):
         """Set the board owner to the requesting user on create."""
         serializer.save(owner=self.request.user)
 
 
-class BoardDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BoardDetailView(SparseFieldsetViewMixin,
+                      generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a single board with permissions."""
-    queryset = Board.objects.all()
+    queryset = Board.objects.filter(is_deleting=False)
     permission_classes = [IsBoardMemberOrOwner]
 
+    def get_queryset(self):
+        """Prefetch only the members and tasks the response will render."""
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = prune_board_queryset(
+                queryset, self.get_fieldset(), self.get_expand(),
+                tasks=not wants_stream(self.request))
+        return queryset
+
     def get_serializer_class(self):
         """Return the appropriate serializer for read vs update requests."""
         if self.request.method in ['PUT', 'PATCH']:
             return BoardUpdateSerializer
         return BoardDetailSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the full payload from the cache and count the read."""
+        if wants_stream(request):
+            response = self.stream(self.get_object())
+        elif ('fields' in request.query_params
+              or 'expand' in request.query_params or not is_shared_cache()):
+            response = super().retrieve(request, *args, **kwargs)
+        else:
+            response = self.retrieve_cached(request, *args, **kwargs)
+        # Only reads that passed the permission checks are counted.
+        record_board_hit(self.kwargs['pk'])
+        return response
+
+    def retrieve_cached(self, request, *args, **kwargs):
+        """Return the cached full payload, caching it on a miss."""
+        board_id = self.kwargs['pk']
+        key = board_cache_key('board-detail', board_id)
+        data = cache.get(key)
+        if data is not None and has_board_access(request.user, board_id):
+            return Response(data)
+        response = super().retrieve(request, *args, **kwargs)
+        cache.set(key, response.data, settings.BOARD_DETAIL_CACHE_TIMEOUT)
+        return response
+
+    def stream(self, board):
+        """Send the board and then its tasks, read and encoded in chunks."""
+        board.prefetched_active_tasks = []
+        serializer = self.get_serializer(board)
+        head = serializer.data
+        if 'tasks' not in head:
+            return Response(head)
+        del head['tasks']
+        tasks = prune_task_queryset(
+            Task.objects.using(shard_for_board(board.pk)).active().filter(
+                board_id=board.pk).order_by('status', 'position', 'id'),
+            self.get_fieldset('tasks'), self.get_expand('tasks'))
+        rows = tasks.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        return streaming_response(stream_object(
+            head, 'tasks', stream_list(rows, serializer.fields['tasks'])))
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the board and delete it in a background job."""
+        board = self.get_object()
+        with transaction.atomic():
+            Board.objects.filter(pk=board.pk).update(is_deleting=True)
+            job = enqueue(
+                'kanban.delete_board', {'board_id': board.pk},
+                user=request.user)
+        invalidate_boards([board.pk])
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job-detail', args=[job.pk])})
+
+
+class ArchivedTaskView(SparseFieldsetViewMixin, generics.ListAPIView):
+    """List a board's archived tasks in keyset pages."""
+    serializer_class = TaskListSerializer
+    permission_classes = [IsAuthenticated, IsBoardMemberOrOwner]
+    pagination_class = ArchivedTaskCursorPagination
+
+    def get_queryset(self):
+        """Return archived tasks of the board after checking access to it."""
+        board = get_object_or_404(Board, pk=self.kwargs.get('pk'))
+        self.check_object_permissions(self.request, board)
+        queryset = Task.objects.using(
+            shard_for_board(board.pk)).archived().filter(board=board)
+        return prune_task_queryset(
+            queryset, self.get_fieldset(), self.get_expand())
+
+
+class BoardActivityView(generics.ListAPIView):
+    """List the change history of all tasks on a board, newest first."""
+    serializer_class = TaskActivitySerializer
+    permission_classes = [IsAuthenticated, IsBoardMemberOrOwner]
+    pagination_class = ActivityCursorPagination
+
+    def get_queryset(self):
+        """Return the board's activity."""
+        board = get_object_or_404(Board, pk=self.kwargs.get('pk'))
+        self.check_object_permissions(self.request, board)
+        return TaskActivity.objects.using(
+            shard_for_board(board.pk)).filter(board=board)
+
+
+class DateRangeMixin:
+    """Read the `?from=` and `?to=` dates of views over a date range."""
+
+    def parse_date(self, name, default):
+        """Return the date in query parameter `name`, or `default`."""
+        value = self.request.query_params.get(name)
+        return date.fromisoformat(value) if value else default
+
+
+class BoardAnalyticsView(DateRangeMixin, APIView):
+    """Serve a board's cumulative flow, throughput and cycle times."""
+    permission_classes = [IsAuthenticated, IsBoardMemberOrOwner]
+    default_days = 90
+    max_days = 731
+
+    def get(self, request, pk):
+        """Return one entry per day between `?from=` and `?to=`."""
+        board = get_object_or_404(Board, pk=pk)
+        self.check_object_permissions(request, board)
+        try:
+            end = self.parse_date('to', timezone.localdate())
+            start = self.parse_date(
+                'from', end - timedelta(days=self.default_days - 1))
+        except ValueError:
+            return Response(
+                {"error": "Dates must be given as YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end - start).days < self.max_days:
+            return Response(
+                {"error": f"The range must span 1 to {self.max_days} days."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'board': board.pk,
+            'from': start,
+            'to': end,
+            'days': board_flow(board.pk, start, end),
+        })
+
+
+class BoardColumnMixin(SparseFieldsetViewMixin):
+    """Shared helpers for the per-status column endpoints of a board."""
+    permission_classes = [IsAuthenticated, IsBoardMemberOrOwner]
+    ordering = ('position', 'id')
+    default_limit = 20
+    max_limit = 100
+
+    def get_board(self):
+        """Return the board from the URL after checking access to it."""
+        board = get_object_or_404(Board, pk=self.kwargs.get('pk'))
+        self.check_object_permissions(self.request, board)
+        return board
+
+    def get_limit(self):
+        """Return the requested number of tasks per column, clamped."""
+        try:
+            limit = int(self.request.query_params.get('limit', ''))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_column_queryset(self, board):
+        """Return the board's active tasks pruned for the response."""
+        queryset = Task.objects.using(
+            shard_for_board(board.pk)).active().filter(board=board)
+        return prune_task_queryset(
+            queryset, self.get_fieldset(), self.get_expand(),
+            required=('status', 'position'))
+
+    def get_next_link(self, board, status_value, task, limit):
+        """Return the "load more" URL continuing a column after `task`."""
+        params = self.request.query_params.copy()
+        params['cursor'] = encode_cursor(
+            getattr(task, name) for name in self.ordering)
+        params['limit'] = limit
+        url = reverse('board-column', kwargs={
+            'pk': board.pk, 'status': status_value})
+        return self.request.build_absolute_uri(f'{url}?{params.urlencode()}')
+
+    def serialize_tasks(self, tasks):
+        """Serialize a column's tasks with the list serializer."""
+        return TaskListSerializer(
+            tasks, many=True, context={'request': self.request}).data
+
+
+class BoardColumnsView(BoardColumnMixin, APIView):
+    """Return the first tasks and the task total of every status column."""
+
+    def get(self, request, pk):
+        """Load the top N tasks per status with one windowed query."""
+        board = self.get_board()
+        limit = self.get_limit()
+        ordering = [F(name).asc() for name in self.ordering]
+        queryset = self.get_column_queryset(board).annotate(
+            column_position=Window(
+                RowNumber(), partition_by=[F('status')], order_by=ordering),
+            column_total=Window(Count('id'), partition_by=[F('status')]),
+        ).filter(column_position__lte=limit).order_by('status', *ordering)
+
+        columns = {
+            value: {'status': value, 'total': 0, 'tasks': []}
+            for value, _ in Task.STATUS_CHOICES
+        }
+        for task in queryset:
+            column = columns[task.status]
+            column['total'] = task.column_total
+            column['tasks'].append(task)
+
+        for column in columns.values():
+            tasks = column['tasks']
+            column['next'] = None
+            if column['total'] > len(tasks):
+                column['next'] = self.get_next_link(
+                    board, column['status'], tasks[-1], limit)
+            column['tasks'] = self.serialize_tasks(tasks)
+
+        return Response({'board': board.pk, 'columns': list(columns.values())})
+
+
+class BoardColumnView(BoardColumnMixin, APIView):
+    """Return the next page of tasks of a single status column."""
+
+    def get(self, request, pk, status):
+        """Continue a column after the task encoded in `?cursor=`."""
+        if status not in dict(Task.STATUS_CHOICES):
+            raise Http404("Unknown status.")
+        board = self.get_board()
+        limit = self.get_limit()
+        queryset = self.get_column_queryset(board).filter(
+            status=status).order_by(*self.ordering)
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            position, after = decode_cursor(cursor, size=len(self.ordering))
+            queryset = queryset.filter(
+                Q(position__gt=position) | Q(position=position, id__gt=after))
+
+        tasks = list(queryset[:limit + 1])
+        next_link = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_link = self.get_next_link(board, status, tasks[-1], limit)
+
+        return Response({
+            'status': status,
+            'tasks': self.serialize_tasks(tasks),
+            'next': next_link,
+        })
+
 
 class EmailCheckView(APIView):
     """Endpoint to check whether an email corresponds to a user."""
@@ -83,26 +398,194 @@ class EmailCheckView(APIView):
             )
 
 
-class AssignedTaskView(generics.ListAPIView):
-    """List tasks assigned to the current user."""
+class UserTaskListMixin(SparseFieldsetViewMixin):
+    """Shared query of the task lists spanning all of a user's boards.
+
+    Views name the user's tasks with `get_lookup()`.
+    """
     serializer_class = TaskListSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_user_tasks(self):
+        """Return the user's active tasks, unevaluated, for any shard.
+
+        Tasks of boards being deleted are left out. A shard cannot join
+        the board table, so with shards their ids are read up front.
+        """
+        queryset = Task.objects.active().filter(**self.get_lookup())
+        if is_sharded():
+            queryset = queryset.exclude(board_id__in=list(
+                Board.objects.filter(is_deleting=True).values_list(
+                    'id', flat=True)))
+        else:
+            queryset = queryset.filter(board__is_deleting=False).distinct()
+        return prune_task_queryset(
+            queryset, self.get_fieldset(), self.get_expand())
+
     def get_queryset(self):
-        """Return tasks where the requesting user is the assignee."""
-        user = self.request.user
-        return Task.objects.filter(assignee=user).distinct()
+        """Return the user's active tasks from every shard."""
+        return gather(self.get_user_tasks())
 
+    def list(self, request, *args, **kwargs):
+        """List the tasks, or stream them in chunks with `?stream=1`."""
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        rows = iterate(self.get_user_tasks(), settings.STREAM_CHUNK_SIZE)
+        return streaming_response(
+            stream_list(rows, self.get_serializer(many=True)))
 
-class ReviewerTaskView(generics.ListAPIView):
+
+class AssignedTaskView(UserTaskListMixin, generics.ListAPIView):
+    """List tasks assigned to the current user."""
+
+    def get_lookup(self):
+        """Select tasks where the requesting user is the assignee."""
+        return {'assignee': self.request.user}
+
+
+class ReviewerTaskView(UserTaskListMixin, generics.ListAPIView):
     """List tasks where the current user is the reviewer."""
-    serializer_class = TaskListSerializer
+
+    def get_lookup(self):
+        """Select tasks where the requesting user is the reviewer."""
+        return {'reviewer': self.request.user}
+
+
+class DashboardView(APIView):
+    """Summarize the tasks of every board the current user can access."""
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        """Return tasks where the requesting user is the reviewer."""
-        user = self.request.user
-        return Task.objects.filter(reviewer=user).distinct()
+    def get(self, request):
+        """Return cached task counts, computing them on a cache miss."""
+        today = timezone.localdate()
+        key = user_cache_key('dashboard', request.user.pk, today.isoformat())
+        data = cache.get(key) if is_shared_cache() else None
+        if data is None:
+            data = self.get_counts(request.user, today)
+            if is_shared_cache():
+                cache.set(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        return Response(data)
+
+    def get_counts(self, user, today):
+        """Count the user's tasks with one aggregate query per shard."""
+        boards = Board.objects.filter(
+            access__user=user, is_deleting=False).values_list('id', flat=True)
+        is_open = ~Q(status='done')
+        week_end = today + timedelta(days=7)
+        statuses = {
+            value: value.replace('-', '_') for value, _ in Task.STATUS_CHOICES
+        }
+        counts = Counter()
+        for using, board_ids in group_boards(boards).items():
+            counts.update(Task.objects.using(using).active().filter(
+                board__in=board_ids,
+            ).aggregate(
+                total=Count('id'),
+                assigned=Count('id', filter=Q(assignee=user)),
+                reviewing=Count('id', filter=Q(reviewer=user)),
+                overdue=Count('id', filter=is_open & Q(due_date__lt=today)),
+                due_this_week=Count('id', filter=is_open & Q(
+                    due_date__gte=today, due_date__lt=week_end)),
+                **{
+                    f'status_{alias}': Count('id', filter=Q(status=value))
+                    for value, alias in statuses.items()
+                },
+            ))
+        return {
+            'tasks': counts['total'],
+            'assigned': counts['assigned'],
+            'reviewing': counts['reviewing'],
+            'overdue': counts['overdue'],
+            'due_this_week': counts['due_this_week'],
+            'status': {
+                value: counts[f'status_{alias}']
+                for value, alias in statuses.items()
+            },
+        }
+
+
+class CalendarView(DateRangeMixin, SparseFieldsetViewMixin, APIView):
+    """List the user's tasks due in a date window, across all boards."""
+    permission_classes = [IsAuthenticated]
+    default_days = 42
+    max_days = 366
+
+    def get(self, request):
+        """Return the tasks due between `?from=` and `?to=`, cached.
+
+        `?counts=1` adds the number of tasks due on each day of the
+        window, `?counts=only` returns just those counts.
+        """
+        try:
+            start = self.parse_date('from', timezone.localdate())
+            end = self.parse_date(
+                'to', start + timedelta(days=self.default_days - 1))
+        except ValueError:
+            return Response(
+                {"error": "Dates must be given as YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end - start).days < self.max_days:
+            return Response(
+                {"error": f"The range must span 1 to {self.max_days} days."},
+                status=status.HTTP_400_BAD_REQUEST)
+        counts = request.query_params.get('counts', '')
+        if counts not in ('', '0', '1', 'only'):
+            return Response(
+                {"error": "counts must be 1 or only."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        cached = is_shared_cache() and not (
+            'fields' in request.query_params
+            or 'expand' in request.query_params)
+        key = user_cache_key(
+            'calendar', request.user.pk, start.isoformat(), end.isoformat(),
+            counts or '0')
+        data = cache.get(key) if cached else None
+        if data is None:
+            data = self.get_calendar(request.user, start, end, counts)
+            if cached:
+                cache.set(key, data, settings.CALENDAR_CACHE_TIMEOUT)
+        return Response(data)
+
+    def get_calendar(self, user, start, end, counts):
+        """Read the window with one due-date range query per shard."""
+        boards = Board.objects.filter(
+            access__user=user, is_deleting=False).values_list('id', flat=True)
+        data = {'from': start, 'to': end}
+        if counts == 'only':
+            due = Counter()
+            for using, board_ids in group_boards(boards).items():
+                due.update(dict(Task.objects.using(using).active().filter(
+                    board__in=board_ids, due_date__range=(start, end),
+                ).values_list('due_date').annotate(
+                    count=Count('id')).order_by()))
+            data['days'] = self.get_days(start, end, due)
+            return data
+
+        tasks = []
+        for using, board_ids in group_boards(boards).items():
+            queryset = Task.objects.using(using).active().filter(
+                board__in=board_ids, due_date__range=(start, end),
+            ).order_by('due_date', 'id')
+            tasks += home_rows(using, prune_task_queryset(
+                queryset, self.get_fieldset(), self.get_expand(),
+                required=('due_date',)))
+        tasks.sort(key=lambda task: (task.due_date, task.pk))
+        data['tasks'] = TaskListSerializer(
+            tasks, many=True, context={'request': self.request}).data
+        if counts == '1':
+            data['days'] = self.get_days(
+                start, end, Counter(task.due_date for task in tasks))
+        return data
+
+    def get_days(self, start, end, due):
+        """Return the number of tasks due on each day of the window."""
+        return [
+            {'date': day, 'tasks': due[day]}
+            for day in (
+                start + timedelta(days=offset)
+                for offset in range((end - start).days + 1))
+        ]
 
 
 class TaskCreateView(generics.CreateAPIView):
@@ -113,23 +596,65 @@ class TaskCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         """Validate membership then save the new task with provided data."""
         board = serializer.validated_data.get('board')
-        user = self.request.user
-
-        is_member = board.members.filter(id=user.id).exists()
-        is_owner = (board.owner == user)
 
-        if not (is_member or is_owner):
+        if not has_board_access(self.request.user, board.pk):
             raise PermissionDenied(
                 "You must be a member or owner of the board to create tasks.")
 
-        serializer.save()
-
-
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+        task = serializer.save()
+        record_created(task, self.request.user)
+
+
+class TaskVersionMixin:
+    """Optimistic concurrency for views changing a single task.
+
+    Task responses carry the task's `version` as ETag. Writes apply only
+    while the task is still at the version named by `If-Match`, else by
+    a `version` in the body, or at the version the request read; otherwise
+    they answer 409 with the task's current state.
+    """
+
+    def get_expected_version(self, task):
+        """Return the version named by `If-Match`, the body or the task."""
+        header = self.request.headers.get('If-Match', '').strip()
+        if header == '*':
+            return task.version
+        if header:
+            value = header.removeprefix('W/').strip('"')
+            if not value.isdigit():
+                raise ValidationError(
+                    {'If-Match': 'Must be a task ETag such as "3".'})
+            return int(value)
+        value = self.request.data.get('version')
+        if value is None:
+            return task.version
+        if isinstance(value, bool) or not str(value).isdigit():
+            raise ValidationError({'version': 'Must be a task version.'})
+        return int(value)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Send the version of a returned task as ETag."""
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict) and 'version' in data:
+            response['ETag'] = f'"{data["version"]}"'
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class TaskDetailView(TaskVersionMixin, SparseFieldsetViewMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a task with board membership checks."""
     queryset = Task.objects.all()
     permission_classes = [IsAuthenticated, IsMemberOfTaskBoard]
 
+    def get_queryset(self):
+        """Prune columns and joins of the task for read requests."""
+        queryset = super().get_queryset().using(
+            shard_for_task(self.kwargs['pk']))
+        if self.request.method == 'GET':
+            queryset = prune_task_queryset(
+                queryset, self.get_fieldset(), self.get_expand())
+        return queryset
+
     def get_serializer_class(self):
         """Return update serializer for modifying tasks, create for reads."""
         if self.request.method in ['PUT', 'PATCH']:
@@ -137,27 +662,81 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
         return TaskCreateSerializer
 
     def perform_update(self, serializer):
-        """Prevent changing the task's board during update, then save."""
+        """Drop board changes, save if the version matches and record them."""
         if 'board' in serializer.validated_data:
             serializer.validated_data.pop('board')
-        serializer.save()
+        before = snapshot(serializer.instance)
+        task = serializer.save(
+            version=self.get_expected_version(serializer.instance))
+        record_changes(task, before, self.request.user)
 
 
-class CommentView(generics.ListCreateAPIView):
+class TaskMoveView(TaskVersionMixin, generics.GenericAPIView):
+    """Move a task to a new place in its own or another column."""
+    queryset = Task.objects.active()
+    serializer_class = TaskMoveSerializer
+    permission_classes = [IsAuthenticated, IsMemberOfTaskBoard]
+
+    def get_queryset(self):
+        """Look the task up in the shard holding it."""
+        return super().get_queryset().using(shard_for_task(self.kwargs['pk']))
+
+    def post(self, request, pk):
+        """Reorder the task and return it with its new position."""
+        task = self.get_object()
+        serializer = self.get_serializer(task, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        before = snapshot(task)
+        serializer.save(version=self.get_expected_version(task))
+        record_changes(task, before, request.user)
+        return Response(
+            TaskListSerializer(task, context={'request': request}).data,
+            status=status.HTTP_200_OK)
+
+
+class TaskActivityView(generics.ListAPIView):
+    """List the change history of a single task, newest first."""
+    serializer_class = TaskActivitySerializer
+    permission_classes = [IsAuthenticated, IsMemberOfTaskBoard]
+    pagination_class = ActivityCursorPagination
+
+    def get_queryset(self):
+        """Return the task's activity."""
+        task_id = self.kwargs.get('task_id')
+        return TaskActivity.objects.using(
+            shard_for_task(task_id)).filter(task_id=task_id)
+
+
+class CommentView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     """List and create comments for a specific task."""
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsMemberOfTaskBoard]
+    pagination_class = CommentCursorPagination
 
     def get_queryset(self):
         """Return comments belonging to the task identified by URL kwarg."""
         task_id = self.kwargs.get('task_id')
-        return Comment.objects.filter(task_id=task_id)
+        queryset = Comment.objects.using(
+            shard_for_task(task_id)).filter(task_id=task_id)
+        fieldset = self.get_fieldset()
+        queryset, author_only = related_users(
+            queryset, ['author'] if wants(fieldset, 'author') else [],
+            ['first_name'])
+        if fieldset:
+            only = ['id', 'task', 'created_at']
+            only += [name for name in ('content',) if name in fieldset]
+            if 'author' in fieldset:
+                only += ['author', *author_only]
+            queryset = queryset.only(*only)
+        return queryset
 
     def perform_create(self, serializer):
         """Attach the requesting user as author and link the comment to task."""
         task_id = self.kwargs.get('task_id')
-        task = get_object_or_404(Task, id=task_id)
-        serializer.save(author=self.request.user, task=task)
+        task = get_object_or_404(
+            Task.objects.using(shard_for_task(task_id)), id=task_id)
+        with transaction.atomic(using=task._state.db):
+            serializer.save(author=self.request.user, task=task)
 
 
 class CommentDetailView(generics.RetrieveDestroyAPIView):
@@ -171,6 +750,88 @@ class CommentDetailView(generics.RetrieveDestroyAPIView):
         """Retrieve the comment matching both task and comment URL params."""
         task_id = self.kwargs.get('task_id')
         comment_id = self.kwargs.get('comment_id')
-        obj = get_object_or_404(Comment, id=comment_id, task_id=task_id)
+        obj = get_object_or_404(
+            Comment.objects.using(shard_for_task(task_id)),
+            id=comment_id, task_id=task_id)
         self.check_object_permissions(self.request, obj)
         return obj
+
+    def perform_destroy(self, instance):
+        """Delete the comment and its counter update in one transaction."""
+        with transaction.atomic(using=instance._state.db):
+            instance.delete()
+
+
+class UnreadNotificationView(generics.ListAPIView):
+    """List the current user's unread notifications, newest first."""
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        """Return unread notifications with the few task columns needed."""
+        notifications = Notification.objects.filter(
+            user=self.request.user, read_at__isnull=True)
+        if is_sharded():
+            # Tasks live in shards and are attached to each page instead.
+            return notifications.only('id', 'kind', 'created_at', 'task')
+        return notifications.select_related('task').only(
+            'id', 'kind', 'created_at', 'task__id', 'task__title',
+            'task__board_id', 'task__due_date')
+
+    def paginate_queryset(self, queryset):
+        """Attach the tasks of the page, read from their shards."""
+        page = super().paginate_queryset(queryset)
+        if page is not None and is_sharded():
+            tasks = load_tasks(
+                {notification.task_id for notification in page},
+                'title', 'due_date')
+            for notification in page:
+                if notification.task_id in tasks:
+                    notification.task = tasks[notification.task_id]
+        return page
+
+
+class NotificationReadView(APIView):
+    """Mark some or all of the current user's notifications as read."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Mark the notifications listed in `ids`, or all when omitted."""
+        notifications = Notification.objects.filter(
+            user=request.user, read_at__isnull=True)
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(
+                    isinstance(pk, int) for pk in ids):
+                return Response(
+                    {"ids": "Must be a list of notification ids."},
+                    status=status.HTTP_400_BAD_REQUEST)
+            notifications = notifications.filter(id__in=ids)
+        updated = notifications.update(read_at=timezone.now())
+        return Response({"marked_read": updated}, status=status.HTTP_200_OK)
+
+
+class BatchView(APIView):
+    """Apply a client's queued task and comment mutations at once."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Run all operations in one transaction or none of them."""
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+
+        try:
+            results = Batch(request, operations).run()
+        except APIException as exc:
+            return Response({
+                "index": exc.batch_index,
+                "key": operations[exc.batch_index]['key'],
+                "errors": exc.detail,
+            }, status=exc.status_code)
+        except IntegrityError:
+            return Response(
+                {"detail": "The batch is already being applied, retry it."},
+                status=status.HTTP_409_CONFLICT)
+        return Response({"results": results}, status=status.HTTP_200_OK)
@@ -10,3 +10,7 @@ from django.apps import AppConfig
 class KanbanAppConfig(AppConfig):
     """Django AppConfig for the kanban application."""
     name = "kanban_app"
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,114 @@
+"""Per-process write-behind buffers.
+
+A `WriteBehindBuffer` collects items produced by request handling and
+hands them to `write` in batches: as soon as `batch_size` items are
+pending, or `flush_interval` seconds after the first pending item, from a
+background thread. Pending items are flushed when the interpreter exits,
+which covers graceful worker shutdown, and by `flush_all`. Items of a
+failed write are kept and retried with the next flush; after
+`max_attempts` failed writes in a row the pending items are dropped, so a
+bad item cannot block the buffer or grow it without bound. Buffers lose
+their items when a process is killed: only use them for data that may be
+lost, such as counters.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_buffers = weakref.WeakSet()
+
+
+def flush_all():
+    """Write the pending items of every buffer of this process."""
+    for buffer in list(_buffers):
+        buffer.flush()
+
+
+class WriteBehindBuffer:
+    """Base class for buffers; subclasses implement `write(items)`."""
+
+    def __init__(self, batch_size, flush_interval, max_attempts=3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._reset()
+        _buffers.add(self)
+        atexit.register(self.flush)
+
+    def _reset(self):
+        """Start with an empty buffer owned by the current process."""
+        self._pid = os.getpid()
+        self._items = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._failures = 0
+
+    def add(self, items):
+        """Buffer items, flushing right away once the batch is full."""
+        if self._pid != os.getpid():
+            # Forked worker: the parent's buffer and thread are not ours.
+            self._reset()
+        with self._lock:
+            self._items.extend(items)
+            full = len(self._items) >= self.batch_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name=f'{type(self).__name__}-flusher',
+                    daemon=True)
+                self._flusher.start()
+        if full:
+            self.flush()
+        else:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all pending items; return the number of items written."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+            if not items:
+                return 0
+            try:
+                written = self.write(items)
+            except Exception:
+                self._failures += 1
+                if self._failures >= self.max_attempts:
+                    logger.exception(
+                        "Dropped %d buffered items after %d failed writes",
+                        len(items), self._failures)
+                    self._failures = 0
+                    return 0
+                logger.exception(
+                    "Could not write %d buffered items", len(items))
+                with self._lock:
+                    self._items[:0] = items
+                self._wakeup.set()
+                return 0
+            self._failures = 0
+            return written
+
+    def write(self, items):
+        """Persist a batch of items and return how many were written."""
+        raise NotImplementedError
+
+    def _run(self):
+        """Flush pending items at most `flush_interval` after they arrive."""
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                # This thread's connection is not closed by request handling.
+                connections.close_all()
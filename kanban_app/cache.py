@@ -0,0 +1,82 @@
+"""Per-user and per-board cache keys for derived kanban data.
+
+Responses that summarize everything a user can see, such as the
+dashboard, are cached under keys that embed a per-user version. Changing a
+task or a board's membership drops the versions of every user with access
+to that board, which orphans all of their cached entries at once. Data
+shared by everyone on a board, such as its detail payload, uses a
+per-board version in the same way.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.caches import is_shared_cache
+
+from .models import BoardAccess
+
+
+def _version_key(user_id):
+    """Return the cache key holding a user's current version."""
+    return f'kanban:user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Return the user's cache version, starting a new one if missing."""
+    return cache.get_or_set(_version_key(user_id), time.time_ns, None)
+
+
+def user_cache_key(prefix, user_id, *parts):
+    """Return a versioned cache key for data derived for `user_id`."""
+    version = get_user_version(user_id)
+    return ':'.join(
+        ['kanban', prefix, str(user_id), str(version), *map(str, parts)])
+
+
+def _board_version_key(board_id):
+    """Return the cache key holding a board's current version."""
+    return f'kanban:board-version:{board_id}'
+
+
+def board_cache_key(prefix, board_id, *parts):
+    """Return a versioned cache key for data shared by a board's users."""
+    version = cache.get_or_set(_board_version_key(board_id), time.time_ns, None)
+    return ':'.join(
+        ['kanban', prefix, str(board_id), str(version), *map(str, parts)])
+
+
+def invalidate_users(user_ids, using=None):
+    """Drop the cache versions of the given users after commit.
+
+    `using` names the database whose transaction made the change.
+    """
+    keys = [_version_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+
+def get_board_user_ids(board_ids):
+    """Return the ids of owners and members of the given boards."""
+    return set(BoardAccess.objects.filter(
+        board_id__in=board_ids).values_list('user_id', flat=True))
+
+
+def invalidate_board_payloads(board_ids, using=None):
+    """Drop the shared cache versions of the given boards after commit."""
+    keys = [_board_version_key(board_id) for board_id in set(board_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+
+def invalidate_boards(board_ids, using=None):
+    """Drop the cache versions of the boards and everyone with access.
+
+    Without a shared cache nothing is cached for users, so their access
+    is not looked up.
+    """
+    invalidate_board_payloads(board_ids, using)
+    if not is_shared_cache():
+        return
+    invalidate_users(get_board_user_ids(board_ids), using)
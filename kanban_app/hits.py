@@ -0,0 +1,71 @@
+"""Per-board access statistics.
+
+Board detail reads are counted in memory and added to the daily
+`BoardHit` rows in batches, so counting costs no query per request.
+`hot_boards` ranks boards by their recent reads for cache warming.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+from .models import Board, BoardHit
+
+
+class HitBuffer(WriteBehindBuffer):
+    """Per-process buffer of `(board_id, day)` reads."""
+
+    def write(self, hits):
+        """Add the buffered reads to the daily counters."""
+        counts = Counter(hits)
+        boards = set(Board.objects.filter(
+            id__in={board_id for board_id, _ in counts},
+        ).values_list('id', flat=True))
+        counts = {
+            key: count for key, count in counts.items() if key[0] in boards}
+
+        with transaction.atomic():
+            existing = set(BoardHit.objects.filter(
+                board_id__in=boards, day__in={day for _, day in counts},
+            ).values_list('board_id', 'day'))
+            for (board_id, day), count in counts.items():
+                if (board_id, day) in existing:
+                    BoardHit.objects.filter(board_id=board_id, day=day).update(
+                        hits=F('hits') + count)
+            BoardHit.objects.bulk_create([
+                BoardHit(board_id=board_id, day=day, hits=count)
+                for (board_id, day), count in counts.items()
+                if (board_id, day) not in existing
+            ], ignore_conflicts=True)
+        return len(hits)
+
+
+_buffer = None
+
+
+def get_buffer():
+    """Return the process-wide hit buffer, creating it on first use."""
+    global _buffer
+    if _buffer is None:
+        config = settings.BOARD_HITS
+        _buffer = HitBuffer(config['BATCH_SIZE'], config['FLUSH_INTERVAL'])
+    return _buffer
+
+
+def record_board_hit(board_id):
+    """Count one read of a board."""
+    get_buffer().add([(board_id, timezone.localdate())])
+
+
+def hot_boards(limit, days):
+    """Return `[(board_id, hits)]` of the most read boards, busiest first."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(BoardHit.objects.filter(
+        day__gte=since, board__is_deleting=False,
+    ).values('board_id').annotate(total=Sum('hits')).order_by(
+        '-total').values_list('board_id', 'total')[:limit])
@@ -0,0 +1,87 @@
+"""Background job handlers for kanban_app.
+
+Discovered by `jobs_app` at startup. Heavy board operations run here
+instead of inside the request that triggered them.
+"""
+
+from django.db import transaction
+
+from jobs_app.queue import job_handler
+
+from .models import Board, Comment, Notification, Task, TaskActivity
+from .sharding import shard_for_board
+from . import ordering
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """Delete the rows of `queryset` in bounded raw DELETE statements.
+
+    `_raw_delete` issues a plain `DELETE ... WHERE id IN (...)` without
+    collecting related objects or sending signals; callers delete the
+    dependent rows first. Yields the running number of deleted rows.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic(using=queryset.db):
+            deleted += model.objects.filter(id__in=ids)._raw_delete(
+                queryset.db)
+        yield deleted
+
+
+def _delete_notifications(tasks, chunk_size):
+    """Delete the notifications of `tasks` a chunk of task ids at a time."""
+    task_ids = tasks.order_by('id').values_list('id', flat=True)
+    deleted = last_id = 0
+    while True:
+        ids = list(task_ids.filter(id__gt=last_id)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            deleted += Notification.objects.filter(
+                task_id__in=ids)._raw_delete('default')
+        last_id = ids[-1]
+        yield deleted
+
+
+@job_handler('kanban.delete_board')
+def delete_board(job):
+    """Delete a board bottom-up: task children, tasks, then the board.
+
+    Each chunk is its own short transaction so other writers can proceed
+    between chunks. The board row itself is removed last with a regular
+    delete, which clears memberships and sends the delete signals.
+    """
+    board_id = job.payload['board_id']
+    chunk_size = job.payload.get('chunk_size', 1000)
+    using = shard_for_board(board_id)
+
+    comments = Comment.objects.using(using).filter(task__board_id=board_id)
+    for deleted in delete_in_chunks(comments, chunk_size):
+        job.report_progress(comments_deleted=deleted)
+
+    # Notifications live in 'default', apart from a sharded board's tasks.
+    tasks = Task.objects.using(using).filter(board_id=board_id)
+    for deleted in _delete_notifications(tasks, chunk_size):
+        job.report_progress(notifications_deleted=deleted)
+
+    activity = TaskActivity.objects.using(using).filter(board_id=board_id)
+    for deleted in delete_in_chunks(activity, chunk_size):
+        job.report_progress(activity_deleted=deleted)
+
+    for deleted in delete_in_chunks(tasks, chunk_size):
+        job.report_progress(tasks_deleted=deleted)
+
+    Board.objects.filter(pk=board_id).delete()
+    job.report_progress(board_deleted=True)
+
+
+@job_handler('kanban.rebalance_column')
+def rebalance_column(job):
+    """Rewrite the ordering keys of one column with short, even keys."""
+    count = ordering.rebalance_column(
+        job.payload['board_id'], job.payload['status'])
+    job.report_progress(tasks_rebalanced=count)
@@ -0,0 +1,69 @@
+"""Management command to archive long finished tasks.
+
+Done tasks whose `completed_at` is older than the configured age get
+their `archived` flag set. Work happens in small batches, each in its own
+short transaction with an optional pause in between, so the command can
+run incrementally next to live traffic without holding the write lock.
+Each shard holding tasks (see `kanban_app.sharding`) is archived in turn.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from kanban_app.cache import invalidate_boards
+from kanban_app.models import Task
+from kanban_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """Flag done tasks older than the archive age as archived."""
+    help = "Archive done tasks completed more than N days ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Archive tasks completed more than this many days ago.")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of tasks archived per transaction.")
+        parser.add_argument(
+            '--sleep', type=float, default=0.05,
+            help="Seconds to pause between batches.")
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help="Stop after this many batches (default: until done).")
+
+    def handle(self, *args, **options):
+        """Archive matching tasks batch by batch and report the total."""
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        archived = batches = 0
+        for using in shard_aliases():
+            candidates = Task.objects.using(using).active().filter(
+                status='done', completed_at__lt=cutoff
+            ).order_by('completed_at')
+
+            while (options['max_batches'] is None
+                   or batches < options['max_batches']):
+                ids = list(candidates.values_list(
+                    'id', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                batch = candidates.filter(id__in=ids)
+                with transaction.atomic(using=using):
+                    invalidate_boards(
+                        set(batch.values_list('board_id', flat=True)), using)
+                    archived += batch.update(
+                        archived=True, version=F('version') + 1,
+                        updated_at=timezone.now())
+                batches += 1
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} tasks in {batches} batches."))
@@ -0,0 +1,55 @@
+"""Management command to recompute `Task.comment_count`.
+
+Walks the task table in primary key ranges and sets each task's counter
+from the comments table with one UPDATE per batch, so it can run on a
+live database without holding a long write lock. Every shard holding
+tasks (see `kanban_app.sharding`) is walked in turn.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from kanban_app.models import Comment, Task
+from kanban_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """Backfill the denormalized comment counter on all tasks."""
+    help = "Recompute Task.comment_count from the comments table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of task ids updated per transaction.")
+
+    def handle(self, *args, **options):
+        """Update the counters batch by batch and report the total."""
+        batch_size = options['batch_size']
+        counts = (
+            Comment.objects.filter(task=OuterRef('pk'))
+            .order_by()
+            .values('task')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+
+        updated = 0
+        for using in shard_aliases():
+            tasks = Task.objects.using(using)
+            # Keys are spread over ranges of ids; walk the ones in use.
+            start = tasks.order_by('id').values_list('id', flat=True).first()
+            while start is not None:
+                with transaction.atomic(using=using):
+                    updated += tasks.filter(
+                        id__gte=start, id__lt=start + batch_size
+                    ).update(
+                        comment_count=Coalesce(Subquery(counts), 0),
+                        updated_at=timezone.now())
+                start = tasks.filter(id__gte=start + batch_size).order_by(
+                    'id').values_list('id', flat=True).first()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated comment counts on {updated} tasks."))
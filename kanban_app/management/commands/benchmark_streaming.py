@@ -0,0 +1,132 @@
+"""Management command comparing buffered and streamed board responses.
+
+Creates a board with many tasks in a transaction that is rolled back
+afterwards and requests its details once rendered as a whole and once
+with `?stream=1`. Reports the time to the first byte, the total time and
+the growth of the process' resident memory while the response was
+produced. Memory is sampled from `/proc/self/statm`, so peak RSS is only
+reported on Linux; freed memory is not always returned to the system, so
+`--mode` measures one renderer per run for the cleanest numbers.
+"""
+
+import os
+import threading
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from kanban_app.api.views import BoardDetailView
+from kanban_app.cache import board_cache_key
+from kanban_app.models import Board, Task
+from kanban_app.sharding import allocate_ids, is_sharded, shard_for_board
+
+
+class RssSampler(threading.Thread):
+    """Track the highest resident set size while running."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.running = True
+        self.start_rss = self.peak_rss = self.read()
+
+    @staticmethod
+    def read():
+        """Return the current RSS in bytes, or None without `/proc`."""
+        try:
+            with open('/proc/self/statm') as statm:
+                pages = int(statm.read().split()[1])
+        except OSError:
+            return None
+        return pages * os.sysconf('SC_PAGE_SIZE')
+
+    def run(self):
+        """Sample the RSS every millisecond until stopped."""
+        while self.running and self.start_rss is not None:
+            self.peak_rss = max(self.peak_rss, self.read())
+            time.sleep(0.001)
+
+    def stop(self):
+        """Stop sampling and return the peak growth in bytes, or None."""
+        self.running = False
+        self.join()
+        if self.start_rss is None:
+            return None
+        return max(self.peak_rss, self.read()) - self.start_rss
+
+
+class Command(BaseCommand):
+    """Measure time to first byte and peak RSS of both renderers."""
+    help = "Compare buffered and streamed board detail responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks', type=int, default=20000,
+            help="Number of tasks on the benchmark board.")
+        parser.add_argument(
+            '--mode', choices=['both', 'buffered', 'streaming'],
+            default='both')
+
+    def handle(self, *args, **options):
+        """Create the board, request it with each renderer and report."""
+        with transaction.atomic():
+            email = 'benchmark-streaming@example.invalid'
+            user = User.objects.create_user(username=email, email=email)
+            board = Board.objects.create(title="Benchmark", owner=user)
+            self.create_tasks(board, user, options['tasks'])
+            modes = (
+                ['streaming', 'buffered'] if options['mode'] == 'both'
+                else [options['mode']])
+            for mode in modes:
+                self.report(mode, *self.measure(board, user, mode))
+            cache.delete(board_cache_key('board-detail', board.pk))
+            transaction.set_rollback(True)
+
+    def create_tasks(self, board, user, count):
+        """Insert `count` tasks on the board in bulk."""
+        using = shard_for_board(board.pk, for_write=True)
+        ids = [None] * count
+        if is_sharded():
+            ids = allocate_ids(Task, using, count)
+        Task.objects.using(using).bulk_create([
+            Task(
+                id=pk, board=board, title=f"Task {number}",
+                description="Benchmark task " * 8, assignee=user,
+                reviewer=user, due_date=date.today(),
+                position=f'{number:08d}')
+            for number, pk in enumerate(ids)
+        ], batch_size=1000)
+
+    def measure(self, board, user, mode):
+        """Return time to first byte, total time and RSS growth."""
+        query = {'stream': '1'} if mode == 'streaming' else {}
+        request = APIRequestFactory().get(f'/api/boards/{board.pk}/', query)
+        force_authenticate(request, user=user)
+        cache.delete(board_cache_key('board-detail', board.pk))
+
+        sampler = RssSampler()
+        sampler.start()
+        started = time.perf_counter()
+        response = BoardDetailView.as_view()(request, pk=board.pk)
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            size = len(next(chunks))
+            first_byte = time.perf_counter() - started
+            size += sum(len(chunk) for chunk in chunks)
+        else:
+            size = len(response.render().content)
+            first_byte = time.perf_counter() - started
+        total = time.perf_counter() - started
+        return first_byte, total, sampler.stop(), size
+
+    def report(self, mode, first_byte, total, rss, size):
+        """Write one result line."""
+        rss = 'n/a' if rss is None else f'{rss / 2 ** 20:7.1f} MiB'
+        self.stdout.write(
+            f"{mode:<10} first byte {first_byte * 1000:8.1f} ms  "
+            f"total {total * 1000:8.1f} ms  peak RSS +{rss}  "
+            f"{size / 2 ** 20:.1f} MiB sent")
@@ -0,0 +1,81 @@
+"""Management command listing and summarizing captured request profiles.
+
+Lists the profiles written by core.profiling, newest first, with their
+request and duration. With `--top`, the statistics of the listed
+profiles are added up and their most expensive functions printed.
+"""
+
+import io
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import list_profiles, parse_filename, profile_dir
+
+
+class Command(BaseCommand):
+    """List profiles and summarize the hottest functions."""
+    help = "List and summarize the captured request profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help="Profile file names; all profiles by default.")
+        parser.add_argument(
+            '--path', help="Only profiles of request paths containing this.")
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help="Number of profiles to list, newest first.")
+        parser.add_argument(
+            '--top', type=int, default=0,
+            help="Number of functions to summarize over the listed "
+                 "profiles.")
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=['cumulative', 'tottime', 'ncalls'])
+
+    def handle(self, *args, **options):
+        """Print the profile list and, with `--top`, their statistics."""
+        profiles = self.select(options)
+        if not profiles:
+            self.stdout.write(f"No profiles in {profile_dir()}.")
+            return
+        for path, (when, method, request_path, ms) in profiles:
+            self.stdout.write(
+                f"{when:%Y-%m-%d %H:%M:%S}  {ms:6d} ms  {method:<6} "
+                f"{request_path}  {path.name}")
+        if options['top'] > 0:
+            self.summarize([path for path, _ in profiles], options)
+
+    def select(self, options):
+        """Return the chosen profiles with their parsed file names."""
+        files = list_profiles()
+        if options['names']:
+            by_name = {path.name: path for path in files}
+            missing = set(options['names']) - set(by_name)
+            if missing:
+                raise CommandError(
+                    f"Unknown profiles: {', '.join(sorted(missing))}")
+            files = [by_name[name] for name in options['names']]
+        profiles = []
+        for path in files:
+            parsed = parse_filename(path.name)
+            if parsed is None:
+                continue
+            if options['path'] and options['path'] not in parsed[2]:
+                continue
+            profiles.append((path, parsed))
+        return profiles[:options['limit']]
+
+    def summarize(self, files, options):
+        """Print the top functions of the profiles added up."""
+        output = io.StringIO()
+        stats = pstats.Stats(str(files[0]), stream=output)
+        for path in files[1:]:
+            stats.add(str(path))
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(
+            options['top'])
+        self.stdout.write(
+            f"\nTop {options['top']} functions of {len(files)} profiles "
+            f"by {options['sort']}:")
+        self.stdout.write(output.getvalue())
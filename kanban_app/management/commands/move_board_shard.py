@@ -0,0 +1,41 @@
+"""Management command moving a board's tasks to another shard.
+
+The board stays readable throughout and is read-only only while the
+final copy of the rows changed since the first one runs (see
+`kanban_app.sharding.move_board`).
+Useful to spread busy boards when a shard gets hot or a new shard has
+been added to `KANBAN_SHARDS`.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban_app.models import Board
+from kanban_app.sharding import move_board, shard_aliases
+
+
+class Command(BaseCommand):
+    """Copy a board's tasks, comments and activity to another shard."""
+    help = "Move a board's task data to another shard while it stays online."
+
+    def add_arguments(self, parser):
+        parser.add_argument('board_id', type=int)
+        parser.add_argument(
+            'shard', help="Target database alias from KANBAN_SHARDS.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Number of rows copied or deleted per statement.")
+
+    def handle(self, *args, **options):
+        """Validate the target, move the board and report the progress."""
+        if options['shard'] not in shard_aliases():
+            raise CommandError(
+                f"{options['shard']!r} is not one of KANBAN_SHARDS: "
+                f"{', '.join(shard_aliases())}.")
+        if not Board.objects.filter(pk=options['board_id']).exists():
+            raise CommandError(f"Board {options['board_id']} does not exist.")
+
+        move_board(
+            options['board_id'], options['shard'], options['chunk_size'],
+            log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Board {options['board_id']} lives in {options['shard']}."))
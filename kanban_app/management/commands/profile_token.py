@@ -0,0 +1,32 @@
+"""Management command issuing a flag that profiles requests.
+
+Requests carrying the flag in the `X-Profile` header or the `_profile`
+query parameter are profiled while `PROFILING['ENABLED']` is set (see
+core.profiling).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import issue_token
+
+
+class Command(BaseCommand):
+    """Print a signed profiling flag."""
+    help = "Issue a signed flag that turns on profiling of requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int,
+            help="Seconds the flag is valid; PROFILING['TOKEN_MAX_AGE'] "
+                 "by default.")
+
+    def handle(self, *args, **options):
+        """Write the flag and how to use it."""
+        if not settings.PROFILING.get('ENABLED'):
+            self.stderr.write(
+                "Profiling is disabled; set PROFILING['ENABLED'] to use "
+                "the flag.")
+        token = issue_token(options['max_age'])
+        self.stdout.write(token)
+        self.stdout.write(f"Send it as 'X-Profile: {token}' or ?_profile=.")
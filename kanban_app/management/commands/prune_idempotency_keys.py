@@ -0,0 +1,43 @@
+"""Management command to forget old batch operation results.
+
+Idempotency keys only need to outlive the retries of an offline client.
+Keys older than `IDEMPOTENCY_KEY_DAYS` are deleted in batches.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from kanban_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Delete idempotency keys older than the configured age."""
+    help = "Delete stored batch results older than N days."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int,
+            default=settings.IDEMPOTENCY_KEY_DAYS,
+            help="Delete keys created more than this many days ago.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        """Delete expired keys batch by batch and report the total."""
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        expired = IdempotencyKey.objects.filter(created_at__lt=cutoff)
+
+        deleted = 0
+        while True:
+            ids = list(expired.values_list(
+                'id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} idempotency keys."))
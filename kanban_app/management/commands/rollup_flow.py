@@ -0,0 +1,26 @@
+"""Management command building the daily flow analytics rollups.
+
+Meant to run nightly from cron. Each run rolls up the days since the
+previous run from the task activity log into `FlowRollup` rows.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from kanban_app.analytics import roll_up
+
+
+class Command(BaseCommand):
+    """Roll up task status transitions into daily per-board rows."""
+    help = "Build daily cumulative flow rollups up to yesterday."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=None,
+            help="Last day to roll up (YYYY-MM-DD, default: yesterday).")
+
+    def handle(self, *args, **options):
+        """Roll up the pending days and report how many there were."""
+        days = roll_up(options['until'])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {days} days."))
@@ -0,0 +1,40 @@
+"""Management command running the due-date scanner.
+
+Runs as a long-lived process that periodically creates due-soon and
+overdue notifications. Use `--once` to run a single scan from cron.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from kanban_app.notifications import scan_due_dates
+
+
+class Command(BaseCommand):
+    """Periodically scan due dates and write notifications."""
+    help = "Create due-soon and overdue notifications for open tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=300,
+            help="Seconds between scans.")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Notifications inserted per statement.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run a single scan and exit.")
+
+    def handle(self, *args, **options):
+        """Scan, report and sleep until interrupted."""
+        try:
+            while True:
+                created = scan_due_dates(batch_size=options['batch_size'])
+                self.stdout.write(", ".join(
+                    f"{kind}: {count}" for kind, count in created.items()))
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
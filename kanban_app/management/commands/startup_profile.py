@@ -0,0 +1,99 @@
+"""Management command profiling worker startup.
+
+Starts a fresh interpreter with `-X importtime`, sets up Django there and
+reports the slowest imports, the time spent in each app's `ready()` and
+the duration of the warm-up done by the preloading entry points.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+PROFILE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from django.apps.config import AppConfig
+ready_times = {}
+create = AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    config = create(cls, entry)
+    ready = config.ready
+    def timed_ready():
+        began = time.perf_counter()
+        ready()
+        ready_times[config.label] = time.perf_counter() - began
+    config.ready = timed_ready
+    return config
+
+AppConfig.create = classmethod(timed_create)
+import django
+django.setup()
+setup = time.perf_counter() - start
+from core.warmup import warm_up
+warm = warm_up() if WARM else {}
+print(json.dumps({'setup': setup, 'ready': ready_times, 'warm_up': warm}))
+"""
+
+
+class Command(BaseCommand):
+    """Report import times, app-ready times and warm-up duration."""
+    help = "Profile Django startup in a fresh interpreter."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help="Number of slowest imports to list.")
+        parser.add_argument(
+            '--no-warm-up', action='store_true',
+            help="Skip timing core.warmup.warm_up().")
+
+    def handle(self, *args, **options):
+        """Run the profile script and print its findings."""
+        script = PROFILE_SCRIPT.replace(
+            'WARM', 'False' if options['no_warm_up'] else 'True')
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'core.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        imports = self.parse_importtime(result.stderr)
+
+        self.stdout.write(f"django.setup(): {report['setup'] * 1000:.1f} ms")
+        self.stdout.write(
+            f"Imports: {len(imports)} modules, "
+            f"{sum(own for own, _ in imports.values()) / 1000:.1f} ms")
+
+        self.stdout.write("\nSlowest imports (cumulative ms):")
+        slowest = sorted(imports.items(), key=lambda item: -item[1][1])
+        for module, (own, cumulative) in slowest[:options['top']]:
+            self.stdout.write(
+                f"  {cumulative / 1000:8.1f}  {own / 1000:8.1f}  {module}")
+
+        self.stdout.write("\nApp ready() (ms):")
+        for label, seconds in sorted(
+                report['ready'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {seconds * 1000:8.2f}  {label}")
+
+        if report['warm_up']:
+            self.stdout.write("\nWarm-up (ms):")
+            for step, seconds in report['warm_up'].items():
+                self.stdout.write(f"  {seconds * 1000:8.2f}  {step}")
+
+    def parse_importtime(self, output):
+        """Return `{module: (self_us, cumulative_us)}` from -X importtime."""
+        imports = {}
+        for line in output.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, cumulative, module = line[len('import time:'):].split('|')
+            imports[module.strip()] = (int(own), int(cumulative))
+        return imports
@@ -0,0 +1,32 @@
+"""Management command reporting request throttling metrics.
+
+Reads the shared token-bucket file used by `core.throttling` and prints
+how many requests were allowed and rejected, overall and per endpoint.
+"""
+
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+
+from core.throttling import _hash, get_buckets
+
+
+class Command(BaseCommand):
+    """Print throttling totals and rejections per URL name."""
+    help = "Show how many requests the throttle allowed and rejected."
+
+    def handle(self, *args, **options):
+        """Map endpoint hashes back to URL names and print the counters."""
+        stats = get_buckets().stats()
+        names = {
+            _hash(name): name for name in get_resolver().reverse_dict
+            if isinstance(name, str)
+        }
+
+        self.stdout.write(f"Allowed:  {stats['allowed']}")
+        self.stdout.write(f"Rejected: {stats['rejected']}")
+        self.stdout.write(f"Shared:   {stats['shared']} (buckets full)")
+        endpoints = sorted(
+            stats['endpoints'].items(), key=lambda item: -item[1])
+        for endpoint_hash, count in endpoints:
+            name = names.get(endpoint_hash, f"<{endpoint_hash:x}>")
+            self.stdout.write(f"  {name}: {count}")
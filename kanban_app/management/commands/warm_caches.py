@@ -0,0 +1,38 @@
+"""Management command warming the caches of the most read boards.
+
+Useful after deploys. Needs a cache shared by all processes (see
+`core.caches`); with the default per-process cache nothing is cached.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban_app.warming import warm_caches
+
+
+class Command(BaseCommand):
+    """Preload board payloads, roles and tokens of the hottest boards."""
+    help = "Warm caches for the most read boards."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--boards', type=int, default=None,
+            help="Number of boards to warm (default: CACHE_WARMING).")
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Rank boards by their reads in this many days.")
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help="Number of boards warmed in parallel.")
+
+    def handle(self, *args, **options):
+        """Warm the caches and report time and coverage."""
+        try:
+            report = warm_caches(
+                options['boards'], options['days'], options['concurrency'])
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {report['boards']} of {report['candidates']} boards "
+            f"covering {report['hit_coverage']:.0%} of recent reads "
+            f"in {report['seconds'] * 1000:.0f} ms."))
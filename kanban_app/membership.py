@@ -0,0 +1,127 @@
+"""Board membership updates and access checks.
+
+`set_board_members` replaces a board's member list with one read of the
+current memberships, one bulk DELETE and one bulk INSERT on the through
+table. It sends the same `m2m_changed` signals as `board.members.set()`
+so cache invalidation and the `BoardAccess` table keep working.
+
+`sync_board_access` recomputes `BoardAccess` rows from the owner and the
+members, and the `has_board_access` helpers answer permission checks
+from that table. A user's role on a board is cached under the user's
+cache version, which `sync_board_access` drops whenever it changes.
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed
+
+from core.caches import is_shared_cache
+
+from .cache import invalidate_users, user_cache_key
+from .models import Board, BoardAccess
+
+
+def role_cache_key(user_id, board_id):
+    """Return the cache key of a user's role on a board."""
+    return user_cache_key('board-role', user_id, board_id)
+
+
+def get_board_role(user_id, board_id):
+    """Return 'owner', 'member' or '' for no access, cached if shared."""
+    if not is_shared_cache():
+        return _load_board_role(user_id, board_id)
+    key = role_cache_key(user_id, board_id)
+    role = cache.get(key)
+    if role is None:
+        role = _load_board_role(user_id, board_id)
+        cache.set(key, role)
+    return role
+
+
+def _load_board_role(user_id, board_id):
+    """Return a user's role on a board from the `BoardAccess` table."""
+    return BoardAccess.objects.filter(
+        user_id=user_id, board_id=board_id,
+    ).values_list('role', flat=True).first() or ''
+
+
+def has_board_access(user, board_id, role=None):
+    """Return True when `user` owns or is a member of the board.
+
+    Pass `role='owner'` to only accept the board's owner.
+    """
+    current = get_board_role(user.pk, board_id)
+    if role is not None:
+        return current == role
+    return bool(current)
+
+
+def users_with_access(board_id, user_ids):
+    """Return the subset of `user_ids` that can access the board."""
+    return set(BoardAccess.objects.filter(
+        board_id=board_id, user_id__in=user_ids,
+    ).values_list('user_id', flat=True))
+
+
+def sync_board_access(board_id, user_ids):
+    """Recompute the `BoardAccess` rows of the given users on a board."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    invalidate_users(user_ids)
+    owner_id = Board.objects.filter(pk=board_id).values_list(
+        'owner_id', flat=True).first()
+    members = set(Board.members.through.objects.filter(
+        board_id=board_id, user_id__in=user_ids,
+    ).values_list('user_id', flat=True))
+
+    roles = {}
+    for user_id in user_ids:
+        if user_id == owner_id:
+            roles[user_id] = 'owner'
+        elif user_id in members:
+            roles[user_id] = 'member'
+
+    BoardAccess.objects.filter(
+        board_id=board_id, user_id__in=user_ids - roles.keys()).delete()
+    BoardAccess.objects.bulk_create(
+        [BoardAccess(board_id=board_id, user_id=user_id, role=role)
+         for user_id, role in roles.items()],
+        update_conflicts=True,
+        unique_fields=['user', 'board'],
+        update_fields=['role'],
+    )
+
+
+def set_board_members(board, users):
+    """Make `users` the exact member list of `board`."""
+    through = Board.members.through
+    using = router.db_for_write(through, instance=board)
+    wanted = {user.pk for user in users}
+
+    with transaction.atomic(using=using):
+        current = set(through.objects.using(using).filter(
+            board_id=board.pk).values_list('user_id', flat=True))
+        removed = current - wanted
+        added = wanted - current
+
+        if removed:
+            _send(board, 'pre_remove', removed, using)
+            through.objects.using(using).filter(
+                board_id=board.pk, user_id__in=removed).delete()
+            _send(board, 'post_remove', removed, using)
+
+        if added:
+            _send(board, 'pre_add', added, using)
+            through.objects.using(using).bulk_create(
+                [through(board_id=board.pk, user_id=pk) for pk in added],
+                ignore_conflicts=True)
+            _send(board, 'post_add', added, using)
+
+
+def _send(board, action, pk_set, using):
+    """Send `m2m_changed` for the board's members like Django does."""
+    m2m_changed.send(
+        sender=Board.members.through, action=action, instance=board,
+        reverse=False, model=User, pk_set=pk_set, using=using)
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0003_alter_comment_options_alter_task_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["task", "-created_at", "-id"], name="comment_task_created_idx"
+            ),
+        ),
+    ]
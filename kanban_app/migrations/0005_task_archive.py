@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_completed_at(apps, schema_editor):
+    """Start the archive clock for tasks that are already done."""
+    Task = apps.get_model("kanban_app", "Task")
+    Task.objects.filter(status="done").update(completed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0004_task_comment_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="archived",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False)),
+                fields=["board", "status"],
+                name="task_active_board_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False), ("status", "done")),
+                fields=["completed_at"],
+                name="task_archivable_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", True)),
+                fields=["board", "-completed_at", "-id"],
+                name="task_archived_board_idx",
+            ),
+        ),
+        migrations.RunPython(set_completed_at, migrations.RunPython.noop),
+    ]
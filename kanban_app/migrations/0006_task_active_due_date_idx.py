@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0005_task_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False)),
+                fields=["due_date"],
+                name="task_active_due_date_idx",
+            ),
+        ),
+    ]
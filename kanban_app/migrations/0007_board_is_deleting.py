@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0006_task_active_due_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="is_deleting",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_board_access(apps, schema_editor):
+    """Create access rows for the owners and members of existing boards."""
+    Board = apps.get_model("kanban_app", "Board")
+    BoardAccess = apps.get_model("kanban_app", "BoardAccess")
+    rows = {
+        (board_id, owner_id): "owner"
+        for board_id, owner_id in Board.objects.values_list("id", "owner_id")
+    }
+    memberships = Board.members.through.objects.values_list("board_id", "user_id")
+    for key in memberships:
+        rows.setdefault(key, "member")
+    BoardAccess.objects.bulk_create(
+        [
+            BoardAccess(board_id=board_id, user_id=user_id, role=role)
+            for (board_id, user_id), role in rows.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0008_notification_duedatescan"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardAccess",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("owner", "Owner"), ("member", "Member")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "board",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access",
+                        to="kanban_app.board",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="board_access",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "board"), name="unique_board_access"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_board_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0009_boardaccess"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("status", "Status"),
+                            ("assignee", "Assignee"),
+                            ("priority", "Priority"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("old_value", models.CharField(blank=True, max_length=50, null=True)),
+                ("new_value", models.CharField(blank=True, max_length=50, null=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "board",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="kanban_app.board",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="kanban_app.task",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Task activity",
+                "indexes": [
+                    models.Index(
+                        fields=["task", "-created_at", "-id"],
+                        name="activity_task_created_idx",
+                    ),
+                    models.Index(
+                        fields=["board", "-created_at", "-id"],
+                        name="activity_board_created_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
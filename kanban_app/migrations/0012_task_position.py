@@ -0,0 +1,72 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:21
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def spread_keys(count):
+    """Return `count` ascending fractional keys, evenly spaced.
+
+    A frozen copy of the key format of this migration: plain base-36
+    fractions without trailing zeros.
+    """
+    length = max(1, math.ceil(math.log(count + 1, BASE)))
+    step = BASE**length // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
+
+
+def backfill_positions(apps, schema_editor):
+    """Order every existing column by task id with evenly spaced keys."""
+    Task = apps.get_model("kanban_app", "Task")
+    columns = Task.objects.values_list("board_id", "status").distinct()
+    for board_id, status in columns:
+        tasks = list(
+            Task.objects.filter(board_id=board_id, status=status)
+            .order_by("id")
+            .only("id")
+        )
+        for task, key in zip(tasks, spread_keys(len(tasks))):
+            task.position = key
+        Task.objects.bulk_update(tasks, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0011_idempotencykey"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_active_board_status_idx",
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="position",
+            field=models.CharField(default="", editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False)),
+                fields=["board", "status", "position", "id"],
+                name="task_active_column_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0012_task_position"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlowRollupScan",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rolled_up_through", models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FlowRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("to-do", "To Do"),
+                            ("in-progress", "In Progress"),
+                            ("done", "Done"),
+                            ("review", "Review"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("tasks", models.PositiveIntegerField(default=0)),
+                ("entered", models.PositiveIntegerField(default=0)),
+                ("cycle_seconds", models.FloatField(default=0)),
+                ("cycle_count", models.PositiveIntegerField(default=0)),
+                (
+                    "board",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flow_rollups",
+                        to="kanban_app.board",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("board", "status", "day"), name="unique_flow_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
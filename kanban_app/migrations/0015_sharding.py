@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0014_boardhit"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoardShard",
+            fields=[
+                (
+                    "board",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="shard",
+                        serialize=False,
+                        to="kanban_app.board",
+                    ),
+                ),
+                ("alias", models.CharField(max_length=100)),
+                ("read_only", models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("next_id", models.BigIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="task",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="notifications",
+                to="kanban_app.task",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="assignee",
+            field=models.ForeignKey(
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="assigned_tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="board",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tasks",
+                to="kanban_app.board",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="reviewer",
+            field=models.ForeignKey(
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reviewed_tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0015_sharding"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
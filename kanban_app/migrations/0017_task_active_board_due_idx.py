@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0016_task_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False)),
+                fields=["board", "due_date"],
+                name="task_active_board_due_idx",
+            ),
+        ),
+    ]
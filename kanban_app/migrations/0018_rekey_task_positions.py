@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:05
+
+import math
+
+from django.db import migrations
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+POSITIVE = BASE // 2
+
+
+def spread_keys(count):
+    """Return `count` ascending keys with integer parts, evenly spaced.
+
+    A frozen copy of the key format of this migration: a head digit
+    giving the number of integer digits, then those digits.
+    """
+    length = max(1, math.ceil(math.log(count + 1, BASE)))
+    head = DIGITS[POSITIVE + length - 1]
+    step = BASE**length // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(head + "".join(reversed(digits)))
+    return keys
+
+
+def rekey_positions(apps, schema_editor):
+    """Rewrite every column's keys with integer parts, keeping the order."""
+    Task = apps.get_model("kanban_app", "Task")
+    tasks = Task.objects.using(schema_editor.connection.alias)
+    columns = tasks.values_list("board_id", "status").distinct()
+    for board_id, status in columns:
+        column = list(
+            tasks.filter(board_id=board_id, status=status)
+            .order_by("position", "id")
+            .only("id")
+        )
+        for task, key in zip(column, spread_keys(len(column))):
+            task.position = key
+        tasks.bulk_update(column, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0017_task_active_board_due_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rekey_positions,
+            migrations.RunPython.noop,
+            hints={"model_name": "task"},
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0018_rekey_task_positions"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="DueDateScan",
+        ),
+    ]
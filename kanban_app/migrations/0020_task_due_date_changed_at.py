@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0019_delete_duedatescan"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DueDateScan",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("due-soon", "Due soon"), ("overdue", "Overdue")],
+                        max_length=20,
+                        unique=True,
+                    ),
+                ),
+                ("scanned_through", models.DateField()),
+                ("scanned_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="due_date_changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("archived", False)),
+                fields=["due_date_changed_at"],
+                name="task_due_date_changed_idx",
+            ),
+        ),
+    ]
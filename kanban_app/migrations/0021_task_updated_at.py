@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kanban_app", "0020_task_due_date_changed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["board", "updated_at"], name="task_board_updated_idx"
+            ),
+        ),
+    ]
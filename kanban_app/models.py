@@ -5,8 +5,13 @@ and Comment. These represent boards, tasks/tickets and threaded comments
 attached to tasks. Models reference Django's built-in `User` model.
 """
 
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .ordering import key_between, last_position
+from .sharding import assign_id
 
 
 class Board(models.Model):
@@ -15,10 +20,84 @@ class Board(models.Model):
     owner = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='owned_boards')
     members = models.ManyToManyField(User, related_name='boards')
+    is_deleting = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return self.title
 
+    @property
+    def active_tasks(self):
+        """Return the board's non-archived tasks, prefetched if available."""
+        prefetched = getattr(self, 'prefetched_active_tasks', None)
+        if prefetched is not None:
+            return prefetched
+        return self.tasks.active()
+
+
+class BoardAccess(models.Model):
+    """Materialized access of one user to one board.
+
+    Holds one row per owner and member so listing a user's boards and
+    checking permissions are single indexed lookups. Kept in sync with
+    `Board.owner` and `Board.members` by `kanban_app.signals`.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'Owner'),
+        ('member', 'Member'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='board_access')
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='access')
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'board'], name='unique_board_access'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} is {self.role} of {self.board}"
+
+
+class BoardShard(models.Model):
+    """Directory entry naming the database that holds a board's tasks.
+
+    Boards without an entry live in 'default'. `read_only` is set while
+    `kanban_app.sharding.move_board` copies the board to another shard.
+    """
+    board = models.OneToOneField(
+        Board, on_delete=models.CASCADE, primary_key=True,
+        related_name='shard')
+    alias = models.CharField(max_length=100)
+    read_only = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.board_id} in {self.alias}"
+
+
+class IdSequence(models.Model):
+    """Next primary key one shard hands out for one sharded model."""
+    name = models.CharField(max_length=100, unique=True)
+    next_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_id}"
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet helpers separating hot tasks from archived ones."""
+
+    def active(self):
+        """Return tasks that are not archived."""
+        return self.filter(archived=False)
+
+    def archived(self):
+        """Return archived tasks."""
+        return self.filter(archived=True)
+
 
 class Task(models.Model):
     """A task/ticket that belongs to a board with status and priority."""
@@ -34,8 +113,11 @@ class Task(models.Model):
         ('high', 'High')
     ]
 
+    # Tasks may live in a shard apart from boards and users, so their
+    # foreign keys to them carry no database constraint.
     board = models.ForeignKey(
-        Board, on_delete=models.CASCADE, related_name='tasks')
+        Board, on_delete=models.CASCADE, related_name='tasks',
+        db_constraint=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     status = models.CharField(
@@ -44,21 +126,150 @@ class Task(models.Model):
         max_length=20, choices=PRIO_CHOICES, default='medium')
 
     assignee = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name='assigned_tasks')
+        User, on_delete=models.SET_NULL, null=True, related_name='assigned_tasks',
+        db_constraint=False)
     reviewer = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name='reviewed_tasks')
+        User, on_delete=models.SET_NULL, null=True, related_name='reviewed_tasks',
+        db_constraint=False)
 
     due_date = models.DateField()
 
+    # Fractional ordering key within the (board, status) column.
+    position = models.CharField(max_length=255, default='', editable=False)
+
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    archived = models.BooleanField(default=False)
+
+    # Bumped by every client edit, see `save_changes`.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Set by every write, including bulk updates; `move_board` copies the
+    # tasks changed since its first pass.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Set whenever the due date is set, see `kanban_app.notifications`.
+    due_date_changed_at = models.DateTimeField(
+        null=True, blank=True, editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['board', 'status', 'position', 'id'],
+                condition=models.Q(archived=False),
+                name='task_active_column_idx'),
+            models.Index(
+                fields=['completed_at'],
+                condition=models.Q(status='done', archived=False),
+                name='task_archivable_idx'),
+            models.Index(
+                fields=['board', '-completed_at', '-id'],
+                condition=models.Q(archived=True),
+                name='task_archived_board_idx'),
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(archived=False),
+                name='task_active_due_date_idx'),
+            models.Index(
+                fields=['board', 'due_date'],
+                condition=models.Q(archived=False),
+                name='task_active_board_due_idx'),
+            models.Index(
+                fields=['due_date_changed_at'],
+                condition=models.Q(archived=False),
+                name='task_due_date_changed_idx'),
+            models.Index(
+                fields=['board', 'updated_at'],
+                name='task_board_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values so changes can be detected on save."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_changed_fields(self):
+        """Return `{attname: (old, new)}` for fields changed since loading."""
+        loaded = getattr(self, '_loaded_values', {})
+        return {
+            name: (old, getattr(self, name))
+            for name, old in loaded.items()
+            if getattr(self, name) != old
+        }
+
+    def save(self, *args, **kwargs):
+        """Track completion, unarchive and position tasks on status changes.
+
+        A task entering a column without an explicitly chosen position is
+        placed at the end of that column. Setting the due date stamps
+        `due_date_changed_at`.
+        """
+        assign_id(self, kwargs)
+        changed = self.get_changed_fields()
+        updated = {'updated_at'}
+        if self._state.adding or 'due_date' in changed:
+            self.due_date_changed_at = timezone.now()
+            updated.add('due_date_changed_at')
+        if self._state.adding or 'status' in changed:
+            if self.status == 'done':
+                self.completed_at = timezone.now()
+            else:
+                self.completed_at = None
+                self.archived = False
+            updated |= {'completed_at', 'archived'}
+            if not self.position or (
+                    not self._state.adding and 'position' not in changed):
+                self.position = key_between(last_position(
+                    self.board_id, self.status, exclude=self.pk), None)
+                updated.add('position')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *updated}
+
+        super().save(*args, **kwargs)
+
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def save_changes(self, version):
+        """Save the changed fields if the row is still at `version`.
+
+        The version is bumped first by a conditional UPDATE, which takes
+        the row's write lock, and the changed fields are written in the
+        same short transaction. Returns False, writing nothing, when the
+        task has been changed or deleted since `version`.
+        """
+        using = router.db_for_write(Task, instance=self)
+        current = Task.objects.using(using).filter(pk=self.pk, version=version)
+        changed = list(self.get_changed_fields())
+        if not changed:
+            return current.exists()
+        with transaction.atomic(using=using):
+            if not current.update(version=models.F('version') + 1):
+                return False
+            self.version = version + 1
+            self.save(using=using, update_fields=changed)
+        return True
+
 
 class Comment(models.Model):
     """A comment left by a user on a task."""
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='comments')
+        User, on_delete=models.CASCADE, related_name='comments',
+        db_constraint=False)
     content = models.TextField()
     task = models.ForeignKey(
         Task, on_delete=models.CASCADE, related_name='comments')
@@ -67,6 +278,174 @@ class Comment(models.Model):
         ordering = ['-created_at']
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
+        indexes = [
+            models.Index(
+                fields=['task', '-created_at', '-id'],
+                name='comment_task_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.task}"
+
+    def save(self, *args, **kwargs):
+        """Take the primary key from the shard's range when sharded."""
+        assign_id(self, kwargs)
+        super().save(*args, **kwargs)
+
+
+class TaskActivity(models.Model):
+    """One change of a tracked task field in the append-only history.
+
+    Rows are written by `kanban_app.activity` once the change has
+    committed, so the foreign keys carry no database constraint: a task
+    may be deleted before its events are written.
+    """
+    FIELD_CHOICES = [
+        ('created', 'Created'),
+        ('status', 'Status'),
+        ('assignee', 'Assignee'),
+        ('priority', 'Priority'),
+    ]
+
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name='activity',
+        db_constraint=False)
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='activity',
+        db_constraint=False)
+    actor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='+',
+        db_constraint=False)
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    old_value = models.CharField(max_length=50, null=True, blank=True)
+    new_value = models.CharField(max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Task activity"
+        indexes = [
+            models.Index(
+                fields=['task', '-created_at', '-id'],
+                name='activity_task_created_idx'),
+            models.Index(
+                fields=['board', '-created_at', '-id'],
+                name='activity_board_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field} of {self.task_id}: {self.old_value} -> {self.new_value}"
+
+
+class FlowRollup(models.Model):
+    """Daily task numbers of one board column for flow analytics.
+
+    Written by `kanban_app.analytics.roll_up` only for days on which the
+    column changed; a missing day carries over the previous row's count.
+    """
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='flow_rollups')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    tasks = models.PositiveIntegerField(default=0)
+    entered = models.PositiveIntegerField(default=0)
+    cycle_seconds = models.FloatField(default=0)
+    cycle_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'status', 'day'],
+                name='unique_flow_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.board_id} {self.status} on {self.day}: {self.tasks}"
+
+
+class FlowRollupScan(models.Model):
+    """Watermark up to which flow rollups were built (a single row)."""
+    rolled_up_through = models.DateField()
+
+    def __str__(self):
+        return f"Flow rolled up through {self.rolled_up_through}"
+
+
+class BoardHit(models.Model):
+    """Number of board detail reads of one board on one day."""
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='hits')
+    day = models.DateField()
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'board'], name='unique_board_hit'),
+        ]
+
+    def __str__(self):
+        return f"{self.board_id} on {self.day}: {self.hits}"
+
+
+class Notification(models.Model):
+    """A message for a user about one of their tasks."""
+    KIND_CHOICES = [
+        ('due-soon', 'Due soon'),
+        ('overdue', 'Overdue'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='notifications')
+    # Tasks may live in a shard; `kanban_app.signals` deletes the
+    # notifications of deleted tasks.
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, related_name='notifications',
+        db_constraint=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'task', 'kind'],
+                name='unique_task_notification'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                condition=models.Q(read_at__isnull=True),
+                name='notification_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.task} for {self.user}"
+
+
+class DueDateScan(models.Model):
+    """How far due dates were scanned for one kind of notification."""
+    kind = models.CharField(
+        max_length=20, choices=Notification.KIND_CHOICES, unique=True)
+    scanned_through = models.DateField()
+    scanned_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.kind} scanned through {self.scanned_through}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored result of a batch operation, keyed by the client's key."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=100)
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} of {self.user}"
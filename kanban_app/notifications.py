@@ -0,0 +1,91 @@
+"""Due-date scanning and notification generation.
+
+`scan_due_dates` notifies about open tasks in the "due soon" window (due
+from today through `DUE_SOON_DAYS` ahead) and overdue tasks. A per-kind
+watermark in `DueDateScan` keeps each run incremental: it reads the due
+dates that entered the window since the previous run, with an index
+range scan, plus the tasks whose due date was set since then
+(`Task.due_date_changed_at`) and already lies inside the window. A
+rescheduled task loses its notifications (see `kanban_app.signals`), so
+it is notified again when it re-enters a window. Notifications are
+written in batches, and tasks are scanned in every shard (see
+`kanban_app.sharding`).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DueDateScan, Notification, Task
+from .sharding import shard_aliases
+
+
+def scan_due_dates(today=None, batch_size=500):
+    """Write due-soon and overdue notifications, return counts per kind."""
+    today = today or timezone.localdate()
+    windows = {
+        'overdue': (None, today - timedelta(days=1)),
+        'due-soon': (today, today + timedelta(days=settings.DUE_SOON_DAYS)),
+    }
+    return {
+        kind: _scan(kind, start, through, batch_size)
+        for kind, (start, through) in windows.items()
+    }
+
+
+def _scan(kind, start, through, batch_size):
+    """Notify about tasks newly due from `start` (open) up to `through`.
+
+    The first run of a kind covers its whole window.
+    """
+    now = timezone.now()
+    scan = DueDateScan.objects.filter(kind=kind).first()
+    window = {'due_date__lte': through}
+    if start is not None:
+        window['due_date__gte'] = start
+    open_tasks = Task.objects.active().exclude(status='done').filter(
+        **window)
+
+    if scan is None:
+        querysets = [open_tasks]
+    else:
+        # Due dates up to the watermark were seen by an earlier run; only
+        # tasks given such a due date since then are new.
+        querysets = [
+            open_tasks.filter(due_date__gt=scan.scanned_through),
+            open_tasks.filter(
+                due_date__lte=scan.scanned_through,
+                due_date_changed_at__gte=scan.scanned_at),
+        ]
+
+    written = 0
+    batch = []
+    for using in shard_aliases():
+        for tasks in querysets:
+            rows = tasks.using(using).order_by().values_list(
+                'id', 'assignee_id', 'reviewer_id',
+            ).iterator(chunk_size=batch_size)
+            for task_id, *user_ids in rows:
+                batch += [
+                    Notification(user_id=user_id, task_id=task_id, kind=kind)
+                    for user_id in set(user_ids) if user_id is not None
+                ]
+                if len(batch) >= batch_size:
+                    written += _write(batch)
+                    batch = []
+    written += _write(batch)
+
+    DueDateScan.objects.update_or_create(
+        kind=kind, defaults={'scanned_through': through, 'scanned_at': now})
+    return written
+
+
+def _write(notifications):
+    """Insert a batch, skipping existing notifications; return its size."""
+    if not notifications:
+        return 0
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+    return len(notifications)
@@ -0,0 +1,159 @@
+"""Fractional ordering keys for tasks within a board column.
+
+A task's `position` is a string of base-36 digits that plain string
+comparison orders. It starts with an integer part: a head digit telling
+the number of digits that follow ('i' to 'z' for 1 to 18 digits counting
+up, 'h' to '0' for 1 to 18 digits counting down), then those digits. An
+optional fraction follows. Appending to or prepending at the ends of a
+column steps the integer part, so those keys only grow logarithmically;
+a key between two neighbours gets a fraction. Moving a task therefore
+rewrites only that task's row. Fractions grow when tasks are repeatedly
+dropped into the same gap; `rebalance_column` then rewrites the column
+with short, evenly spaced keys.
+"""
+
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .sharding import shard_for_board
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+# Index of the head digit of the shortest non-negative integers.
+POSITIVE = BASE // 2
+FIRST_KEY = DIGITS[POSITIVE] + '0'
+
+
+def key_between(before, after):
+    """Return a key sorting strictly between `before` and `after`.
+
+    Either bound may be None for the start or end of the column.
+    Fractions never end with the zero digit, so every key has one
+    spelling.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}.")
+    if before is None and after is None:
+        return FIRST_KEY
+    if before is None:
+        integer, fraction = _split(after)
+        if fraction:
+            return integer
+        lower = _step(integer, -1)
+        if lower is None:
+            raise ValueError(f"No key sorts before {after!r}.")
+        return lower
+    integer, fraction = _split(before)
+    if after is not None:
+        high_integer, high_fraction = _split(after)
+        if integer == high_integer:
+            return integer + _midpoint(fraction, high_fraction)
+    higher = _step(integer, 1)
+    if higher is not None and (after is None or higher < after):
+        return higher
+    return integer + _midpoint(fraction, None)
+
+
+def _integer_length(head):
+    """Return the number of digits following an integer's head digit."""
+    index = DIGITS.index(head)
+    return index - POSITIVE + 1 if index >= POSITIVE else POSITIVE - index
+
+
+def _split(key):
+    """Return the integer part and the fraction of a key."""
+    end = _integer_length(key[0]) + 1
+    if len(key) < end or key[end:].endswith('0'):
+        raise ValueError(f"{key!r} is not a position key.")
+    return key[:end], key[end:]
+
+
+def _step(integer, delta):
+    """Return the integer part after `integer` (`delta` 1) or before it.
+
+    Returns None past the largest or smallest integer part.
+    """
+    digits = [DIGITS.index(digit) for digit in integer[1:]]
+    for index in reversed(range(len(digits))):
+        digits[index] += delta
+        if 0 <= digits[index] < BASE:
+            return integer[0] + ''.join(DIGITS[digit] for digit in digits)
+        digits[index] %= BASE
+    head = DIGITS.index(integer[0]) + delta
+    if not 0 <= head < BASE:
+        return None
+    filler = DIGITS[0] if delta > 0 else DIGITS[-1]
+    return DIGITS[head] + filler * _integer_length(DIGITS[head])
+
+
+def _midpoint(low, high):
+    """Return the shortest key between `low` ('' for 0) and `high`."""
+    if high is not None:
+        prefix = 0
+        while prefix < len(high) and (
+                low[prefix] if prefix < len(low) else '0') == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def spread_keys(count):
+    """Return `count` ascending keys of equal length, evenly spaced."""
+    length = max(1, math.ceil(math.log(count + 1, BASE)))
+    head = DIGITS[POSITIVE + length - 1]
+    step = BASE ** length // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(head + ''.join(reversed(digits)))
+    return keys
+
+
+def last_position(board_id, status, exclude=None):
+    """Return the highest position in a column, or None when empty."""
+    from .models import Task
+
+    tasks = Task.objects.using(shard_for_board(board_id)).active().filter(
+        board_id=board_id, status=status)
+    if exclude is not None:
+        tasks = tasks.exclude(pk=exclude)
+    return tasks.aggregate(last=Max('position'))['last']
+
+
+def needs_rebalance(position):
+    """Return True when a key has grown past `TASK_POSITION_MAX_LENGTH`."""
+    return len(position) > settings.TASK_POSITION_MAX_LENGTH
+
+
+def rebalance_column(board_id, status):
+    """Rewrite a column's keys evenly in its current order; return count."""
+    from .models import Task
+
+    using = shard_for_board(board_id, for_write=True)
+    with transaction.atomic(using=using):
+        tasks = list(Task.objects.using(using).active().filter(
+            board_id=board_id, status=status,
+        ).select_for_update().order_by('position', 'id').only('id', 'position'))
+        now = timezone.now()
+        for task, key in zip(tasks, spread_keys(len(tasks))):
+            task.position = key
+            task.updated_at = now
+        Task.objects.using(using).bulk_update(
+            tasks, ['position', 'updated_at'], batch_size=500)
+    return len(tasks)
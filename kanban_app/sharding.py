@@ -0,0 +1,457 @@
+"""Board-partitioned storage of tasks, comments and task activity.
+
+With more databases than 'default' listed in `KANBAN_SHARDS`, the tasks
+of a board, their comments and their activity live together in one of
+the listed databases, the board's shard. Users, boards, memberships and
+everything else stay in 'default'. Keeping a board's rows together means
+every board-scoped query and transaction touches a single database; only
+endpoints spanning boards, such as a user's assigned tasks, gather rows
+from every shard.
+
+`BoardShard` is the directory. New boards are placed by hashing their id
+over the shards, boards without a row live in 'default', and
+`move_board` (`manage.py move_board_shard`) moves a board while it stays
+readable. Placements are cached for `SHARDING['DIRECTORY_TIMEOUT']`
+seconds.
+
+Each shard hands out primary keys from its own range (`allocate_ids`),
+so rows keep their keys when their board moves. `ShardRouter` routes
+queries that carry a model instance; other queries name their database
+with `.using()`, usually through the helpers below.
+
+With only 'default' configured every helper answers 'default' without
+reading the directory and the router leaves routing to Django.
+"""
+
+import heapq
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, router, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SHARDED_MODELS = {
+    'kanban_app.task',
+    'kanban_app.comment',
+    'kanban_app.taskactivity',
+}
+
+# Tables created in every shard: the sharded models and their key ranges.
+SHARD_TABLES = SHARDED_MODELS | {'kanban_app.idsequence'}
+
+# Size of the primary key range of each shard. The n-th alias of
+# `KANBAN_SHARDS` hands out keys above n * ID_RANGE.
+ID_RANGE = 2 ** 40
+
+
+class BoardMoving(APIException):
+    """Raised on writes to a board while it moves between shards."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The board is being moved, retry shortly."
+    default_code = 'board_moving'
+
+
+def is_sharded():
+    """Return True when board data is spread over several databases."""
+    return list(settings.KANBAN_SHARDS) != [DEFAULT_DB_ALIAS]
+
+
+def shard_aliases():
+    """Return the database aliases holding board data."""
+    return list(settings.KANBAN_SHARDS)
+
+
+def _placement_key(board_id):
+    """Return the cache key of a board's directory entry."""
+    return f'kanban:board-shard:{board_id}'
+
+
+def get_placement(board_id):
+    """Return `(alias, read_only)` of a board from the cached directory."""
+    from .models import BoardShard
+
+    key = _placement_key(board_id)
+    placement = cache.get(key)
+    if placement is None:
+        placement = BoardShard.objects.filter(board_id=board_id).values_list(
+            'alias', 'read_only').first() or (DEFAULT_DB_ALIAS, False)
+        cache.set(key, placement, settings.SHARDING['DIRECTORY_TIMEOUT'])
+    return placement
+
+
+def set_placement(board_id, alias, read_only=False):
+    """Point the directory entry of a board at `alias`."""
+    from .models import BoardShard
+
+    BoardShard.objects.update_or_create(
+        board_id=board_id, defaults={'alias': alias, 'read_only': read_only})
+    cache.delete(_placement_key(board_id))
+
+
+def place_board(board_id):
+    """Record the shard of a new board, chosen by hashing its id."""
+    aliases = shard_aliases()
+    set_placement(board_id, aliases[board_id % len(aliases)])
+
+
+def shard_for_board(board_id, for_write=False):
+    """Return the alias holding a board's tasks.
+
+    With `for_write`, raise `BoardMoving` while the board is read-only.
+    """
+    if not is_sharded() or board_id is None:
+        return DEFAULT_DB_ALIAS
+    alias, read_only = get_placement(board_id)
+    if for_write and read_only:
+        raise BoardMoving()
+    return alias
+
+
+def board_for_task(task_id):
+    """Return the board id of a task, or None when it does not exist.
+
+    Without sharding the task's row answers. Otherwise a task missing from
+    the cache is looked up in every shard; tasks never change boards, so
+    answers are cached for `SHARDING['TASK_BOARD_TIMEOUT']` seconds.
+    """
+    from .models import Task
+
+    if not is_sharded():
+        return Task.objects.filter(pk=task_id).values_list(
+            'board_id', flat=True).first()
+    key = f'kanban:task-board:{task_id}'
+    board_id = cache.get(key)
+    if board_id is None:
+        for alias in shard_aliases():
+            board_id = Task.objects.using(alias).filter(
+                pk=task_id).values_list('board_id', flat=True).first()
+            if board_id is not None:
+                cache.set(
+                    key, board_id, settings.SHARDING['TASK_BOARD_TIMEOUT'])
+                break
+    return board_id
+
+
+def shard_for_task(task_id, for_write=False):
+    """Return the alias holding a task, 'default' when it does not exist."""
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS
+    return shard_for_board(board_for_task(task_id), for_write)
+
+
+def group_boards(board_ids):
+    """Return `{alias: board_ids}` for the shards holding the boards.
+
+    Unsharded, `board_ids` is returned as is and may be a queryset.
+    """
+    if not is_sharded():
+        return {DEFAULT_DB_ALIAS: board_ids}
+    groups = {}
+    for board_id in board_ids:
+        groups.setdefault(shard_for_board(board_id), []).append(board_id)
+    return groups
+
+
+def home_rows(alias, rows, board_of=lambda row: row.board_id):
+    """Drop the rows read from `alias` whose board lives elsewhere.
+
+    Such rows are copies left behind in the old shard of a moving board.
+    """
+    if not is_sharded():
+        return list(rows)
+    homes = {}
+    kept = []
+    for row in rows:
+        board_id = board_of(row)
+        if board_id not in homes:
+            homes[board_id] = shard_for_board(board_id) == alias
+        if homes[board_id]:
+            kept.append(row)
+    return kept
+
+
+def gather(queryset):
+    """Evaluate a task or activity queryset on every shard, ordered by id.
+
+    Unsharded, the queryset is returned unevaluated.
+    """
+    if not is_sharded():
+        return queryset
+    rows = []
+    for alias in shard_aliases():
+        rows += home_rows(alias, queryset.using(alias))
+    return sorted(rows, key=lambda row: row.pk)
+
+
+def iterate(queryset, chunk_size=500):
+    """Yield the rows of a task or activity queryset from every shard.
+
+    Like `gather`, but rows are read `chunk_size` at a time and merged by
+    id while they are consumed.
+    """
+    if not is_sharded():
+        yield from queryset.order_by('pk').iterator(chunk_size=chunk_size)
+        return
+
+    def rows_in(alias):
+        rows = queryset.using(alias).order_by('pk').iterator(
+            chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield from home_rows(alias, chunk)
+
+    yield from heapq.merge(
+        *(rows_in(alias) for alias in shard_aliases()),
+        key=lambda row: row.pk)
+
+
+def load_tasks(task_ids, *fields):
+    """Return `{id: task}` for the given ids, from any shard."""
+    from .models import Task
+
+    tasks = Task.objects.all()
+    if fields:
+        tasks = tasks.only('board', *fields)
+    found = {}
+    for alias in shard_aliases():
+        found.update(
+            (task.pk, task) for task in home_rows(
+                alias, tasks.using(alias).in_bulk(task_ids).values()))
+    return found
+
+
+@contextmanager
+def atomic_everywhere():
+    """Run a block in one transaction on 'default' and on every shard.
+
+    Shards commit before 'default'. Without two-phase commit, a failure
+    between the commits leaves the shards' part applied.
+    """
+    with ExitStack() as stack:
+        for alias in dict.fromkeys([DEFAULT_DB_ALIAS, *shard_aliases()]):
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+def allocate_ids(model, alias, count=1):
+    """Return `count` new primary keys for a sharded model in `alias`.
+
+    Keys come from the shard's own range and are reserved in the shard's
+    transaction, so a rolled back insert never leaks a reserved key.
+    """
+    from .models import IdSequence
+
+    label = model._meta.label_lower
+    sequences = IdSequence.objects.using(alias)
+    try:
+        with transaction.atomic(using=alias):
+            if not sequences.filter(name=label).update(
+                    next_id=F('next_id') + count):
+                # First key handed out: continue after the range's rows.
+                start = shard_aliases().index(alias) * ID_RANGE
+                highest = model._base_manager.using(alias).filter(
+                    pk__gt=start, pk__lte=start + ID_RANGE,
+                ).aggregate(highest=Max('pk'))['highest'] or start
+                sequences.create(name=label, next_id=highest + 1 + count)
+            end = sequences.filter(name=label).values_list(
+                'next_id', flat=True).get()
+    except IntegrityError:
+        # Another process created the sequence first.
+        return allocate_ids(model, alias, count)
+    return list(range(end - count, end))
+
+
+def assign_id(instance, save_kwargs):
+    """Give a new row of a sharded model a key from its shard's range.
+
+    `save_kwargs` are the keyword arguments of `save()`; the chosen
+    database and a forced insert are added to them.
+    """
+    if not is_sharded() or not instance._state.adding or instance.pk:
+        return
+    alias = save_kwargs.get('using') or router.db_for_write(
+        type(instance), instance=instance)
+    instance.pk = allocate_ids(type(instance), alias)[0]
+    save_kwargs.update(using=alias, force_insert=True)
+
+
+class ShardRouter:
+    """Route sharded models to their board's shard, others to 'default'."""
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints.get('instance'), for_write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints.get('instance'), for_write=True)
+
+    def _route(self, model, instance, for_write):
+        """Find the board behind the instance hint and return its shard."""
+        if not is_sharded():
+            return None
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        if instance is None:
+            return None
+        label = instance._meta.label_lower
+        if label == 'kanban_app.board':
+            return shard_for_board(instance.pk, for_write)
+        if hasattr(instance, 'board_id'):
+            return shard_for_board(instance.board_id, for_write)
+        if hasattr(instance, 'task_id'):
+            if instance._meta.get_field('task').is_cached(instance):
+                return shard_for_board(instance.task.board_id, for_write)
+            return shard_for_task(instance.task_id, for_write)
+        return instance._state.db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations across shards; foreign keys carry no constraint."""
+        return True if is_sharded() else None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only create the sharded tables in shards other than 'default'."""
+        if db == DEFAULT_DB_ALIAS or db not in shard_aliases():
+            return None
+        return f'{app_label}.{model_name}' in SHARD_TABLES
+
+
+def _upsert(model, rows, alias):
+    """Insert or overwrite rows in `alias`, keeping their timestamps."""
+    manager = model._base_manager.using(alias)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    # `bulk_create` stamps auto_now_add fields with the current time.
+    stamped = [
+        field for field in fields if getattr(field, 'auto_now_add', False)
+    ]
+    values = [
+        [getattr(row, field.attname) for field in stamped] for row in rows
+    ]
+    manager.bulk_create(
+        rows, update_conflicts=True, unique_fields=[model._meta.pk.name],
+        update_fields=[field.name for field in fields])
+    if stamped:
+        for row, row_values in zip(rows, values):
+            for field, value in zip(stamped, row_values):
+                setattr(row, field.attname, value)
+        manager.bulk_update(rows, [field.name for field in stamped])
+    return len(rows)
+
+
+def _copy(queryset, alias, chunk_size):
+    """Upsert the rows of `queryset` into `alias` in primary key chunks."""
+    copied = last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not rows:
+            return copied
+        copied += _upsert(queryset.model, rows, alias)
+        last_pk = rows[-1].pk
+
+
+def _chunks(items, size):
+    """Yield lists of at most `size` of `items`."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def copy_board_rows(board_id, source, target, chunk_size=500, since=None):
+    """Bring a board's rows in `target` up to date with `source`.
+
+    Tasks are upserted, all of them or with `since` only those written
+    from then on (`Task.updated_at`). Comments and task activity are only
+    ever added, so the rows whose keys are missing from `target` are
+    copied, after the tasks so their foreign keys hold. Rows missing from
+    `source`, deleted since an earlier copy, are deleted from `target`.
+    Returns the number of rows copied.
+    """
+    from .jobs import delete_in_chunks
+    from .models import Comment, Task, TaskActivity
+
+    tasks = Task._base_manager.using(source).filter(board_id=board_id)
+    if since is not None:
+        tasks = tasks.filter(updated_at__gte=since)
+    copied = _copy(tasks, target, chunk_size)
+
+    for model, lookup in [
+            (Comment, 'task__board_id'),
+            (TaskActivity, 'board_id'),
+            (Task, 'board_id')]:
+        rows = model._base_manager.filter(**{lookup: board_id})
+        kept = set(rows.using(source).values_list('pk', flat=True))
+        present = set(rows.using(target).values_list('pk', flat=True))
+        if model is not Task:
+            for pks in _chunks(sorted(kept - present), chunk_size):
+                copied += _upsert(
+                    model, list(model._base_manager.using(source).filter(
+                        pk__in=pks)), target)
+        for _ in delete_in_chunks(
+                model._base_manager.using(target).filter(
+                    pk__in=present - kept),
+                chunk_size):
+            pass
+    return copied
+
+
+def delete_board_rows(board_id, alias, chunk_size=500):
+    """Delete a board's tasks, comments and activity from one shard.
+
+    Deletes without signals, so the notifications of the tasks, which
+    moved along with their board, are kept.
+    """
+    from .jobs import delete_in_chunks
+    from .models import Comment, Task, TaskActivity
+
+    for queryset in (
+            Comment.objects.using(alias).filter(task__board_id=board_id),
+            TaskActivity.objects.using(alias).filter(board_id=board_id),
+            Task.objects.using(alias).filter(board_id=board_id)):
+        for _ in delete_in_chunks(queryset, chunk_size):
+            pass
+
+
+def move_board(board_id, target, chunk_size=500, log=None):
+    """Move a board's rows to the `target` shard while it stays readable.
+
+    Rows are first copied while the board is in use. The board is then
+    read-only while a second copy brings over the tasks written since the
+    first one started and the comments and activity added since; writes
+    in that window fail with `BoardMoving`. Afterwards the directory
+    points at `target` and the old copy is deleted. Each directory change
+    waits out `SHARDING['DIRECTORY_TIMEOUT']` so every process has seen
+    it; the second copy also looks that far back before the first one, for
+    writes still in flight and clocks slightly apart.
+    """
+    from .cache import invalidate_board_payloads
+
+    log = log or (lambda message: None)
+    source = shard_for_board(board_id)
+    wait = settings.SHARDING['DIRECTORY_TIMEOUT']
+    if source == target:
+        log(f"Board {board_id} already lives in {target}.")
+        return 0
+
+    since = timezone.now() - timedelta(seconds=wait)
+    copied = copy_board_rows(board_id, source, target, chunk_size)
+    log(f"Copied {copied} rows from {source} to {target}.")
+
+    set_placement(board_id, source, read_only=True)
+    time.sleep(wait)
+    copied = copy_board_rows(board_id, source, target, chunk_size, since)
+    set_placement(board_id, target)
+    log(f"Synced {copied} rows and switched board {board_id} to {target}.")
+
+    time.sleep(wait)
+    delete_board_rows(board_id, source, chunk_size)
+    invalidate_board_payloads([board_id])
+    log(f"Deleted the rows left in {source}.")
+    return copied
@@ -0,0 +1,204 @@
+"""Signal handlers for kanban_app.
+
+Keep denormalized data such as `Task.comment_count` and `BoardAccess` in
+sync with the rows they summarize and invalidate per-user caches when
+tasks or board memberships change. Handlers are connected in
+`KanbanAppConfig.ready`.
+
+Tasks and comments may live in a shard (see `kanban_app.sharding`), so
+handlers follow the `using` database of the signal and clean up rows
+that database cascades cannot reach.
+"""
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.caches import is_shared_cache
+from jobs_app.models import Job
+from jobs_app.queue import enqueue
+
+from .cache import (
+    invalidate_board_payloads,
+    invalidate_boards,
+    invalidate_users,
+)
+from .membership import sync_board_access
+from .ordering import needs_rebalance
+from .models import (
+    Board,
+    BoardAccess,
+    Comment,
+    Notification,
+    Task,
+    TaskActivity,
+)
+from .sharding import (
+    is_sharded,
+    place_board,
+    shard_aliases,
+    shard_for_board,
+)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, using, **kwargs):
+    """Increase the task's comment counter when a comment is created."""
+    if created:
+        Task.objects.using(using).filter(pk=instance.task_id).update(
+            comment_count=F('comment_count') + 1, updated_at=timezone.now())
+        invalidate_board_payloads([instance.task.board_id], using)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, using, **kwargs):
+    """Decrease the task's comment counter when a comment is deleted."""
+    Task.objects.using(using).filter(
+        pk=instance.task_id, comment_count__gt=0,
+    ).update(comment_count=F('comment_count') - 1, updated_at=timezone.now())
+    invalidate_board_payloads([instance.task.board_id], using)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_caches(sender, instance, using, **kwargs):
+    """Invalidate cached data of everyone with access to the task's board.
+
+    A task moved to another board invalidates its previous board as well.
+    Nothing is cached per user or board without a shared cache.
+    """
+    if not is_shared_cache():
+        return
+    board_ids = [instance.board_id]
+    moved = instance.get_changed_fields().get('board_id')
+    if moved:
+        board_ids.append(moved[0])
+    invalidate_boards(board_ids, using)
+
+
+@receiver(post_delete, sender=Task)
+def delete_task_notifications(sender, instance, **kwargs):
+    """Delete the notifications of a deleted task from 'default'."""
+    Notification.objects.filter(task_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Task)
+def reset_task_notifications(sender, instance, created, **kwargs):
+    """Forget a rescheduled task's notifications so it is notified again."""
+    if not created and 'due_date' in instance.get_changed_fields():
+        Notification.objects.filter(task_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Task)
+def schedule_column_rebalance(sender, instance, using, **kwargs):
+    """Queue a rebalance of the task's column once its key grew too long."""
+    if ('position' in instance.get_deferred_fields()
+            or not needs_rebalance(instance.position)):
+        return
+    payload = {'board_id': instance.board_id, 'status': instance.status}
+
+    def schedule():
+        pending = Job.objects.filter(
+            kind='kanban.rebalance_column', status='pending',
+            payload__board_id=payload['board_id'],
+            payload__status=payload['status'])
+        if not pending.exists():
+            enqueue('kanban.rebalance_column', payload)
+
+    transaction.on_commit(schedule, using=using)
+
+
+@receiver(post_save, sender=Board)
+def place_new_board(sender, instance, created, **kwargs):
+    """Choose the shard of a new board when board data is sharded."""
+    if created and is_sharded():
+        place_board(instance.pk)
+
+
+@receiver(pre_delete, sender=Board)
+def delete_sharded_tasks(sender, instance, **kwargs):
+    """Delete the tasks of a board whose shard the cascade cannot reach."""
+    using = shard_for_board(instance.pk)
+    if using != DEFAULT_DB_ALIAS:
+        Task.objects.using(using).filter(board_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=User)
+def clear_sharded_user_rows(sender, instance, **kwargs):
+    """Apply a user's delete cascades in shards other than 'default'."""
+    if not is_sharded():
+        return
+    for using in shard_aliases():
+        if using == DEFAULT_DB_ALIAS:
+            continue
+        Comment.objects.using(using).filter(author_id=instance.pk).delete()
+        Task.objects.using(using).filter(assignee_id=instance.pk).update(
+            assignee=None, updated_at=timezone.now())
+        Task.objects.using(using).filter(reviewer_id=instance.pk).update(
+            reviewer=None, updated_at=timezone.now())
+        TaskActivity.objects.using(using).filter(
+            actor_id=instance.pk).update(actor=None)
+
+
+@receiver(post_save, sender=Board)
+@receiver(pre_delete, sender=Board)
+def invalidate_board_caches(sender, instance, **kwargs):
+    """Invalidate cached data of the board's owner and members."""
+    invalidate_boards([instance.pk])
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def invalidate_member_caches(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Invalidate changed boards and the users added to or removed from them."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not is_shared_cache():
+        return
+    if reverse:
+        invalidate_users([instance.pk])
+        invalidate_board_payloads(
+            instance.boards.values_list('id', flat=True)
+            if action == 'pre_clear' else pk_set)
+        return
+    invalidate_board_payloads([instance.pk])
+    if action == 'pre_clear':
+        invalidate_users(instance.members.values_list('id', flat=True))
+    else:
+        invalidate_users(pk_set)
+
+
+@receiver(post_save, sender=Board)
+def sync_owner_access(sender, instance, **kwargs):
+    """Give the owner access and demote a previous owner."""
+    previous = BoardAccess.objects.filter(
+        board=instance, role='owner').values_list('user_id', flat=True)
+    sync_board_access(instance.pk, {instance.owner_id, *previous})
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def sync_member_access(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update `BoardAccess` for users added to or removed from boards."""
+    if action == 'pre_clear':
+        related = instance.boards if reverse else instance.members
+        instance._cleared_member_pks = set(
+            related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_member_pks', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        for board_id in pk_set:
+            sync_board_access(board_id, [instance.pk])
+    else:
+        sync_board_access(instance.pk, pk_set)
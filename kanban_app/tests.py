@@ -4,6 +4,365 @@ Place unit and integration tests for the kanban application here.
 Use Django's `TestCase` and tools from REST framework for API tests.
 """
 
-from django.test import TestCase
+import random
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.throttling import SharedTokenBuckets, client_address
+
+from .buffers import WriteBehindBuffer
+from .models import Board, Comment, Notification, Task
+from .notifications import scan_due_dates
+from .ordering import key_between, spread_keys
+from .sharding import (
+    BoardMoving, board_for_task, copy_board_rows, get_placement, move_board,
+    set_placement, shard_for_board, shard_for_task,
+)
+
+
+def create_task(board, **fields):
+    """Create a task of `board` in the board's shard."""
+    fields = {
+        'title': 'Task', 'status': 'to-do', 'priority': 'low',
+        'due_date': '2030-01-01', **fields,
+    }
+    return Task.objects.db_manager(shard_for_board(board.pk)).create(
+        board=board, **fields)
+
+
+def board_tasks(board):
+    """Return the tasks of `board` from the board's shard."""
+    return Task.objects.using(shard_for_board(board.pk)).filter(board=board)
+
+
+class KeyBetweenTests(SimpleTestCase):
+    """Fractional position keys stay ordered and short."""
+
+    def test_sequential_appends_stay_short(self):
+        keys = [key_between(None, None)]
+        for _ in range(999):
+            keys.append(key_between(keys[-1], None))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 1000)
+        self.assertLessEqual(max(map(len, keys)), 4)
+
+    def test_sequential_prepends_stay_short(self):
+        keys = [key_between(None, None)]
+        for _ in range(999):
+            keys.insert(0, key_between(None, keys[0]))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 1000)
+        self.assertLessEqual(max(map(len, keys)), 4)
+
+    def test_random_inserts_keep_order(self):
+        generator = random.Random(42)
+        keys = spread_keys(10)
+        for _ in range(1000):
+            index = generator.randint(0, len(keys))
+            before = keys[index - 1] if index else None
+            after = keys[index] if index < len(keys) else None
+            keys.insert(index, key_between(before, after))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_spread_keys_are_ordered_and_equally_long(self):
+        keys = spread_keys(100)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(map(len, keys))), 1)
+
+    def test_rejects_unordered_bounds(self):
+        with self.assertRaises(ValueError):
+            key_between('i5', 'i5')
+
+
+class DueDateScanTests(TestCase):
+    """Due-date scans only notify about newly due tasks."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user('owner', 'owner@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+
+    def create_task(self, days):
+        return create_task(
+            self.board, title=f'Due in {days}', assignee=self.user,
+            due_date=self.today + timedelta(days=days))
+
+    def test_runs_are_incremental(self):
+        self.create_task(-30)
+        self.create_task(1)
+        self.assertEqual(
+            scan_due_dates(self.today), {'overdue': 1, 'due-soon': 1})
+        self.assertEqual(
+            scan_due_dates(self.today), {'overdue': 0, 'due-soon': 0})
+        self.create_task(-3)
+        self.create_task(20)
+        self.assertEqual(
+            scan_due_dates(self.today), {'overdue': 1, 'due-soon': 0})
+
+    def test_rescheduled_task_is_notified_again(self):
+        task = self.create_task(1)
+        scan_due_dates(self.today)
+        task.due_date = self.today + timedelta(days=10)
+        task.save()
+        self.assertFalse(Notification.objects.filter(task=task).exists())
+        self.assertEqual(
+            scan_due_dates(self.today), {'overdue': 0, 'due-soon': 0})
+        task.due_date = self.today + timedelta(days=2)
+        task.save()
+        self.assertEqual(
+            scan_due_dates(self.today), {'overdue': 0, 'due-soon': 1})
+
+
+class FailingBuffer(WriteBehindBuffer):
+    """Buffer whose writes always fail."""
+
+    def write(self, items):
+        raise ValueError("bad item")
+
+
+class WriteBehindBufferTests(SimpleTestCase):
+    """Failed writes are retried a limited number of times."""
+
+    def test_drops_items_after_max_attempts(self):
+        buffer = FailingBuffer(100, 60, max_attempts=3)
+        buffer.add(['poison'])
+        with self.assertLogs('kanban_app.buffers', 'ERROR') as logs:
+            for _ in range(3):
+                buffer.flush()
+        self.assertEqual(buffer._items, [])
+        self.assertIn('Dropped 1 buffered items', logs.output[-1])
+
+
+class SharedTokenBucketsTests(SimpleTestCase):
+    """Token buckets allow a burst, then refill at their rate."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.buckets = SharedTokenBuckets(
+            Path(directory.name) / 'throttle.bin', slots=64)
+
+    def test_allows_burst_then_rejects(self):
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            decisions = [
+                self.buckets.take('user-1', 1.0, 3, 'board-detail')[0]
+                for _ in range(4)
+            ]
+            allowed, retry_after = self.buckets.take(
+                'user-1', 1.0, 3, 'board-detail')
+        self.assertEqual(decisions, [True, True, True, False])
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1.0)
+        with mock.patch('core.throttling.time.time', return_value=1001.0):
+            self.assertTrue(self.buckets.take('user-1', 1.0, 3)[0])
+
+    def test_keys_have_separate_buckets(self):
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            self.buckets.take('user-1', 1.0, 1)
+            self.assertFalse(self.buckets.take('user-1', 1.0, 1)[0])
+            self.assertTrue(self.buckets.take('user-2', 1.0, 1)[0])
+
+    def test_stats_sum_decisions(self):
+        with mock.patch('core.throttling.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.buckets.take('user-1', 1.0, 2, 'board-detail')
+        stats = self.buckets.stats()
+        self.assertEqual((stats['allowed'], stats['rejected']), (2, 1))
+        self.assertEqual(list(stats['endpoints'].values()), [1])
+
+
+class ClientAddressTests(SimpleTestCase):
+    """Client addresses honour the trusted proxies only."""
+
+    def request(self, forwarded):
+        return RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded)
+
+    def test_ignores_forwarded_header_by_default(self):
+        self.assertEqual(
+            client_address(self.request('203.0.113.7')), 'addr-10.0.0.1')
+
+    def test_takes_address_appended_by_trusted_proxy(self):
+        throttle = {
+            'FORWARDED_HEADER': 'HTTP_X_FORWARDED_FOR', 'TRUSTED_PROXIES': 1}
+        with override_settings(THROTTLE=throttle):
+            self.assertEqual(
+                client_address(self.request('1.2.3.4, 203.0.113.7')),
+                'addr-203.0.113.7')
+
+
+class BatchTests(APITestCase):
+    """Batches apply all operations or none, and replay stored keys."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.client.force_authenticate(self.user)
+
+    def create(self, key, board, title='Task'):
+        return {
+            'op': 'task.create', 'key': key, 'data': {
+                'board': board, 'title': title, 'status': 'to-do',
+                'priority': 'low', 'due_date': '2030-01-01'},
+        }
+
+    def test_accepts_board_ids_as_strings(self):
+        response = self.client.post('/api/batch/', {'operations': [
+            self.create('a', str(self.board.pk))]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(board_tasks(self.board).count(), 1)
+
+    def test_failed_operation_rolls_back_batch(self):
+        response = self.client.post('/api/batch/', {'operations': [
+            self.create('a', self.board.pk),
+            {'op': 'task.delete', 'key': 'b', 'id': 999999},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 404, response.data)
+        self.assertEqual(response.data['key'], 'b')
+        self.assertFalse(board_tasks(self.board).exists())
+
+    def test_replays_applied_keys(self):
+        batch = {'operations': [self.create('a', self.board.pk)]}
+        first = self.client.post('/api/batch/', batch, format='json')
+        second = self.client.post('/api/batch/', batch, format='json')
+        self.assertEqual(board_tasks(self.board).count(), 1)
+        self.assertFalse(first.data['results'][0]['replayed'])
+        self.assertTrue(second.data['results'][0]['replayed'])
+        self.assertEqual(
+            second.data['results'][0]['data'],
+            first.data['results'][0]['data'])
+
+
+class TaskVersionTests(APITestCase):
+    """Task updates based on a stale version answer 409."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.task = create_task(self.board)
+        self.url = f'/api/tasks/{self.task.pk}/'
+        self.client.force_authenticate(self.user)
+
+    def test_update_sends_new_version_as_etag(self):
+        response = self.client.patch(
+            self.url, {'title': 'New'}, format='json',
+            HTTP_IF_MATCH=f'"{self.task.version}"')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response['ETag'], f'"{self.task.version + 1}"')
+
+    def test_stale_if_match_conflicts(self):
+        self.client.patch(self.url, {'title': 'First'}, format='json')
+        response = self.client.patch(
+            self.url, {'title': 'Second'}, format='json',
+            HTTP_IF_MATCH=f'"{self.task.version}"')
+        self.assertEqual(response.status_code, 409, response.data)
+        self.assertEqual(response.data['current']['title'], 'First')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'First')
+
+    def test_stale_body_version_conflicts(self):
+        self.client.patch(self.url, {'title': 'First'}, format='json')
+        response = self.client.patch(
+            self.url, {'title': 'Second', 'version': self.task.version},
+            format='json')
+        self.assertEqual(response.status_code, 409, response.data)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'First')
+
+
+@override_settings(KANBAN_SHARDS=['default'])
+class UnshardedRoutingTests(TestCase):
+    """Without sharding, tasks are found in 'default' from their rows."""
+
+    def setUp(self):
+        user = User.objects.create_user('owner', 'owner@example.com')
+        self.board = Board.objects.create(title='Board', owner=user)
+        self.task = create_task(self.board)
+
+    def test_board_for_task_reads_task_row(self):
+        self.assertEqual(board_for_task(self.task.pk), self.board.pk)
+        self.assertIsNone(board_for_task(self.task.pk + 1))
+
+    def test_everything_lives_in_default(self):
+        self.assertEqual(shard_for_board(self.board.pk), 'default')
+        self.assertEqual(shard_for_task(self.task.pk), 'default')
+
+
+@skipUnless(len(settings.KANBAN_SHARDS) > 1,
+            'run with KANBAN_SHARD_DATABASES=2')
+@override_settings(SHARDING={'DIRECTORY_TIMEOUT': 0, 'TASK_BOARD_TIMEOUT': 60})
+class ShardMoveTests(TestCase):
+    """Boards are routed to their shard and move between shards."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.source = shard_for_board(self.board.pk)
+        self.target = next(
+            alias for alias in settings.KANBAN_SHARDS
+            if alias != self.source)
+        self.tasks = [
+            create_task(self.board, title=f'Task {index}')
+            for index in range(3)
+        ]
+        self.comment = Comment.objects.db_manager(self.source).create(
+            task=self.tasks[0], author=self.user, content='Hello')
+
+    def tasks_in(self, alias):
+        return Task._base_manager.using(alias).filter(board=self.board)
+
+    def test_rows_are_written_to_board_shard(self):
+        self.assertEqual(self.tasks_in(self.source).count(), 3)
+        self.assertFalse(self.tasks_in(self.target).exists())
+        self.assertEqual(shard_for_task(self.tasks[0].pk), self.source)
+        self.assertEqual(board_for_task(self.tasks[0].pk), self.board.pk)
+
+    def test_second_copy_takes_only_tasks_written_since(self):
+        copy_board_rows(self.board.pk, self.source, self.target)
+        since = timezone.now()
+        edited, untouched = self.tasks[0], self.tasks[1]
+        edited.title = 'Edited'
+        edited.save()
+        # Written without `updated_at`, so an incremental copy skips it.
+        self.tasks_in(self.source).filter(pk=untouched.pk).update(
+            title='Skipped')
+        Comment.objects.using(self.source).filter(
+            pk=self.comment.pk).delete()
+
+        copy_board_rows(self.board.pk, self.source, self.target, since=since)
+        titles = dict(self.tasks_in(self.target).values_list('pk', 'title'))
+        self.assertEqual(titles[edited.pk], 'Edited')
+        self.assertEqual(titles[untouched.pk], 'Task 1')
+        self.assertFalse(
+            Comment.objects.using(self.target).filter(
+                pk=self.comment.pk).exists())
+
+    def test_move_switches_board_to_target(self):
+        move_board(self.board.pk, self.target)
+        self.assertEqual(get_placement(self.board.pk), (self.target, False))
+        self.assertFalse(self.tasks_in(self.source).exists())
+        self.assertEqual(self.tasks_in(self.target).count(), 3)
+        self.assertTrue(
+            Comment.objects.using(self.target).filter(
+                pk=self.comment.pk).exists())
+        self.assertEqual(shard_for_task(self.tasks[0].pk), self.target)
+
+    def test_read_only_board_refuses_writes(self):
+        set_placement(self.board.pk, self.source, read_only=True)
+        self.assertEqual(shard_for_board(self.board.pk), self.source)
+        with self.assertRaises(BoardMoving):
+            shard_for_board(self.board.pk, for_write=True)
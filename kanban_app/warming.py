@@ -0,0 +1,90 @@
+"""Cache warming for the most read boards.
+
+After a deploy or restart the first reads of busy boards would find cold
+caches. `warm_caches` ranks boards by their recorded reads (`BoardHit`)
+and preloads, for each of the top boards, the full board detail payload,
+the cached roles of its owner and members and their authenticated
+tokens. Boards are warmed by a bounded pool of threads.
+
+These caches are only used with a cache shared by all processes (see
+`core.caches`), so warming refuses to run without one. It runs at startup
+from the preloading entry points when `CACHE_WARMING['ON_STARTUP']` is
+set, or from `manage.py warm_caches` after a deploy.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.caches import is_shared_cache
+from user_auth_app.authentication import cache_tokens
+
+from .api.mixins import prune_board_queryset
+from .api.serializers import BoardDetailSerializer
+from .cache import board_cache_key
+from .hits import hot_boards
+from .membership import role_cache_key
+from .models import Board, BoardAccess, BoardHit
+
+
+def warm_board(board_id):
+    """Preload one board's payload, roles and tokens; return success."""
+    try:
+        board = prune_board_queryset(
+            Board.objects.filter(pk=board_id, is_deleting=False), {}, None,
+        ).first()
+        if board is None:
+            return False
+        cache.set(
+            board_cache_key('board-detail', board_id),
+            BoardDetailSerializer(board).data,
+            settings.BOARD_DETAIL_CACHE_TIMEOUT)
+
+        roles = dict(BoardAccess.objects.filter(
+            board_id=board_id).values_list('user_id', 'role'))
+        cache.set_many({
+            role_cache_key(user_id, board_id): role
+            for user_id, role in roles.items()
+        })
+        cache_tokens(Token.objects.filter(
+            user_id__in=roles).select_related('user'))
+        return True
+    finally:
+        # Runs in a pool thread whose connection nobody else closes.
+        connections.close_all()
+
+
+def warm_caches(boards=None, days=None, concurrency=None):
+    """Warm the most read boards and report time and coverage."""
+    if not is_shared_cache():
+        raise ImproperlyConfigured(
+            "Cache warming needs a cache shared by all processes; set "
+            "KANBAN_CACHE_URL or KANBAN_CACHE_DIR.")
+    config = settings.CACHE_WARMING
+    boards = boards or config['BOARDS']
+    days = days or config['DAYS']
+    concurrency = concurrency or config['CONCURRENCY']
+    start = time.perf_counter()
+
+    hot = hot_boards(boards, days)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        warmed = list(pool.map(warm_board, [board_id for board_id, _ in hot]))
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    total_hits = BoardHit.objects.filter(day__gte=since).aggregate(
+        total=Sum('hits'))['total'] or 0
+    warmed_hits = sum(hits for (_, hits), ok in zip(hot, warmed) if ok)
+    return {
+        'boards': sum(warmed),
+        'candidates': len(hot),
+        'hit_coverage': warmed_hits / total_hits if total_hits else 0.0,
+        'seconds': time.perf_counter() - start,
+    }
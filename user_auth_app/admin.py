@@ -1,9 +1,44 @@
 """Admin configuration for user_auth_app.
 
 Register authentication-related models here to manage them via the
-Django admin interface. Customize admin forms and displays as needed.
+Django admin interface. Refresh tokens grow with every login, so their
+changelist uses estimated counts and revokes tokens in one statement.
 """
 
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from core.paginator import EstimatedCountPaginator
+
+from .models import RefreshToken, UserProfile
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    """Profiles with their user."""
+    list_display = ('id', 'fullname', 'email')
+    list_select_related = ('fullname',)
+    autocomplete_fields = ('fullname',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(RefreshToken)
+class RefreshTokenAdmin(admin.ModelAdmin):
+    """Refresh tokens with their user, revocable in bulk."""
+    list_display = ('id', 'user', 'created_at', 'expires_at', 'revoked_at')
+    list_select_related = ('user',)
+    list_filter = ('expires_at',)
+    autocomplete_fields = ('user',)
+    readonly_fields = ('key_hash', 'created_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('revoke',)
+
+    @admin.action(description="Revoke selected refresh tokens",
+                  permissions=['change'])
+    def revoke(self, request, queryset):
+        """Revoke the selected tokens that are still valid."""
+        revoked = queryset.filter(revoked_at=None).update(
+            revoked_at=timezone.now())
+        self.message_user(request, f"Revoked {revoked} refresh tokens.")
@@ -7,8 +7,8 @@ represented shape expected by clients.
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from ..tokens import issue_tokens
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -16,19 +16,18 @@ class RegistrationSerializer(serializers.ModelSerializer):
     fullname = serializers.CharField(
         source='first_name')
     repeated_password = serializers.CharField(write_only=True)
-    token = serializers.SerializerMethodField()
     user_id = serializers.IntegerField(source='id', read_only=True)
 
     class Meta:
         model = User
         fields = ['user_id', 'fullname', 'email',
-                  'password', 'repeated_password', 'token']
+                  'password', 'repeated_password']
         extra_kwargs = {'password': {'write_only': True}}
 
-    def get_token(self, obj):
-        """Return or create an authentication token for the user."""
-        token, _ = Token.objects.get_or_create(user=obj)
-        return token.key
+    def to_representation(self, instance):
+        """Add the user's authentication token(s) to the response."""
+        data = super().to_representation(instance)
+        return {**data, **issue_tokens(instance)}
 
     def validate(self, data):
         """Validate passwords match and that the email is unique."""
@@ -70,3 +69,8 @@ class LoginSerializer(serializers.Serializer):
 
         data['user'] = user
         return data
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Serializer for the refresh token exchanged for new tokens."""
+    refresh = serializers.CharField()
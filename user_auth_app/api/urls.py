@@ -1,15 +1,21 @@
 """URL routes for user authentication API.
 
-Defines registration, login and logout endpoints and is intended to be
+Defines registration, login, token refresh and logout endpoints and is intended to be
 included under the project's `api/` prefix.
 """
 
 from django.urls import path
 
-from user_auth_app.api.views import RegistrationView, LoginView, LogoutView
+from user_auth_app.api.views import (
+    LoginView,
+    LogoutView,
+    RegistrationView,
+    TokenRefreshView,
+)
 
 urlpatterns = [
     path('registration/', RegistrationView.as_view(), name='registration'),
     path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
 ]
\ No newline at end of file
@@ -2,7 +2,8 @@
 
 Provides registration, login and logout endpoints used by the front-end
 clients. Uses token-based authentication provided by
-`rest_framework.authtoken`.
+`rest_framework.authtoken`, or signed access and refresh tokens (see
+`user_auth_app.tokens`) when `AUTH_TOKENS['SIGNED']` is enabled.
 """
 
 from rest_framework import generics
@@ -13,8 +14,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from .serializers import LoginSerializer
+from .serializers import LoginSerializer, TokenRefreshSerializer
 from rest_framework.permissions import IsAuthenticated
+from ..tokens import (
+    AccessToken,
+    deny_access_token,
+    issue_tokens,
+    revoke_refresh_tokens,
+    rotate_refresh_token,
+)
 
 
 class RegistrationView(generics.CreateAPIView):
@@ -33,10 +41,9 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            token, _ = Token.objects.get_or_create(user=user)
 
             return Response({
-                "token": token.key,
+                **issue_tokens(user),
                 "fullname": user.first_name,
                 "email": user.email,
                 "user_id": user.id
@@ -45,12 +52,42 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRefreshView(APIView):
+    """Exchange a refresh token for a new access and refresh token."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        """Rotate the refresh token or reject an invalid one."""
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rotated = rotate_refresh_token(serializer.validated_data['refresh'])
+        if rotated is None:
+            return Response(
+                {"error": "Refresh token is invalid or expired"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        _, tokens = rotated
+        return Response(tokens, status=status.HTTP_200_OK)
+
+
 class LogoutView(APIView):
     """Invalidate the requesting user's authentication token."""
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        """Delete the user's token or return a not-found error."""
+        """Delete the user's token or return a not-found error.
+
+        A signed access token is denied until it expires and the user's
+        refresh tokens are revoked.
+        """
+        if isinstance(request.auth, AccessToken):
+            deny_access_token(request.auth)
+            revoke_refresh_tokens(request.user)
+            return Response(
+                {"message": "Successfully logged out"},
+                status=status.HTTP_200_OK
+            )
         try:
             token = Token.objects.get(user=request.user)
             token.delete()
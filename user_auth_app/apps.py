@@ -10,3 +10,7 @@ from django.apps import AppConfig
 class UserAuthAppConfig(AppConfig):
     """Django AppConfig for the user authentication application."""
     name = "user_auth_app"
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,82 @@
+"""Token authentication backed by the cache.
+
+REST framework's `TokenAuthentication` loads the token and its user from
+the database on every request. `CachedTokenAuthentication` keeps the pair
+in the cache for `TOKEN_CACHE_TIMEOUT` seconds under a hash of the token.
+Deleting a token or saving its user drops the cached pair (see
+`user_auth_app.signals`). Tokens are only cached when the cache is shared
+by all processes (see `core.caches`), so that logging out on one worker
+reaches the others.
+
+`SignedTokenAuthentication` accepts the signed access tokens of
+`user_auth_app.tokens` under the same `Token` keyword and verifies them
+without a database query.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.caches import is_shared_cache
+
+from .tokens import TokenExpired, is_denied, read_access_token
+
+
+def token_cache_key(key):
+    """Return the cache key of a token without exposing the token."""
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_tokens(tokens):
+    """Cache tokens together with their (already loaded) users."""
+    if not is_shared_cache():
+        return
+    cache.set_many({
+        token_cache_key(token.key): (token.user, token) for token in tokens
+        if token.user.is_active
+    }, settings.TOKEN_CACHE_TIMEOUT)
+
+
+def forget_tokens(keys):
+    """Drop the cached users of the given token keys."""
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication` that serves repeated tokens from the cache."""
+
+    def authenticate_credentials(self, key):
+        """Return the cached `(user, token)` pair or load and cache it."""
+        if not is_shared_cache():
+            return super().authenticate_credentials(key)
+        cached = cache.get(token_cache_key(key))
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        cache_tokens([token])
+        return user, token
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Authenticate signed access tokens from their claims alone.
+
+    Keys without a signature are left to the next authentication class.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the `(user, access_token)` pair of a valid signed token."""
+        if ':' not in key:
+            return None
+        try:
+            token = read_access_token(key)
+        except TokenExpired:
+            raise AuthenticationFailed("Token has expired.")
+        except signing.BadSignature:
+            raise AuthenticationFailed("Invalid token.")
+        if is_denied(token):
+            raise AuthenticationFailed("Token has been revoked.")
+        return token.user, token
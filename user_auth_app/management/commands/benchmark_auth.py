@@ -0,0 +1,73 @@
+"""Management command measuring the authentication overhead per request.
+
+Authenticates the same request repeatedly with REST framework's
+`TokenAuthentication`, the cached variant used by default and the signed
+access tokens, and reports the time and database queries per request.
+The benchmark user and its tokens are created in a transaction that is
+rolled back afterwards.
+"""
+
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from user_auth_app.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+    forget_tokens,
+)
+from user_auth_app.tokens import issue_access_token
+
+
+class Command(BaseCommand):
+    """Compare token, cached token and signed token authentication."""
+    help = "Measure the authentication time and queries per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help="Number of authentications per scheme.")
+
+    def handle(self, *args, **options):
+        """Authenticate with every scheme and report the averages."""
+        with transaction.atomic():
+            email = f'benchmark-{uuid.uuid4().hex}@example.invalid'
+            user = User.objects.create_user(
+                username=email, email=email, first_name='Benchmark')
+            token = Token.objects.create(user=user)
+            schemes = [
+                ('TokenAuthentication', TokenAuthentication(), token.key),
+                ('CachedTokenAuthentication', CachedTokenAuthentication(),
+                 token.key),
+                ('SignedTokenAuthentication', SignedTokenAuthentication(),
+                 issue_access_token(user)),
+            ]
+            for name, authenticator, key in schemes:
+                self.report(name, *self.measure(
+                    authenticator, key, options['requests']))
+            forget_tokens([token.key])
+            transaction.set_rollback(True)
+
+    def measure(self, authenticator, key, requests):
+        """Return the microseconds and queries per authentication."""
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {key}')
+        authenticator.authenticate(request)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        return elapsed / requests * 1e6, len(queries) / requests
+
+    def report(self, name, micros, queries):
+        """Write one result line."""
+        self.stdout.write(
+            f"{name:<27} {micros:8.1f} µs/request {queries:5.2f} queries")
@@ -0,0 +1,36 @@
+"""Management command to delete expired refresh tokens.
+
+Refresh tokens, revoked or not, are useless once they have expired.
+Deleting them in batches keeps the table at the size of the currently
+valid sessions.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user_auth_app.models import RefreshToken
+
+
+class Command(BaseCommand):
+    """Delete refresh tokens whose lifetime is over."""
+    help = "Delete expired refresh tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of tokens deleted per statement.")
+
+    def handle(self, *args, **options):
+        """Delete expired tokens batch by batch and report the total."""
+        expired = RefreshToken.objects.filter(expires_at__lte=timezone.now())
+
+        deleted = 0
+        while True:
+            ids = list(expired.values_list(
+                'id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += RefreshToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} refresh tokens."))
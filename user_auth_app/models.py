@@ -3,6 +3,8 @@
 Contains a `UserProfile` model that can be used to extend or wrap the
 built-in Django `User` model. The project primarily uses the auth
 system via `django.contrib.auth` and token authentication.
+`RefreshToken` backs the optional signed access tokens (see
+`user_auth_app.tokens`).
 """
 
 from django.db import models
@@ -19,3 +21,25 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return self.fullname.username
+
+
+class RefreshToken(models.Model):
+    """A long-lived token exchanged for new signed access tokens.
+
+    Only a SHA-256 hash of the token is stored. Revoked tokens are kept
+    until they expire; `manage.py prune_refresh_tokens` deletes them.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='refresh_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"Refresh token of {self.user}"
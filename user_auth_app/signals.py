@@ -0,0 +1,36 @@
+"""Signal handlers for user_auth_app.
+
+Drop cached token authentications when a token is deleted on logout or
+when its user changes, and revoke the refresh tokens of deactivated
+users. Handlers are connected in
+`UserAuthAppConfig.ready`.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+from .tokens import revoke_refresh_tokens
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the cache."""
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached copy of a changed user."""
+    if not created:
+        forget_tokens(Token.objects.filter(
+            user=instance).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=User)
+def revoke_inactive_user_tokens(sender, instance, created, **kwargs):
+    """Stop refreshing the access tokens of a deactivated user."""
+    if not created and not instance.is_active:
+        revoke_refresh_tokens(instance)
@@ -0,0 +1,152 @@
+"""Signed access tokens and database-backed refresh tokens.
+
+With `AUTH_TOKENS['SIGNED']` enabled, login returns a short-lived access
+token instead of a `rest_framework.authtoken` key. The token carries the
+user's id, email, name and expiry, signed with HMAC-SHA256 under the
+`SECRET_KEY`, so it is verified without a database query (see
+`SignedTokenAuthentication`). A long-lived refresh token, stored only as
+a hash, is exchanged for a new pair; revoked refresh tokens stay in the
+table as revocation list until they would have expired anyway.
+
+Logging out revokes the user's refresh tokens and puts the access token's
+id on a denylist in the cache until the token expires. Only a cache shared
+by all processes (see `core.caches`) carries the denylist to every
+worker; with a per-process cache, keep `ACCESS_LIFETIME` short.
+"""
+
+import hashlib
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .models import RefreshToken
+
+ACCESS_TOKEN_SALT = 'user_auth_app.access'
+
+
+class TokenExpired(signing.BadSignature):
+    """The signature of an access token is valid but it has expired."""
+
+
+@dataclass(frozen=True)
+class AccessToken:
+    """The verified claims of a signed access token."""
+    user_id: int
+    email: str
+    fullname: str
+    jti: str
+    expires: int
+
+    @property
+    def user(self):
+        """Return the `User` of the claims, built without a query."""
+        user = User(
+            id=self.user_id, username=self.email, email=self.email,
+            first_name=self.fullname, is_active=True)
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        return user
+
+
+def issue_access_token(user):
+    """Return a signed access token for the user."""
+    return signing.Signer(salt=ACCESS_TOKEN_SALT).sign_object({
+        'u': user.pk,
+        'm': user.email,
+        'n': user.first_name,
+        'j': secrets.token_urlsafe(8),
+        'e': int(time.time()) + settings.AUTH_TOKENS['ACCESS_LIFETIME'],
+    })
+
+
+def read_access_token(key):
+    """Verify an access token and return its claims.
+
+    Raises `signing.BadSignature` for tampered tokens and `TokenExpired`
+    once the token's lifetime is over.
+    """
+    claims = signing.Signer(salt=ACCESS_TOKEN_SALT).unsign_object(key)
+    if claims['e'] <= time.time():
+        raise TokenExpired("Access token expired.")
+    return AccessToken(
+        user_id=claims['u'], email=claims['m'], fullname=claims['n'],
+        jti=claims['j'], expires=claims['e'])
+
+
+def denylist_key(jti):
+    """Return the cache key marking an access token as logged out."""
+    return 'auth:deny:' + jti
+
+
+def deny_access_token(token):
+    """Reject the access token until it expires."""
+    cache.set(denylist_key(token.jti), True,
+              max(1, token.expires - int(time.time())))
+
+
+def is_denied(token):
+    """Return whether the access token has been logged out."""
+    return cache.get(denylist_key(token.jti)) is not None
+
+
+def refresh_token_hash(key):
+    """Return the stored hash of a refresh token."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_refresh_token(user):
+    """Store a new refresh token for the user and return its key."""
+    key = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user, key_hash=refresh_token_hash(key),
+        expires_at=timezone.now() + timedelta(
+            seconds=settings.AUTH_TOKENS['REFRESH_LIFETIME']))
+    return key
+
+
+def issue_tokens(user):
+    """Return the token fields of a login or registration response."""
+    if not settings.AUTH_TOKENS['SIGNED']:
+        token, _ = Token.objects.get_or_create(user=user)
+        return {'token': token.key}
+    return {
+        'token': issue_access_token(user),
+        'refresh': issue_refresh_token(user),
+        'expires_in': settings.AUTH_TOKENS['ACCESS_LIFETIME'],
+    }
+
+
+def rotate_refresh_token(key):
+    """Revoke a valid refresh token and return its user and new tokens.
+
+    Returns None for unknown, expired or revoked tokens and for inactive
+    users. The token is revoked with a conditional UPDATE, so concurrent
+    refreshes with the same token succeed only once.
+    """
+    now = timezone.now()
+    refresh = RefreshToken.objects.select_related('user').filter(
+        key_hash=refresh_token_hash(key), revoked_at=None,
+        expires_at__gt=now).first()
+    if refresh is None or not refresh.user.is_active:
+        return None
+    with transaction.atomic():
+        revoked = RefreshToken.objects.filter(
+            pk=refresh.pk, revoked_at=None).update(revoked_at=now)
+        if not revoked:
+            return None
+        return refresh.user, issue_tokens(refresh.user)
+
+
+def revoke_refresh_tokens(user):
+    """Revoke all refresh tokens of the user."""
+    RefreshToken.objects.filter(user=user, revoked_at=None).update(
+        revoked_at=timezone.now())
@@ -0,0 +1,57 @@
+"""Admin registration for webhooks_app models.
+
+Webhooks are edited like any model. The outbox and the dead letters grow
+with traffic, so their changelists use estimated counts; dead letters
+can be queued for delivery again in bulk.
+"""
+
+from django.contrib import admin
+
+from core.paginator import EstimatedCountPaginator
+
+from .delivery import redeliver
+from .models import Webhook, WebhookDeadLetter, WebhookEvent
+
+
+@admin.register(Webhook)
+class WebhookAdmin(admin.ModelAdmin):
+    """Webhooks with their board."""
+    list_display = ('id', 'url', 'board', 'is_active', 'created_at')
+    list_select_related = ('board',)
+    list_filter = ('is_active',)
+    search_fields = ('url',)
+    autocomplete_fields = ('board', 'created_by')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Events waiting in the outbox, oldest first."""
+    list_display = (
+        'id', 'type', 'subject', 'webhook', 'status', 'attempts',
+        'changes', 'occurred_at', 'deliver_after')
+    list_filter = ('status', 'type')
+    ordering = ('id',)
+    raw_id_fields = ('webhook',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(WebhookDeadLetter)
+class WebhookDeadLetterAdmin(admin.ModelAdmin):
+    """Events given up on, most recent first, to inspect or redeliver."""
+    list_display = (
+        'id', 'type', 'subject', 'webhook', 'attempts', 'error', 'failed_at')
+    list_filter = ('type',)
+    ordering = ('-id',)
+    raw_id_fields = ('webhook',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('redeliver',)
+
+    @admin.action(description="Deliver selected events again",
+                  permissions=['change'])
+    def redeliver(self, request, queryset):
+        """Move the selected dead letters back to the outbox."""
+        self.message_user(
+            request, f"Queued {redeliver(queryset)} events for delivery.")
@@ -0,0 +1,11 @@
+"""Pagination classes for webhooks_app API."""
+
+from rest_framework.pagination import CursorPagination
+
+
+class DeadLetterCursorPagination(CursorPagination):
+    """Most recently failed first keyset pages over dead letters."""
+    ordering = ('-failed_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
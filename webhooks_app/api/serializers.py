@@ -0,0 +1,69 @@
+"""Serializers for webhooks_app API.
+
+Webhooks are managed by the owners of their boards. The signing secret
+is only returned when a webhook is created.
+"""
+
+from rest_framework import serializers
+
+from kanban_app.membership import has_board_access
+from kanban_app.models import Board
+
+from ..models import EVENT_TYPES, Webhook, WebhookDeadLetter
+
+
+class WebhookSerializer(serializers.ModelSerializer):
+    """A board's webhook; `events` empty subscribes to every type."""
+    board = serializers.PrimaryKeyRelatedField(
+        queryset=Board.objects.filter(is_deleting=False))
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=EVENT_TYPES), required=False)
+
+    class Meta:
+        model = Webhook
+        fields = [
+            'id', 'board', 'url', 'events', 'is_active', 'secret',
+            'created_at',
+        ]
+        read_only_fields = ['secret', 'created_at']
+
+    def validate_board(self, board):
+        """Only let the board's owner add webhooks; keep their board."""
+        if self.instance is not None and board.pk != self.instance.board_id:
+            raise serializers.ValidationError(
+                "The board of a webhook cannot be changed.")
+        if not has_board_access(
+                self.context['request'].user, board.pk, role='owner'):
+            raise serializers.ValidationError(
+                "Only the board's owner can add webhooks.")
+        return board
+
+    def validate_events(self, events):
+        """Drop duplicate event types."""
+        return list(dict.fromkeys(events))
+
+    def to_representation(self, instance):
+        """Leave the secret out except in the response to creating it."""
+        data = super().to_representation(instance)
+        if not self.context.get('include_secret'):
+            data.pop('secret')
+        return data
+
+
+class WebhookDeadLetterSerializer(serializers.ModelSerializer):
+    """An event whose delivery was given up on."""
+    data = serializers.JSONField(source='payload')
+
+    class Meta:
+        model = WebhookDeadLetter
+        fields = [
+            'id', 'type', 'subject', 'changes', 'attempts', 'error',
+            'occurred_at', 'failed_at', 'data',
+        ]
+        read_only_fields = fields
+
+
+class RedeliverSerializer(serializers.Serializer):
+    """Dead letters to queue again; all of the webhook's by default."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False)
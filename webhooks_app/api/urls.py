@@ -0,0 +1,23 @@
+"""URL routes for the webhooks_app REST API.
+
+Included into the project's URL configuration under the `api/` path.
+"""
+
+from django.urls import path
+
+from webhooks_app.api.views import (
+    WebhookDeadLetterView,
+    WebhookDetailView,
+    WebhookListCreateView,
+    WebhookRedeliverView,
+)
+
+urlpatterns = [
+    path('webhooks/', WebhookListCreateView.as_view(), name='webhook-list'),
+    path('webhooks/<int:pk>/', WebhookDetailView.as_view(),
+         name='webhook-detail'),
+    path('webhooks/<int:pk>/dead-letters/', WebhookDeadLetterView.as_view(),
+         name='webhook-dead-letters'),
+    path('webhooks/<int:pk>/dead-letters/redeliver/',
+         WebhookRedeliverView.as_view(), name='webhook-redeliver'),
+]
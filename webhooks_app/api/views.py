@@ -0,0 +1,87 @@
+"""API views for webhooks_app.
+
+Board owners register webhooks for their boards, inspect the events
+whose delivery failed for good and queue them again.
+"""
+
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..delivery import redeliver
+from ..models import Webhook, WebhookDeadLetter
+from .pagination import DeadLetterCursorPagination
+from .serializers import (
+    RedeliverSerializer,
+    WebhookDeadLetterSerializer,
+    WebhookSerializer,
+)
+
+
+def owned_webhooks(user):
+    """Return the webhooks of the boards `user` owns."""
+    return Webhook.objects.filter(
+        board__access__user=user, board__access__role='owner',
+        board__is_deleting=False)
+
+
+class WebhookListCreateView(generics.ListCreateAPIView):
+    """List the webhooks of the user's boards or add one."""
+    serializer_class = WebhookSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Return the webhooks of boards the user owns, oldest first."""
+        return owned_webhooks(self.request.user).order_by('id')
+
+    def get_serializer_context(self):
+        """Return the new webhook's secret to its creator."""
+        context = super().get_serializer_context()
+        context['include_secret'] = self.request.method == 'POST'
+        return context
+
+    def perform_create(self, serializer):
+        """Record who created the webhook."""
+        serializer.save(created_by=self.request.user)
+
+
+class WebhookDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve, change, pause (`is_active`) or delete a webhook."""
+    serializer_class = WebhookSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Return the webhooks of boards the user owns."""
+        return owned_webhooks(self.request.user)
+
+
+class WebhookDeadLetterView(generics.ListAPIView):
+    """List a webhook's dead letters, most recently failed first."""
+    serializer_class = WebhookDeadLetterSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = DeadLetterCursorPagination
+
+    def get_queryset(self):
+        """Return the dead letters of a webhook the user manages."""
+        webhook = generics.get_object_or_404(
+            owned_webhooks(self.request.user), pk=self.kwargs['pk'])
+        return WebhookDeadLetter.objects.filter(webhook=webhook)
+
+
+class WebhookRedeliverView(APIView):
+    """Queue a webhook's dead letters for delivery again."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """Move the chosen dead letters, or all of them, to the outbox."""
+        webhook = generics.get_object_or_404(
+            owned_webhooks(request.user), pk=pk)
+        serializer = RedeliverSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        letters = WebhookDeadLetter.objects.filter(webhook=webhook)
+        if 'ids' in serializer.validated_data:
+            letters = letters.filter(pk__in=serializer.validated_data['ids'])
+        return Response(
+            {'redelivered': redeliver(letters)},
+            status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,16 @@
+"""App configuration for webhooks_app.
+
+Declares the application config for outbound webhooks and connects the
+signal handlers that turn task and comment changes into webhook events.
+"""
+
+from django.apps import AppConfig
+
+
+class WebhooksAppConfig(AppConfig):
+    """Django AppConfig for the outbound webhook application."""
+    name = "webhooks_app"
+
+    def ready(self):
+        """Connect the app's signal handlers."""
+        from . import signals  # noqa: F401
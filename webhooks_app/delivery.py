@@ -0,0 +1,381 @@
+"""Batched delivery of webhook events.
+
+`claim_events` moves due events to 'sending' for one worker with a
+conditional UPDATE and a lease, so concurrent workers never deliver the
+same event and the events of a dead worker are taken over. `Dispatcher`
+groups the claimed events per webhook and POSTs up to
+`WEBHOOKS['BATCH_SIZE']` of them in one request from a thread pool, whose
+threads keep their HTTP connections alive between requests.
+
+A failed request is retried with exponential backoff; an event still
+failing after `WEBHOOKS['MAX_ATTEMPTS']` deliveries is moved to the
+dead-letter table. Deliveries are at least once and may arrive out of
+order: receivers should deduplicate by event id and order by
+`occurred_at` or, for tasks, `version`.
+
+Requests are signed with the webhook's secret in the
+`X-Kanban-Signature: sha256=<HMAC of the body>` header. Every new
+connection is checked against `webhooks_app.targets` and made to the
+checked address; the stored error only tells whether a delivery was
+blocked, could not connect, timed out or got an HTTP status, and at most
+`WEBHOOKS['MAX_RESPONSE_BYTES']` of a response are read.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import WebhookDeadLetter, WebhookEvent
+from .targets import UnsafeTarget, resolve
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryStats:
+    """Counters and recent delivery lags of this process."""
+
+    def __init__(self, samples=10000):
+        self._lock = threading.Lock()
+        self._samples = samples
+        self.reset()
+
+    def reset(self):
+        """Start counting from zero."""
+        with self._lock:
+            self.started = time.monotonic()
+            self.counts = Counter()
+            self.lags = deque(maxlen=self._samples)
+
+    def count(self, **counts):
+        """Add to the named counters."""
+        with self._lock:
+            self.counts.update(counts)
+
+    def add_lags(self, lags):
+        """Record the seconds between changes and their delivery."""
+        with self._lock:
+            self.lags.extend(lags)
+
+    def snapshot(self):
+        """Return the counters, throughput and lag percentiles."""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            lags = sorted(self.lags)
+            counts = dict(self.counts)
+
+        def percentile(share):
+            return lags[min(len(lags) - 1, int(len(lags) * share))]
+
+        return {
+            **counts,
+            'elapsed': elapsed,
+            'events_per_second': counts.get('delivered', 0) / elapsed
+            if elapsed else 0.0,
+            'lag_p50': percentile(0.5) if lags else None,
+            'lag_p95': percentile(0.95) if lags else None,
+            'lag_max': lags[-1] if lags else None,
+        }
+
+    def summary(self):
+        """Return the metrics as one line of text."""
+        snapshot = self.snapshot()
+
+        def seconds(value):
+            return 'n/a' if value is None else f'{value:.2f}s'
+
+        return (
+            f"{snapshot.get('delivered', 0)} events delivered in "
+            f"{snapshot.get('requests', 0)} requests over "
+            f"{snapshot.get('connections', 0)} connections "
+            f"({snapshot['events_per_second']:.1f}/s), "
+            f"{snapshot.get('retried', 0)} retried, "
+            f"{snapshot.get('dead_lettered', 0)} dead-lettered; lag p50 "
+            f"{seconds(snapshot['lag_p50'])}, "
+            f"p95 {seconds(snapshot['lag_p95'])}, "
+            f"max {seconds(snapshot['lag_max'])}")
+
+
+stats = DeliveryStats()
+
+
+class ConnectionPool(threading.local):
+    """Keep-alive HTTP connections of the current thread, per host."""
+
+    def __init__(self):
+        self.connections = {}
+
+    def post(self, url, body, headers, timeout):
+        """POST `body` to `url` and return the response status.
+
+        A request failing on a reused connection, which the server may
+        have closed meanwhile, is retried once on a new connection.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        for retry in (True, False):
+            connection = self.connections.get(key)
+            reused = connection is not None
+            if not reused:
+                connection = self.connect(parts.scheme, url, timeout)
+                self.connections[key] = connection
+                stats.count(connections=1)
+            try:
+                connection.request('POST', path, body, headers)
+                response = connection.getresponse()
+                response.read(settings.WEBHOOKS['MAX_RESPONSE_BYTES'])
+            except (OSError, HTTPException):
+                self.close(key)
+                if reused and retry:
+                    continue
+                raise
+            # A connection with an unread rest of the body can't be reused.
+            if response.will_close or not response.isclosed():
+                self.close(key)
+            return response.status
+
+    def connect(self, scheme, url, timeout):
+        """Return a new connection to the checked address of `url`."""
+        host, port, address = resolve(url)
+        connection_class = (
+            HTTPSConnection if scheme == 'https' else HTTPConnection)
+        connection = connection_class(host, port, timeout=timeout)
+        # The hook http.client opens its socket with: connect to the
+        # checked address instead of looking the host up again.
+        connection._create_connection = (
+            lambda _, *args: socket.create_connection((address, port), *args))
+        return connection
+
+    def close(self, key):
+        """Close and forget the connection to a host."""
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+
+_pool = ConnectionPool()
+
+
+def claim_events(limit):
+    """Claim up to `limit` due events and return them with their webhooks.
+
+    Pending events whose `deliver_after` has passed and events whose
+    lease expired (their worker died) are candidates. They are claimed
+    together under a fresh token, so a concurrent worker claiming some of
+    the same rows leaves them out of this claim.
+    """
+    now = timezone.now()
+    due = (Q(status='pending', deliver_after__lte=now)
+           | Q(status='sending', locked_until__lt=now))
+    ids = list(WebhookEvent.objects.filter(due).order_by(
+        'deliver_after', 'id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    WebhookEvent.objects.filter(due, id__in=ids).update(
+        status='sending', claimed_by=token, attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=settings.WEBHOOKS['LEASE']))
+    return list(WebhookEvent.objects.filter(claimed_by=token).select_related(
+        'webhook').order_by('occurred_at', 'id'))
+
+
+def batches(events):
+    """Split claimed events into per-webhook batches of `BATCH_SIZE`."""
+    size = settings.WEBHOOKS['BATCH_SIZE']
+    by_webhook = defaultdict(list)
+    for event in events:
+        by_webhook[event.webhook_id].append(event)
+    for webhook_events in by_webhook.values():
+        for start in range(0, len(webhook_events), size):
+            yield webhook_events[start:start + size]
+
+
+def sign(secret, body):
+    """Return the signature header value of a request body."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f'sha256={digest}'
+
+
+def render(events):
+    """Return the JSON request body for a batch of one webhook's events."""
+    return json.dumps({
+        'webhook': events[0].webhook_id,
+        'events': [
+            {
+                'id': event.pk,
+                'type': event.type,
+                'occurred_at': event.occurred_at,
+                'changes': event.changes,
+                'attempt': event.attempts,
+                'data': event.payload,
+            }
+            for event in events
+        ],
+    }, cls=DjangoJSONEncoder).encode()
+
+
+def deliver(events):
+    """POST a batch of one webhook's claimed events and record the result."""
+    try:
+        webhook = events[0].webhook
+        if not webhook.is_active:
+            _forget(events)
+            return
+        body = render(events)
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'kanban-webhooks',
+            'X-Kanban-Signature': sign(webhook.secret, body),
+        }
+        try:
+            status = _pool.post(
+                webhook.url, body, headers, settings.WEBHOOKS['TIMEOUT'])
+        except UnsafeTarget as exc:
+            error = f"Blocked: {exc}"
+        except TimeoutError:
+            error = "Timed out"
+        except (OSError, HTTPException) as exc:
+            logger.info("Webhook %s: %r", webhook.pk, exc)
+            error = "Connection failed"
+        else:
+            error = None if 200 <= status < 300 else f"HTTP {status}"
+        stats.count(requests=1)
+        if error is None:
+            _forget(events)
+            now = timezone.now()
+            stats.count(delivered=len(events))
+            stats.add_lags(
+                (now - event.occurred_at).total_seconds() for event in events)
+        else:
+            logger.warning(
+                "Webhook %s: delivery of %d events failed: %s",
+                webhook.pk, len(events), error)
+            _record_failure(events, error)
+    finally:
+        close_old_connections()
+
+
+def _claimed(events):
+    """Return the events of the batch still held by this claim."""
+    return WebhookEvent.objects.filter(
+        pk__in=[event.pk for event in events],
+        claimed_by=events[0].claimed_by)
+
+
+def _forget(events):
+    """Remove delivered or unwanted events from the outbox."""
+    _claimed(events).delete()
+
+
+def _record_failure(events, error):
+    """Reschedule events with exponential backoff or dead-letter them."""
+    config = settings.WEBHOOKS
+    now = timezone.now()
+    dead = [event for event in events
+            if event.attempts >= config['MAX_ATTEMPTS']]
+    retry = defaultdict(list)
+    for event in events:
+        if event.attempts < config['MAX_ATTEMPTS']:
+            retry[event.attempts].append(event)
+
+    with transaction.atomic():
+        for attempts, retried in retry.items():
+            delay = min(
+                config['BACKOFF'] * 2 ** (attempts - 1), config['MAX_BACKOFF'])
+            _claimed(retried).update(
+                status='pending', claimed_by=None, locked_until=None,
+                error=error, deliver_after=now + timedelta(seconds=delay))
+        if dead:
+            WebhookDeadLetter.objects.bulk_create([
+                WebhookDeadLetter(
+                    webhook_id=event.webhook_id, subject=event.subject,
+                    type=event.type, payload=event.payload,
+                    changes=event.changes, attempts=event.attempts,
+                    error=error, occurred_at=event.occurred_at, failed_at=now)
+                for event in dead
+            ])
+            _claimed(dead).delete()
+    stats.count(
+        failed=len(events), retried=len(events) - len(dead),
+        dead_lettered=len(dead))
+
+
+def redeliver(dead_letters):
+    """Move dead letters back to the outbox; return how many were moved."""
+    with transaction.atomic():
+        letters = list(dead_letters.select_for_update())
+        WebhookEvent.objects.bulk_create([
+            WebhookEvent(
+                webhook_id=letter.webhook_id, subject=letter.subject,
+                type=letter.type, payload=letter.payload,
+                changes=letter.changes, occurred_at=letter.occurred_at)
+            for letter in letters
+        ])
+        WebhookDeadLetter.objects.filter(
+            pk__in=[letter.pk for letter in letters]).delete()
+    return len(letters)
+
+
+class Dispatcher:
+    """Claim due events and deliver them in batches on a thread pool."""
+
+    def __init__(self, threads):
+        self.threads = threads
+        self.running = set()
+        self.stopping = threading.Event()
+
+    def run(self, poll_interval=1.0, until_empty=False, on_tick=None):
+        """Deliver events until interrupted or stopped.
+
+        With `until_empty`, return once the outbox is empty. `on_tick` is
+        called after every round of claiming.
+        """
+        limit = self.threads * settings.WEBHOOKS['BATCH_SIZE']
+        with ThreadPoolExecutor(
+                max_workers=self.threads,
+                thread_name_prefix='webhook-delivery') as pool:
+            while not self.stopping.is_set():
+                self.collect()
+                claimed = []
+                if len(self.running) < self.threads:
+                    claimed = claim_events(limit)
+                    self.running.update(
+                        pool.submit(deliver, batch)
+                        for batch in batches(claimed))
+                if on_tick is not None:
+                    on_tick()
+                if claimed:
+                    continue
+                if (until_empty and not self.running
+                        and not WebhookEvent.objects.exists()):
+                    return
+                time.sleep(poll_interval if not self.running else 0.01)
+
+    def stop(self):
+        """Make `run` return once the running deliveries are done."""
+        self.stopping.set()
+
+    def collect(self):
+        """Forget finished deliveries, logging unexpected errors."""
+        done = {future for future in self.running if future.done()}
+        for future in done:
+            if future.exception():
+                logger.error(
+                    "Webhook delivery error: %r", future.exception())
+        self.running -= done
@@ -0,0 +1,147 @@
+"""Recording of webhook events for task and comment changes.
+
+Signal handlers call `record` with a snapshot of the changed row. Nothing
+is written to the outbox inside the request's transaction, which may run
+on a shard database: once it commits, `write_changes` writes the events
+of the subscribed webhooks to the outbox in `default` from an
+`on_commit` callback. A change is therefore lost only when the process
+dies between the commit and that write, or when the write fails, which is
+logged.
+
+Rapid successive changes of the same task are coalesced: a new event
+waits `WEBHOOKS['COALESCE_SECONDS']` before it is delivered, and changes
+arriving meanwhile are merged into it. The merged event keeps the time of
+its first change and carries the latest state.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Webhook, WebhookEvent
+
+TASK_FIELDS = [
+    'id', 'board_id', 'title', 'description', 'status', 'priority',
+    'assignee_id', 'reviewer_id', 'due_date', 'archived', 'version',
+]
+COMMENT_FIELDS = ['id', 'task_id', 'author_id', 'content', 'created_at']
+
+
+def merge_types(first, second):
+    """Return the type of an event merged from two successive changes.
+
+    A deletion wins, and a created subject stays created.
+    """
+    if second.endswith('.deleted') or not first.endswith('.created'):
+        return second
+    return first
+
+
+def snapshot(instance, fields):
+    """Return the loaded `fields` of a row, without deferred columns."""
+    deferred = instance.get_deferred_fields()
+    return {
+        field: getattr(instance, field)
+        for field in fields if field not in deferred
+    }
+
+
+def write_changes(changes):
+    """Fan committed changes out to the subscribed webhooks' outboxes.
+
+    Changes merge into pending events of the same subject; returns the
+    number of events written or merged.
+    """
+    changes = coalesce(changes)
+    webhooks = {}
+    for webhook in Webhook.objects.filter(
+            board_id__in={change['board_id'] for change in changes},
+            is_active=True):
+        webhooks.setdefault(webhook.board_id, []).append(webhook)
+
+    events = {}
+    for change in changes:
+        for webhook in webhooks.get(change['board_id'], []):
+            if webhook.wants(change['type']):
+                events[webhook.pk, change['subject']] = change
+    if not events:
+        return 0
+
+    pending = find_pending(events)
+    delay = timedelta(seconds=settings.WEBHOOKS['COALESCE_SECONDS'])
+    # Reading the pending events outside the transaction lets it start
+    # with a write, which waits for SQLite's lock instead of failing.
+    with transaction.atomic():
+        new = merge_pending(events, pending)
+        WebhookEvent.objects.bulk_create([
+            WebhookEvent(
+                webhook_id=webhook_id, subject=subject,
+                type=change['type'], payload=change['payload'],
+                changes=change['changes'],
+                occurred_at=change['occurred_at'],
+                deliver_after=change['occurred_at'] + delay)
+            for (webhook_id, subject), change in new.items()
+        ])
+    return len(events)
+
+
+def coalesce(changes):
+    """Merge changes of the same subject, keeping order."""
+    merged = {}
+    for change in changes:
+        previous = merged.get(change['subject'])
+        if previous is not None:
+            change = {
+                **change,
+                'type': merge_types(previous['type'], change['type']),
+                'changes': previous['changes'] + change['changes'],
+                'occurred_at': previous['occurred_at'],
+            }
+        merged[change['subject']] = change
+    return list(merged.values())
+
+
+def find_pending(events):
+    """Return the pending events the new ones could be merged into."""
+    return list(WebhookEvent.objects.filter(
+        status='pending',
+        webhook_id__in={webhook_id for webhook_id, _ in events},
+        subject__in={subject for _, subject in events},
+    ).values_list('id', 'webhook_id', 'subject', 'type'))
+
+
+def merge_pending(events, pending):
+    """Merge events into pending ones; return those left to create.
+
+    Each merge is a conditional UPDATE, so an event claimed for delivery
+    meanwhile is left alone and a new event is created.
+    """
+    new = dict(events)
+    for pk, webhook_id, subject, event_type in pending:
+        change = new.get((webhook_id, subject))
+        if change is None:
+            continue
+        if WebhookEvent.objects.filter(pk=pk, status='pending').update(
+                type=merge_types(event_type, change['type']),
+                payload=change['payload'],
+                changes=F('changes') + change['changes']):
+            del new[webhook_id, subject]
+    return new
+
+
+def record(event_type, subject, board_id, payload, using=None):
+    """Write a change once the transaction of database `using` commits."""
+    change = {
+        'type': event_type,
+        'subject': subject,
+        'board_id': board_id,
+        'payload': payload,
+        'changes': 1,
+        'occurred_at': timezone.now(),
+    }
+    # A failed write is logged instead of failing the committed request.
+    transaction.on_commit(
+        lambda: write_changes([change]), using=using, robust=True)
@@ -0,0 +1,122 @@
+"""Management command measuring webhook throughput and delivery lag.
+
+Starts a local stub receiver (see webhooks_app.stub), subscribes a new
+board to it and changes each of its tasks several times in quick
+succession. An in-process dispatcher delivers the coalesced events while
+the changes are made (`--mode live`, measuring lag) or once they all
+wait in the outbox (`--mode backlog`, measuring batched throughput).
+Reports the cost of the saves, the events and requests sent, the
+connections used, throughput and lag.
+
+Delivery threads use their own database connections and cannot see an
+open transaction, so the benchmark data is committed and deleted
+afterwards; run it against a development database.
+"""
+
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from kanban_app.models import Board, Task
+from webhooks_app.delivery import Dispatcher, stats
+from webhooks_app.models import Webhook, WebhookEvent
+from webhooks_app.stub import StubServer
+
+
+class Command(BaseCommand):
+    """Deliver a burst of task changes to a local stub receiver."""
+    help = "Benchmark webhook coalescing and batched delivery."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks', type=int, default=200,
+            help="Number of tasks changed.")
+        parser.add_argument(
+            '--changes', type=int, default=5,
+            help="Successive saves of every task.")
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help="Delivery threads.")
+        parser.add_argument(
+            '--fail-rate', type=float, default=0.0,
+            help="Share of requests the stub answers with 503.")
+        parser.add_argument(
+            '--mode', choices=['live', 'backlog'], default='live')
+        parser.add_argument(
+            '--coalesce', type=float, default=0.5,
+            help="Seconds changes are held to be coalesced.")
+
+    def handle(self, *args, **options):
+        """Run the benchmark and remove its data afterwards."""
+        config = {
+            **settings.WEBHOOKS,
+            'COALESCE_SECONDS': options['coalesce'],
+            'BACKOFF': 0.1,
+            'ALLOWED_HOSTS': ['127.0.0.1'],
+        }
+        email = 'benchmark-webhooks@example.invalid'
+        user = User.objects.create_user(username=email, email=email)
+        stub = StubServer(fail_rate=options['fail_rate']).start()
+        try:
+            with override_settings(WEBHOOKS=config):
+                self.run(user, stub, options)
+        finally:
+            stub.stop()
+            for board in Board.objects.filter(owner=user):
+                board.delete()
+            user.delete()
+
+    def run(self, user, stub, options):
+        """Create the board and webhook, change the tasks and deliver."""
+        board = Board.objects.create(title="Benchmark", owner=user)
+        webhook = Webhook.objects.create(
+            board=board, url=stub.url, created_by=user)
+        stub.secret = webhook.secret
+        stats.reset()
+
+        live = options['mode'] == 'live'
+        dispatcher = Dispatcher(options['threads'])
+        delivering = threading.Thread(target=dispatcher.run, args=(0.05,))
+        if live:
+            delivering.start()
+        try:
+            started = time.perf_counter()
+            saves = 0
+            for number in range(options['tasks']):
+                task = Task.objects.create(
+                    board=board, title=f"Task {number}",
+                    due_date=date.today())
+                for change in range(options['changes'] - 1):
+                    task.title = f"Task {number} v{change + 2}"
+                    task.save(update_fields=['title'])
+                saves += options['changes']
+            recorded = time.perf_counter() - started
+            if not live:
+                time.sleep(options['coalesce'])
+                stats.reset()
+                delivering.start()
+            while WebhookEvent.objects.filter(webhook=webhook).exists():
+                time.sleep(0.05)
+            total = time.perf_counter() - started
+        finally:
+            dispatcher.stop()
+            delivering.join()
+
+        self.stdout.write(
+            f"{saves} saves in {recorded:.2f}s "
+            f"({recorded / saves * 1e6:.0f} us each), coalesced into "
+            f"{len(stub.events)} events "
+            f"({saves / max(len(stub.events), 1):.1f} changes per event).")
+        self.stdout.write(stats.summary())
+        self.stdout.write(
+            f"Stub received {stub.requests} requests "
+            f"({stub.failed} failed on purpose) over "
+            f"{len(stub.connections)} connections, "
+            f"{stub.bad_signatures} bad signatures; "
+            f"outbox drained {total - recorded:.2f}s after the last "
+            f"change.")
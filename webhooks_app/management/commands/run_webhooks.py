@@ -0,0 +1,54 @@
+"""Management command running the webhook delivery worker.
+
+Claims due webhook events and delivers them in batches on a thread pool
+(see webhooks_app.delivery). Run one or more of these processes next to
+the web workers; they share the outbox safely.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from webhooks_app.delivery import Dispatcher, stats
+
+
+class Command(BaseCommand):
+    """Deliver webhook events until interrupted."""
+    help = "Run the webhook delivery worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help="Number of batches delivered concurrently.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait when no event is due.")
+        parser.add_argument(
+            '--report-interval', type=float, default=60.0,
+            help="Seconds between throughput and lag reports; 0 for none.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the outbox is empty instead of polling.")
+
+    def handle(self, *args, **options):
+        """Run the dispatcher and report its metrics periodically."""
+        interval = options['report_interval']
+        self.reported = time.monotonic()
+
+        def report():
+            if interval and time.monotonic() - self.reported >= interval:
+                self.reported = time.monotonic()
+                self.report()
+
+        try:
+            Dispatcher(options['threads']).run(
+                options['poll_interval'], until_empty=options['once'],
+                on_tick=report)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping, waiting for running deliveries...")
+        self.report()
+
+    def report(self):
+        """Write the delivery metrics of this process so far."""
+        self.stdout.write(stats.summary())
+
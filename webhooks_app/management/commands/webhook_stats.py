@@ -0,0 +1,53 @@
+"""Management command reporting the webhook outbox backlog.
+
+Shows how many events wait per webhook, how far behind the oldest one
+is and how many events were dead-lettered recently. Throughput and
+delivery lag are reported by the `run_webhooks` workers themselves.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from webhooks_app.models import Webhook, WebhookDeadLetter
+
+
+class Command(BaseCommand):
+    """Print the outbox backlog and recent dead letters per webhook."""
+    help = "Report pending webhook events and dead letters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=1,
+            help="Count dead letters of the last this many days.")
+
+    def handle(self, *args, **options):
+        """Write one line per webhook with a backlog or dead letters."""
+        now = timezone.now()
+        since = now - timedelta(days=options['days'])
+        webhooks = Webhook.objects.annotate(
+            pending=Count('outbox', filter=Q(outbox__status='pending')),
+            sending=Count('outbox', filter=Q(outbox__status='sending')),
+            oldest=Min('outbox__occurred_at'),
+        ).filter(Q(pending__gt=0) | Q(sending__gt=0)).order_by('oldest')
+        dead = dict(WebhookDeadLetter.objects.filter(
+            failed_at__gte=since).values_list('webhook').annotate(
+            count=Count('id')).order_by())
+
+        shown = set()
+        for webhook in webhooks:
+            shown.add(webhook.pk)
+            lag = (now - webhook.oldest).total_seconds()
+            self.stdout.write(
+                f"#{webhook.pk} {webhook.url}: {webhook.pending} pending, "
+                f"{webhook.sending} sending, oldest {lag:.1f}s behind, "
+                f"{dead.get(webhook.pk, 0)} dead letters")
+        for webhook in Webhook.objects.filter(
+                pk__in=set(dead) - shown).order_by('id'):
+            self.stdout.write(
+                f"#{webhook.pk} {webhook.url}: no backlog, "
+                f"{dead[webhook.pk]} dead letters")
+        if not shown and not dead:
+            self.stdout.write("The outbox is empty.")
@@ -0,0 +1,200 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:08
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+import webhooks_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("kanban_app", "0017_task_active_board_due_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Webhook",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=500)),
+                ("events", models.JSONField(blank=True, default=list)),
+                (
+                    "secret",
+                    models.CharField(
+                        default=webhooks_app.models.generate_secret, max_length=64
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "board",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="webhooks",
+                        to="kanban_app.board",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="webhooks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="WebhookDeadLetter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=50)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("task.created", "Task created"),
+                            ("task.updated", "Task updated"),
+                            ("task.deleted", "Task deleted"),
+                            ("comment.created", "Comment created"),
+                            ("comment.deleted", "Comment deleted"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder
+                    ),
+                ),
+                ("changes", models.PositiveIntegerField(default=1)),
+                ("attempts", models.PositiveIntegerField()),
+                ("error", models.TextField(blank=True)),
+                ("occurred_at", models.DateTimeField()),
+                ("failed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "webhook",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dead_letters",
+                        to="webhooks_app.webhook",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["webhook", "-failed_at"], name="webhook_dead_letter_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=50)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("task.created", "Task created"),
+                            ("task.updated", "Task updated"),
+                            ("task.deleted", "Task deleted"),
+                            ("comment.created", "Comment created"),
+                            ("comment.deleted", "Comment deleted"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder
+                    ),
+                ),
+                ("changes", models.PositiveIntegerField(default=1)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("sending", "Sending")],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                (
+                    "occurred_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "deliver_after",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("claimed_by", models.UUIDField(blank=True, null=True)),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                (
+                    "webhook",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox",
+                        to="webhooks_app.webhook",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["deliver_after", "id"],
+                        name="webhook_event_due_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "sending")),
+                        fields=["locked_until"],
+                        name="webhook_event_lease_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["webhook", "subject"],
+                        name="webhook_event_merge_idx",
+                    ),
+                    models.Index(fields=["claimed_by"], name="webhook_event_claim_idx"),
+                ],
+            },
+        ),
+    ]
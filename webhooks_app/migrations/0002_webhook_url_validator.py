@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:32
+
+import webhooks_app.targets
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhooks_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="webhook",
+            name="url",
+            field=models.URLField(
+                max_length=500, validators=[webhooks_app.targets.validate_webhook_url]
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+"""Models for outbound webhooks.
+
+A `Webhook` subscribes an external URL to the task and comment changes
+of one board. Changes become `WebhookEvent` rows, an outbox that the
+`run_webhooks` worker claims through a conditional UPDATE and delivers
+in batches. Events that still fail after `WEBHOOKS['MAX_ATTEMPTS']`
+deliveries are moved to `WebhookDeadLetter`.
+"""
+
+import secrets
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from kanban_app.models import Board
+
+from .targets import validate_webhook_url
+
+EVENT_TYPES = [
+    ('task.created', 'Task created'),
+    ('task.updated', 'Task updated'),
+    ('task.deleted', 'Task deleted'),
+    ('comment.created', 'Comment created'),
+    ('comment.deleted', 'Comment deleted'),
+]
+
+
+def generate_secret():
+    """Return a new random signing secret."""
+    return secrets.token_hex(32)
+
+
+class Webhook(models.Model):
+    """An external URL notified of the changes on a board."""
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='webhooks')
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='webhooks')
+    url = models.URLField(max_length=500, validators=[validate_webhook_url])
+    # Event types to deliver; empty means all of them.
+    events = models.JSONField(default=list, blank=True)
+    secret = models.CharField(max_length=64, default=generate_secret)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.url} (board #{self.board_id})"
+
+    def wants(self, event_type):
+        """Return True when the webhook subscribes to `event_type`."""
+        return not self.events or event_type in self.events
+
+
+class WebhookEvent(models.Model):
+    """A change waiting in the outbox to be delivered to a webhook.
+
+    Further changes of the same `subject` are merged into a pending event
+    until it is claimed, so a burst of edits is delivered once.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+    ]
+
+    webhook = models.ForeignKey(
+        Webhook, on_delete=models.CASCADE, related_name='outbox')
+    # 'task:<id>' or 'comment:<id>'.
+    subject = models.CharField(max_length=50)
+    type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    # Number of changes merged into this event.
+    changes = models.PositiveIntegerField(default=1)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    occurred_at = models.DateTimeField(default=timezone.now)
+    deliver_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.UUIDField(null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deliver_after', 'id'],
+                condition=models.Q(status='pending'),
+                name='webhook_event_due_idx'),
+            models.Index(
+                fields=['locked_until'],
+                condition=models.Q(status='sending'),
+                name='webhook_event_lease_idx'),
+            models.Index(
+                fields=['webhook', 'subject'],
+                condition=models.Q(status='pending'),
+                name='webhook_event_merge_idx'),
+            models.Index(
+                fields=['claimed_by'], name='webhook_event_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.subject} -> webhook #{self.webhook_id}"
+
+
+class WebhookDeadLetter(models.Model):
+    """An event given up on after its last failed delivery."""
+    webhook = models.ForeignKey(
+        Webhook, on_delete=models.CASCADE, related_name='dead_letters')
+    subject = models.CharField(max_length=50)
+    type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    changes = models.PositiveIntegerField(default=1)
+    attempts = models.PositiveIntegerField()
+    error = models.TextField(blank=True)
+    occurred_at = models.DateTimeField()
+    failed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['webhook', '-failed_at'],
+                name='webhook_dead_letter_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.subject} (webhook #{self.webhook_id})"
@@ -0,0 +1,45 @@
+"""Signal handlers turning task and comment changes into webhook events.
+
+Only changes written through `save()` and `delete()` are reported;
+set-based updates such as archiving or column rebalancing are not.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from kanban_app.models import Comment, Task
+
+from .events import COMMENT_FIELDS, TASK_FIELDS, record, snapshot
+
+
+@receiver(post_save, sender=Task)
+def record_task_saved(sender, instance, created, using, **kwargs):
+    """Report a created or updated task."""
+    record(
+        'task.created' if created else 'task.updated', f'task:{instance.pk}',
+        instance.board_id, snapshot(instance, TASK_FIELDS), using)
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deleted(sender, instance, using, **kwargs):
+    """Report a deleted task."""
+    record(
+        'task.deleted', f'task:{instance.pk}', instance.board_id,
+        snapshot(instance, TASK_FIELDS), using)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_created(sender, instance, created, using, **kwargs):
+    """Report a new comment."""
+    if created:
+        record(
+            'comment.created', f'comment:{instance.pk}',
+            instance.task.board_id, snapshot(instance, COMMENT_FIELDS), using)
+
+
+@receiver(post_delete, sender=Comment)
+def record_comment_deleted(sender, instance, using, **kwargs):
+    """Report a deleted comment."""
+    record(
+        'comment.deleted', f'comment:{instance.pk}', instance.task.board_id,
+        snapshot(instance, COMMENT_FIELDS), using)
@@ -0,0 +1,81 @@
+"""Local HTTP endpoint standing in for webhook receivers.
+
+`StubServer` accepts webhook deliveries on 127.0.0.1 with keep-alive
+connections, checks their signatures and records the received events,
+the requests and the connections used. With `fail_rate` it answers a
+share of the requests with `503` to exercise retries. Used by
+`manage.py benchmark_webhooks` and for trying webhooks locally.
+"""
+
+import hmac
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .delivery import sign
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Record a delivery and answer `204`, or `503` when failing."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        """Read the batch and let the server record it."""
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        status = self.server.receive(
+            self.client_address, body,
+            self.headers.get('X-Kanban-Signature', ''))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """Stay quiet."""
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded keep-alive HTTP server recording webhook deliveries."""
+    daemon_threads = True
+
+    def __init__(self, port=0, secret=None, fail_rate=0.0):
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.secret = secret
+        self.fail_rate = fail_rate
+        self._lock = threading.Lock()
+        self.events = []
+        self.requests = 0
+        self.failed = 0
+        self.bad_signatures = 0
+        self.connections = set()
+
+    @property
+    def url(self):
+        """Return the URL to register as a webhook."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/hooks/'
+
+    def receive(self, client_address, body, signature):
+        """Record one request and return the status to answer with."""
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            if self.secret is not None and not hmac.compare_digest(
+                    signature, sign(self.secret, body)):
+                self.bad_signatures += 1
+                return 401
+            if random.random() < self.fail_rate:
+                self.failed += 1
+                return 503
+            self.events.extend(json.loads(body)['events'])
+        return 204
+
+    def start(self):
+        """Serve from a background thread and return the server."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,67 @@
+"""Checks keeping webhook deliveries away from internal addresses.
+
+Any user can own a board and register a webhook, so its URL must not
+point the worker at the server's own network: loopback, private,
+link-local (cloud metadata) and reserved addresses are refused, as are
+schemes other than http and https. URLs are checked when a webhook is
+saved and again before every new connection, since a host name may
+resolve elsewhere by then. The worker connects to the address it checked.
+
+Hosts listed in `WEBHOOKS['ALLOWED_HOSTS']` skip the address check, for
+receivers deliberately run on an internal network.
+"""
+
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+SCHEMES = {'http': 80, 'https': 443}
+
+
+class UnsafeTarget(ValueError):
+    """A webhook URL that must not be delivered to."""
+
+
+def is_public(address):
+    """Return True for an IP address reachable on the public internet."""
+    ip = ipaddress.ip_address(address)
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve(url):
+    """Return the checked `(host, port, address)` to deliver `url` to.
+
+    Raises `UnsafeTarget` for other schemes, unresolvable hosts and hosts
+    with any non-public address.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in SCHEMES:
+        raise UnsafeTarget("Only http and https URLs are allowed.")
+    try:
+        host, port = parts.hostname, parts.port or SCHEMES[parts.scheme]
+    except ValueError:
+        raise UnsafeTarget("The URL has an invalid port.")
+    if not host:
+        raise UnsafeTarget("The URL has no host.")
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        raise UnsafeTarget("The host could not be resolved.")
+    addresses = [info[4][0] for info in infos]
+    if host not in settings.WEBHOOKS['ALLOWED_HOSTS'] and not all(
+            is_public(address) for address in addresses):
+        raise UnsafeTarget("The host resolves to a non-public address.")
+    return host, port, addresses[0]
+
+
+def validate_webhook_url(url):
+    """Model field validator refusing unsafe webhook URLs."""
+    try:
+        resolve(url)
+    except UnsafeTarget as exc:
+        raise ValidationError(str(exc), code='unsafe_url')
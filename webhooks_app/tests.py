@@ -0,0 +1,63 @@
+"""Tests for webhooks_app.
+
+Unit tests for the webhook target checks. Host names are resolved through
+a mocked `getaddrinfo`, so the tests need no network.
+"""
+
+import socket
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+
+from .targets import UnsafeTarget, resolve, validate_webhook_url
+
+
+def resolving_to(address):
+    """Patch name resolution so every host resolves to `address`."""
+    info = (socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 0))
+    return mock.patch(
+        'webhooks_app.targets.socket.getaddrinfo', return_value=[info])
+
+
+class ResolveTests(SimpleTestCase):
+    """Webhook URLs must resolve to public addresses only."""
+
+    def test_rejects_internal_addresses(self):
+        for url in [
+            'http://127.0.0.1/hook',
+            'http://169.254.169.254/latest/meta-data/',
+            'http://10.0.0.1/hook',
+            'http://[::1]/hook',
+        ]:
+            with self.subTest(url=url), self.assertRaises(UnsafeTarget):
+                resolve(url)
+
+    def test_rejects_host_names_resolving_to_metadata_address(self):
+        with resolving_to('169.254.169.254'):
+            with self.assertRaises(UnsafeTarget):
+                resolve('https://hooks.example.com/')
+
+    def test_rejects_other_schemes(self):
+        for url in ['ftp://example.com/', 'file:///etc/passwd']:
+            with self.subTest(url=url), self.assertRaises(UnsafeTarget):
+                resolve(url)
+
+    def test_returns_checked_public_address(self):
+        with resolving_to('93.184.216.34'):
+            self.assertEqual(
+                resolve('https://hooks.example.com/'),
+                ('hooks.example.com', 443, '93.184.216.34'))
+
+    @override_settings(WEBHOOKS={
+        **settings.WEBHOOKS, 'ALLOWED_HOSTS': ['receiver.internal']})
+    def test_allowed_hosts_skip_address_check(self):
+        with resolving_to('10.0.0.5'):
+            self.assertEqual(
+                resolve('http://receiver.internal:8080/'),
+                ('receiver.internal', 8080, '10.0.0.5'))
+
+    def test_validator_raises_validation_error(self):
+        with self.assertRaises(ValidationError):
+            validate_webhook_url('http://127.0.0.1/hook')